@@ -0,0 +1,82 @@
+"""
+Import time benchmark.
+
+Imports the entry points of lerp in fresh interpreters under
+``python -X importtime`` and reports the cumulative import time of each
+one, with the heavy optional dependencies it loaded. The best of several
+runs is kept.
+
+    python benchmark/import_bench.py [--repeat 5]
+
+Exits with status 1 if an import failed, or if an entry point meant to
+need only NumPy and the C extension imported one of them.
+"""
+
+import argparse
+import subprocess
+import sys
+
+HEAVY = ["xarray", "pandas", "matplotlib", "openpyxl", "dask", "scipy"]
+
+# statement, whether it may import the heavy dependencies
+STATEMENTS = [
+    ("import numpy", False),
+    ("import lerp", False),
+    ("from lerp.core.interpolation import Table, interpolation", False),
+    ("from lerp.core.fileformat import read_table", False),
+    ("from lerp.core.shared import SharedTable", False),
+    ("import lerp.serve", False),
+    ("import lerp.util", False),
+    ("from lerp import Mesh", True),
+]
+
+
+def import_time(statement):
+    """Cumulative import time in seconds of statement, and the heavy
+    modules it imported"""
+    check = (f"{statement}; import sys; "
+             f"print(' '.join(m for m in {HEAVY!r} if m in sys.modules))")
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+                             capture_output=True, text=True)
+    if process.returncode:
+        raise ImportError(process.stderr.strip().splitlines()[-1])
+    total = 0
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, package = line.split("|")
+        if cumulative.strip().isdigit() and not package.startswith("  "):
+            # top level imports only, the nested ones are in their parents
+            total += int(cumulative)
+    return total * 1e-6, process.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per statement, the best one is kept")
+    args = parser.parse_args()
+
+    failed = False
+    for statement, heavy_allowed in STATEMENTS:
+        try:
+            runs = [import_time(statement) for _ in range(args.repeat)]
+        except ImportError as error:
+            print(f"{'failed':>11}  {statement:<58} {error}")
+            failed = True
+            continue
+        seconds, loaded = min(runs)
+        print(f"{seconds * 1e3:8.1f} ms  {statement:<58} "
+              f"{' '.join(loaded) or '-'}")
+        if loaded and not heavy_allowed:
+            failed = True
+
+    if failed:
+        print("Failed imports, or heavy dependencies imported by a light "
+              "entry point")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Memory regression benchmark.
+
+Runs a long series of interpolations across dimensions, methods and
+call paths, and checks that neither the resident memory of the process
+nor the memory traced by tracemalloc grows once warmed up: a few bytes
+leaked per call add up to megabytes over the run.
+
+    python benchmark/memory_bench.py [--calls 10000000]
+
+Exits with status 1 if the memory grew past the limits.
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tracemalloc
+from time import time
+
+import numpy as np
+from lerp import Mesh
+from lerp.core.interpolation import interpolation, locate
+
+
+METHODS = [("linear", "hold"), ("linear", "linear"), ("hold", "hold"),
+           ("nearest", "hold"), ("akima", "linear"),
+           ("fritsch_butland", "hold"), ("steffen", "linear")]
+
+NPOINTS = 16
+
+
+def rss():
+    """Resident memory of the process, in bytes"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # peak resident memory, in kilobytes on Linux, in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def build_cases():
+    """(name, callable) of each call path, per dimension and method"""
+    rng = np.random.default_rng(0)
+    cases = []
+
+    for ndim in range(1, 5):
+        shape = [11, 7, 5, 3][:ndim]
+        dims = "xyzt"[:ndim]
+        coords = [(d, np.sort(rng.random(n)) * 10) for d, n in zip(dims, shape)]
+        mesh = Mesh(coords=coords, data=rng.random(shape))
+        table = mesh.compile()
+        points = [rng.uniform(-1, 11, NPOINTS) for _ in range(ndim)]
+        point = [float(p[0]) for p in points]
+        locator = locate(table, points)
+        out = np.empty(NPOINTS)
+        wrong = points + [points[0]]
+
+        for interp, extrap in METHODS:
+            kwargs = dict(interp=interp, extrap=extrap)
+            name = f"{ndim}d {interp}/{extrap}"
+
+            def scalar(table=table, point=point, interp=interp,
+                       extrap=extrap):
+                table.interp, table.extrap = interp, extrap
+                return table(*point)
+
+            def error(kwargs=kwargs, table=table, wrong=wrong):
+                try:
+                    interpolation(table, wrong, **kwargs)
+                except ValueError:
+                    pass
+
+            cases += [
+                (f"{name} scalar", scalar),
+                (f"{name} table",
+                 lambda t=table, p=points, k=kwargs: interpolation(t, p, **k)),
+                (f"{name} xarray",
+                 lambda m=mesh, p=points, k=kwargs: interpolation(m, p, **k)),
+                (f"{name} out",
+                 lambda t=table, p=points, o=out, k=kwargs:
+                 interpolation(t, p, out=o, **k)),
+                (f"{name} gradient",
+                 lambda t=table, p=points, k=kwargs:
+                 interpolation(t, p, with_gradient=True, **k)),
+                (f"{name} grid",
+                 lambda t=table, p=[q[:3] for q in points], k=kwargs:
+                 interpolation(t, p, grid=True, **k)),
+                (f"{name} locator",
+                 lambda t=table, l=locator, k=kwargs:
+                 interpolation(t, l, **k)),
+                (f"{name} error", error),
+            ]
+        cases.append((f"{ndim}d locate",
+                      lambda t=table, p=points: locate(t, p)))
+    return cases
+
+
+def run(cases, calls):
+    """Call every case in turn until calls are made"""
+    rounds = max(1, calls // len(cases))
+
+    for _ in range(rounds):
+        for _, case in cases:
+            case()
+    return rounds * len(cases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=10_000_000,
+                        help="number of calls, spread over all the cases")
+    parser.add_argument("--checkpoints", type=int, default=10,
+                        help="number of memory samples along the run")
+    parser.add_argument("--rss-limit", type=float, default=4.,
+                        help="allowed resident memory growth, in MiB")
+    parser.add_argument("--traced-limit", type=float, default=64.,
+                        help="allowed traced memory growth, in KiB")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    print(f"{len(cases)} cases, {args.calls:,} calls")
+
+    # warm up the caches of the tables and the allocators
+    run(cases, 10 * len(cases))
+    tracemalloc.start()
+    run(cases, 10 * len(cases))
+    rss0 = rss()
+    traced0 = tracemalloc.get_traced_memory()[0]
+
+    start = time()
+    done = 0
+    for checkpoint in range(1, args.checkpoints + 1):
+        done += run(cases, args.calls // args.checkpoints)
+        rss_growth = (rss() - rss0) / 2 ** 20
+        traced_growth = (tracemalloc.get_traced_memory()[0] - traced0) / 2 ** 10
+        print(f"{done:>12,} calls  {time() - start:8.1f} s  "
+              f"rss {rss_growth:+8.2f} MiB  traced {traced_growth:+9.2f} KiB")
+    tracemalloc.stop()
+
+    if rss_growth > args.rss_limit or traced_growth > args.traced_limit:
+        print("Memory grew along the run")
+        sys.exit(1)
+    print("Memory is flat")
+
+
+if __name__ == "__main__":
+    main()
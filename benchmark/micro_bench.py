@@ -41,11 +41,13 @@ def tiny_bench():
         # print(f"Références à x: {sys.getrefcount(x)}")
         res2 = my_interp(_xi, x, y)
         t3 = time()
-        results[N] = [t1, t2, t3]
+        res3 = interp(_xi, x, y)
+        t4 = time()
+        results[N] = [t1, t2, t3, t4]
 
     all_runs = pd.DataFrame(results) * 1000
     all_runs = all_runs.T.diff(axis=1).loc[:, 1:]
-    all_runs.columns = ["Mesh", "Numpy"]
+    all_runs.columns = ["Mesh", "my_interp", "numpy.interp"]
     all_runs.index.name = "Interpolated array size"
 
     return all_runs
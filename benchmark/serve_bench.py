@@ -0,0 +1,91 @@
+"""
+Load test of lerp.serve.
+
+A server on a random table is queried by a pool of client processes,
+each one running concurrent clients sending single point queries. Prints
+the query rate, the latencies and the mean number of queries evaluated
+per interpolation() call.
+
+    python benchmark/serve_bench.py [--processes 4] [--clients 16]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+from time import perf_counter
+
+import numpy as np
+from lerp.core.interpolation import Table
+from lerp.serve import Client, Server
+
+
+def table(ndim=3, size=20):
+    rng = np.random.default_rng(0)
+    return Table(rng.random((size,) * ndim),
+                 [np.sort(rng.random(size)) for _ in range(ndim)])
+
+
+async def clients(path, nclients, queries, ndim, seed):
+    """Latencies of the queries of nclients concurrent clients"""
+    rng = np.random.default_rng(seed)
+    latencies = []
+
+    async def client():
+        connection = await Client.connect(path=path)
+        for point in rng.random((queries, ndim)).tolist():
+            start = perf_counter()
+            await connection('table', *point)
+            latencies.append(perf_counter() - start)
+        await connection.close()
+
+    await asyncio.gather(*[client() for _ in range(nclients)])
+    return latencies
+
+
+def client_process(args):
+    return asyncio.run(clients(*args))
+
+
+async def run(args, path):
+    server = Server({'table': table(args.ndim)}, window=args.window)
+    listening = await server.start(path)
+    loop = asyncio.get_running_loop()
+
+    with multiprocessing.Pool(args.processes) as pool:
+        start = perf_counter()
+        latencies = await loop.run_in_executor(None, pool.map, client_process, [
+            (path, args.clients, args.queries, args.ndim, seed)
+            for seed in range(args.processes)])
+        elapsed = perf_counter() - start
+    listening.close()
+    await listening.wait_closed()
+
+    latencies = np.concatenate(latencies) * 1e6
+    print(f"{server.queries:,} queries in {elapsed:.2f} s, "
+          f"{server.queries / elapsed:,.0f} queries/s")
+    print(f"latency p50 {np.percentile(latencies, 50):.0f} us, "
+          f"p99 {np.percentile(latencies, 99):.0f} us")
+    print(f"{server.queries / server.batches:.1f} queries per batch")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=4,
+                        help="client processes")
+    parser.add_argument("--clients", type=int, default=16,
+                        help="concurrent clients per process")
+    parser.add_argument("--queries", type=int, default=2000,
+                        help="sequential queries per client")
+    parser.add_argument("--ndim", type=int, default=3)
+    parser.add_argument("--window", type=float, default=0.0005,
+                        help="batching window of the server, in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, os.path.join(directory, "lerp.sock")))
+
+
+if __name__ == "__main__":
+    main()
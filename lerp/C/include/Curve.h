@@ -0,0 +1,72 @@
+#ifndef CURVE_H
+#define CURVE_H
+
+#include "NDTable.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Number of points located then blended together by Curve_eval */
+#define CURVE_BLOCK 256
+
+/**************************************************
+
+Compute and cache the value and the slope of the cell starting at each
+breakpoint of a 1-D table with a single variable, interleaved in
+table->slopes. The slope past the last breakpoint is zero. Does nothing
+if they are already cached.
+
+Must be called with the GIL held, before any Curve_eval. The slopes are
+those of the data at the time of the call: the data of a Table is a
+read-only snapshot, see Mesh_Init.
+
+Returns
+-------
+NDTABLE_INTERPSTATUS_OK or NDTABLE_INTERPSTATUS_NOMEMORY
+
+**************************************************/
+npy_intp
+Curve_prepare(Mesh_h table);
+
+/**************************************************
+
+Linear interpolation of a block of points of a 1-D table, from the slopes
+cached by Curve_prepare.
+
+Each value is a fused multiply-add of the slope of its cell, followed by
+a blend with the end values where they are held. The loop is vectorized
+with AVX2 gathers when the processor supports them, and the last
+breakpoint gives its sample exactly. The finite values may differ from
+the blend of the two samples of NDT_eval_linear by rounding. Around a
+non-finite sample the slope gives inf * 0 = NaN where the blend may give
+inf: the caller evaluates the non-finite values again with the blend.
+
+Parameters
+---------
+table :         Mesh_h
+                1-D table, prepared
+x :             npy_double[n]
+                Targets
+index :         npy_intp[n]
+                Left subscript of the cell of each target, in
+                [0, shape[0] - 2]
+n :             npy_intp
+                Number of targets
+extrap_method : NDTable_ExtrapMethod_t
+                Extrapolation method (hold or linear)
+result :        npy_double[n]
+                Values
+
+**************************************************/
+void
+Curve_eval(const Mesh_h table, const npy_double *x, const npy_intp *index,
+		   npy_intp n, NDTable_ExtrapMethod_t extrap_method,
+		   npy_double *result);
+
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,60 @@
+#ifndef GRID_H
+#define GRID_H
+
+#include "NDTable.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/**************************************************
+
+Multilinear evaluation of a table on the tensor product of per-axis
+target vectors.
+
+The indices and weights are computed once per target value by the caller.
+The table is then contracted one axis at a time, from the last to the
+first, which gives the result of NDT_eval_linear at each point of the grid
+with a cost of about one blend per intermediate value.
+
+Parameters
+---------
+table :         Mesh_h
+                Table handle
+index :         npy_intp *[ndim]
+                Left subscript of each target value, per axis
+weight :        npy_double *[ndim]
+                Weight of each target value, per axis
+size :          npy_intp[ndim]
+                Number of target values per axis
+extrap_method : NDTable_ExtrapMethod_t
+                Extrapolation method (hold or linear)
+result :        char *
+                Start of the result, in C order, with the nvars values of
+                each point contiguous
+result_stride : npy_intp
+                Byte stride between two consecutive result values
+result_type :   int
+                NPY_DOUBLE or NPY_FLOAT
+nthreads :      npy_intp
+                Maximum number of threads
+
+Returns
+-------
+NDTABLE_INTERPSTATUS_OK, or NDTABLE_INTERPSTATUS_NOMEMORY if the
+intermediate buffers could not be allocated
+
+**************************************************/
+npy_intp
+Grid_eval_linear(const Mesh_h table, npy_intp *const *index,
+                 npy_double *const *weight, const npy_intp *size,
+                 NDTable_ExtrapMethod_t extrap_method,
+                 char *result, npy_intp result_stride, int result_type,
+                 npy_intp nthreads);
+
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,77 @@
+#ifndef HERMITE_H
+#define HERMITE_H
+
+#include "NDTable.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Interpolation methods evaluated from cached Hermite coefficients */
+#define HERMITE_IS_CUBIC(method) ((method) == NDTABLE_INTERP_AKIMA ||\
+								  (method) == NDTABLE_INTERP_FRITSCH_BUTLAND ||\
+								  (method) == NDTABLE_INTERP_STEFFEN)
+
+/**************************************************
+
+Compute and cache the Hermite coefficients of a cubic method on the table.
+
+The slopes of the method are computed once per axis at every breakpoint,
+then along each further axis from the slopes of the previous ones. This
+gives for every sample the value and the 2^ndim - 1 mixed derivatives,
+interleaved in table->hermite[method - NDTABLE_INTERP_AKIMA] with shape
+data.shape + (2^ndim,), the variables of a table with several of them
+being evaluated through Mesh_Variables. They are owned by the float64
+array table->hermite_arrays[method - NDTABLE_INTERP_AKIMA]. Does nothing
+if they are already cached, or were set from a saved array.
+
+Must be called with the GIL held, before any Hermite_eval. The
+coefficients are those of the data at the time of the call: the data of
+a Table is a read-only snapshot, see Mesh_Init.
+
+Returns
+-------
+NDTABLE_INTERPSTATUS_OK or NDTABLE_INTERPSTATUS_NOMEMORY
+
+**************************************************/
+npy_intp
+Hermite_prepare(Mesh_h table, NDTable_InterpMethod_t interp_method);
+
+/**************************************************
+
+Tensor product cubic Hermite evaluation of a single point, and optionally
+of its gradient.
+
+The value is a polynomial of the 4^ndim cached coefficients of the cell.
+The end slopes are used to extrapolate linearly.
+
+Parameters
+---------
+table :         Mesh_h
+                Table handle, prepared for interp_method
+weight :        npy_double
+                Weights for the interpolation (normalized)
+subs :          npy_intp
+                Subscripts of the left sample point
+interp_method : NDTable_InterpMethod_t
+                akima, fritsch-butland or steffen
+extrap_method : NDTable_ExtrapMethod_t
+                Extrapolation method (hold or linear)
+result :        npy_double
+                interpolated result
+gradient :      npy_double[ndim]
+                partial derivatives of the result, or NULL
+
+**************************************************/
+npy_intp
+Hermite_eval(const Mesh_h table, const npy_double *weigths,
+			 const npy_intp *subs, NDTable_InterpMethod_t interp_method,
+			 NDTable_ExtrapMethod_t extrap_method,
+			 npy_double *result, npy_double *gradient);
+
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
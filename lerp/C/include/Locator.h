@@ -0,0 +1,44 @@
+
+#ifndef LOCATOR_H
+#define LOCATOR_H
+
+#include "Mesh.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/*
+Located targets.
+
+Holds the cell subscripts and weights of a set of points along the
+breakpoints of a Table, so that every table sharing these breakpoints
+can be evaluated at the points without searching them again.
+*/
+typedef struct {
+	PyObject_HEAD
+	npy_intp		ndim;				// Number of axes
+	npy_intp		nd;					// Dimensions of the points
+	npy_intp		shape[NPY_MAXDIMS];	// Broadcast shape of the points
+	npy_intp		size;				// Number of points
+	int				typenum;			// NPY_FLOAT if all targets were float32
+	PyArrayObject	*axes[NPY_MAXDIMS];	// Breakpoints the points were located on
+	PyArrayObject	*index;				// (ndim,) + shape subscripts
+	PyArrayObject	*weight;			// (ndim,) + shape weights
+} LocatorObject;
+
+extern PyTypeObject Locator_Type;
+
+#define Locator_Check(op) PyObject_TypeCheck(op, &Locator_Type)
+
+LocatorObject *Locator_New(const Mesh_h table, npy_intp nd,
+                           const npy_intp *shape, int typenum);
+int Locator_Matches(const LocatorObject *locator, const Mesh_h table);
+int Locator_InBounds(const LocatorObject *locator, const Mesh_h table);
+
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -5,15 +5,32 @@
 extern "C" {
 #endif
 
+/* Number of cubic interpolation methods with cached coefficients */
+#define MESH_NCUBIC 3
+
 typedef struct {
 	npy_intp 	shape[NPY_MAXDIMS]; 	// Array of data array dimensions.
+	npy_intp 	strides[NPY_MAXDIMS]; 	// Byte strides of the data array.
 	npy_intp	ndim;			    	// Number of array dimensions.
 	npy_intp	size;			    	// Number of elements in the array.
 	npy_intp    itemsize;		    	// Length of one array element in bytes.
-	npy_double  *data;			    	// Buffer object pointing to the start
+	npy_intp	nvars;					// Values per sample, on a trailing
+										// axis of the data, 1 if none
+	int			typenum;				// NPY_DOUBLE or NPY_FLOAT
+	void		*data;			    	// Buffer object pointing to the start
 										// of the array’s data.
 	npy_double  *coords[NPY_MAXDIMS]; 	// array of pointers to the coords values
 	PyArrayObject  *array;			    	// Buffer object pointing to the start
+	PyArrayObject  *axes[NPY_MAXDIMS];	// Owned axes arrays (NULL if borrowed)
+	int			uniform[NPY_MAXDIMS];	// Equally spaced breakpoints
+	npy_double	origin[NPY_MAXDIMS];	// First breakpoint of uniform axes
+	npy_double	inv_step[NPY_MAXDIMS];	// Inverse spacing of uniform axes
+	npy_double	*hermite[MESH_NCUBIC];	// Cubic coefficients per method,
+										// computed on first use
+	PyArrayObject	*hermite_arrays[MESH_NCUBIC];	// Owners of the cubic
+										// coefficients (NULL in views)
+	npy_double	*slopes;				// 1-D tables, value and slope per
+										// cell, computed on first use
 
 	// npy_intp    (*interpmethod)(npy_intp);		    // Function for interpolation
 } Mesh_t;
@@ -23,11 +40,50 @@ typedef Mesh_t * Mesh_h;
 
 PyObject * my_interp(PyObject *, PyObject *, PyObject *);
 
-Mesh_h Mesh_FromXarray(PyObject *);
+/* Fill an allocated Mesh_t from an xarray.DataArray: its data, with the
+   coordinate of each of its dims as breakpoints. Same ownership as
+   Mesh_Init, release with Mesh_Clear.
+   Returns 0 on success, -1 with a Python exception set otherwise. */
+int Mesh_FromXarray(Mesh_h, PyObject *mesh);
+
+/* Fill an allocated Mesh_t from a data array and a sequence of axes.
+   The data has one dimension per axis, plus an optional trailing axis of
+   output variables.
+   float32 data is kept as is, anything else is converted to float64.
+   The axes are always converted to float64.
+   Aligned C contiguous arrays of these types are used in place, read-only
+   ones included, so that a memory mapped table is not loaded in memory.
+   With snapshot, writeable data is copied instead and the data array of
+   the mesh is left read-only, so that the caches derived from it stay
+   valid for the life of the mesh. Read-only data is assumed not to
+   change.
+   The mesh owns a reference to every array it points to.
+   Returns 0 on success, -1 with a Python exception set otherwise. */
+int Mesh_Init(Mesh_h, PyObject *data, PyObject *axes, int snapshot);
+
+/* Data with one more dimension than the axes: its trailing axis holds
+   nvars output variables, blended together at each point. */
+#define Mesh_IS_VECTOR(mesh) (PyArray_NDIM((mesh)->array) > (mesh)->ndim)
+
+/* Per variable tables of a table with several variables, sharing its
+   breakpoints and data. Each one has nvars = 1 and owns no reference; the
+   cached Hermite coefficients must be prepared before. Release with free().
+   Returns NULL if out of memory. */
+Mesh_h Mesh_Variables(const Mesh_h);
+
+/* Type of the data array of a Mesh_t built from data: NPY_FLOAT for a
+   float32 array, NPY_DOUBLE otherwise. */
+int Mesh_DataType(PyObject *data);
+
+/* Detect equally spaced axes and set uniform, origin and inv_step. */
+void Mesh_DetectUniform(Mesh_h);
+
+/* Release the arrays owned by a Mesh_t filled by Mesh_Init. */
+void Mesh_Clear(Mesh_h);
 
 
 #ifdef __cplusplus
 }
 #endif
 
-#endif
\ No newline at end of file
+#endif
@@ -1,138 +1,223 @@
-/*
-BSD 3-Clause License
-
-Copyright (c) 2017, Dassault Systemes.
-All rights reserved.
-
-Redistribution and use in source and binary forms, with or without
-modification, are permitted provided that the following conditions are met:
-
-* Redistributions of source code must retain the above copyright notice, this
-  list of conditions and the following disclaimer.
-
-* Redistributions in binary form must reproduce the above copyright notice,
-  this list of conditions and the following disclaimer in the documentation
-  and/or other materials provided with the distribution.
-
-* Neither the name of the copyright holder nor the names of its
-  contributors may be used to endorse or promote products derived from
-  this software without specific prior written permission.
-
-THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
-AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
-IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
-DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
-FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
-DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
-SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
-CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
-OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
-OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-*/
-
-#include <Python.h>
-#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
-// #include <stdio.h>
-#include <numpy/arrayobject.h>
-#include <structmember.h>
-#include "Mesh.h"
-
-
-#ifndef NDTABLE_H_
-#define NDTABLE_H_
-
-#ifdef __cplusplus
-extern "C" {
-#endif
-
-
-/*
-Macro for interpolation function definition
-
-Paramters
----------
-
-table			:	Mesh_h
-					Table handle
-weight			:	npy_double
-					Weights for the interpolation (normalized)
-subs    		:   npy_double
-					Subscripts of the left sample point
-nsubs			:   npy_double
-					Subscripts of the right (next) sample point
-dim				:	npy_intp
-					Index of the current dimension
-interp_method	:	NDTable_InterpMethod_t
-					Interpolation method
-extrap_method	:	NDTable_ExtrapMethod_t
-					Extrapolation method
-result			: 	npy_double
-					interpolated result
-*/
-#define INTERP_PARAMETERS (const Mesh_h table, const npy_double *weigths,\
-						   const npy_intp *subs, npy_intp *nsubs, npy_intp dim,\
-						   NDTable_InterpMethod_t interp_method,\
-						   NDTable_ExtrapMethod_t extrap_method, npy_double *result);
-
-/*! Interpolation methods */
-typedef enum {
-	NDTABLE_INTERP_HOLD = 1,
-	NDTABLE_INTERP_NEAREST,
-	NDTABLE_INTERP_LINEAR,
-	NDTABLE_INTERP_AKIMA,
-	NDTABLE_INTERP_FRITSCH_BUTLAND,
-	NDTABLE_INTERP_STEFFEN
-} NDTable_InterpMethod_t;
-
-/*! Extrapolation methods */
-typedef enum {
-    NDTABLE_EXTRAP_HOLD = 1,
-	NDTABLE_EXTRAP_LINEAR,
-	NDTABLE_EXTRAP_NONE
-} NDTable_ExtrapMethod_t;
-
-
-/* Array attributes */
-typedef struct {
-	npy_intp 	shape[NPY_MAXDIMS]; 	  // Array of data array dimensions.
-	npy_intp	ndim;			    	 // Number of array dimensions.
-	PyArrayObject  *coords[NPY_MAXDIMS]; //!< array of pointers to the scale values
-} NDTargets_t;
-
-/* Array attributes */
-typedef struct {
-	npy_intp   size;				// Number of elements in the array.
-	npy_double *data;			    // Buffer object pointing to the start
-} NDResult_t;
-
-typedef NDTargets_t * NDTargets_h;
-typedef NDResult_t  * NDResult_h;
-
-/*! Interpolation status codes */
-typedef enum {
-	NDTABLE_INTERPSTATUS_UNKNOWN_METHOD  = -4,
-	NDTABLE_INTERPSTATUS_DATASETNOTFOUND = -3,
-	NDTABLE_INTERPSTATUS_WRONGNPARAMS    = -2,
-	NDTABLE_INTERPSTATUS_OUTOFBOUNS      = -1,
-    NDTABLE_INTERPSTATUS_OK              =  0
-} NDTable_InterpolationStatus;
-
-
-npy_intp NDT_eval_internal INTERP_PARAMETERS;
-
-typedef npy_intp ( *interp_fun ) INTERP_PARAMETERS;
-
-static npy_intp interp_hold INTERP_PARAMETERS;
-static npy_intp interp_nearest INTERP_PARAMETERS;
-static npy_intp interp_linear INTERP_PARAMETERS;
-static npy_intp interp_akima INTERP_PARAMETERS;
-static npy_intp interp_fritsch_butland INTERP_PARAMETERS;
-static npy_intp interp_steffen INTERP_PARAMETERS;
-static npy_intp extrap_hold INTERP_PARAMETERS;
-static npy_intp extrap_linear INTERP_PARAMETERS;
-
-#ifdef __cplusplus
-}
-#endif
-
-#endif
+/*
+BSD 3-Clause License
+
+Copyright (c) 2017, Dassault Systemes.
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+
+* Redistributions of source code must retain the above copyright notice, this
+  list of conditions and the following disclaimer.
+
+* Redistributions in binary form must reproduce the above copyright notice,
+  this list of conditions and the following disclaimer in the documentation
+  and/or other materials provided with the distribution.
+
+* Neither the name of the copyright holder nor the names of its
+  contributors may be used to endorse or promote products derived from
+  this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+*/
+
+#include <Python.h>
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+// #include <stdio.h>
+#include <numpy/arrayobject.h>
+#include <structmember.h>
+#include "Mesh.h"
+
+
+#ifndef NDTABLE_H_
+#define NDTABLE_H_
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+
+/*
+Macro for interpolation function definition
+
+Paramters
+---------
+
+table			:	Mesh_h
+					Table handle
+weight			:	npy_double
+					Weights for the interpolation (normalized)
+subs    		:   npy_double
+					Subscripts of the left sample point
+nsubs			:   npy_double
+					Subscripts of the right (next) sample point
+dim				:	npy_intp
+					Index of the current dimension
+interp_method	:	NDTable_InterpMethod_t
+					Interpolation method
+extrap_method	:	NDTable_ExtrapMethod_t
+					Extrapolation method
+result			: 	npy_double
+					interpolated result
+*/
+#define INTERP_PARAMETERS (const Mesh_h table, const npy_double *weigths,\
+						   const npy_intp *subs, npy_intp *nsubs, npy_intp dim,\
+						   NDTable_InterpMethod_t interp_method,\
+						   NDTable_ExtrapMethod_t extrap_method, npy_double *result);
+
+/*! Interpolation methods */
+typedef enum {
+	NDTABLE_INTERP_HOLD = 1,
+	NDTABLE_INTERP_NEAREST,
+	NDTABLE_INTERP_LINEAR,
+	NDTABLE_INTERP_AKIMA,
+	NDTABLE_INTERP_FRITSCH_BUTLAND,
+	NDTABLE_INTERP_STEFFEN
+} NDTable_InterpMethod_t;
+
+/*! Extrapolation methods */
+typedef enum {
+    NDTABLE_EXTRAP_HOLD = 1,
+	NDTABLE_EXTRAP_LINEAR,
+	NDTABLE_EXTRAP_NONE
+} NDTable_ExtrapMethod_t;
+
+/* Methods by name, linear and hold when unknown. Defined in
+   Interpolation.c. */
+NDTable_InterpMethod_t get_interp_method(char *method);
+NDTable_ExtrapMethod_t get_extrap_method(char *method);
+
+
+/* Array attributes */
+typedef struct {
+	npy_intp 	shape[NPY_MAXDIMS]; 	  // Array of data array dimensions.
+	npy_intp	ndim;			    	 // Number of array dimensions.
+	PyArrayObject  *coords[NPY_MAXDIMS]; //!< array of pointers to the scale values
+} NDTargets_t;
+
+/* Array attributes */
+typedef struct {
+	npy_intp   size;				// Number of elements in the array.
+	npy_double *data;			    // Buffer object pointing to the start
+} NDResult_t;
+
+typedef NDTargets_t * NDTargets_h;
+typedef NDResult_t  * NDResult_h;
+
+/*! Interpolation status codes */
+typedef enum {
+	NDTABLE_INTERPSTATUS_NOMEMORY        = -5,
+	NDTABLE_INTERPSTATUS_UNKNOWN_METHOD  = -4,
+	NDTABLE_INTERPSTATUS_DATASETNOTFOUND = -3,
+	NDTABLE_INTERPSTATUS_WRONGNPARAMS    = -2,
+	NDTABLE_INTERPSTATUS_OUTOFBOUNS      = -1,
+    NDTABLE_INTERPSTATUS_OK              =  0
+} NDTable_InterpolationStatus;
+
+
+npy_intp NDT_eval_internal INTERP_PARAMETERS;
+
+/*
+Multilinear evaluation of a single point.
+
+Iterates over the 2^ndim corners of the cell using the byte strides of the
+table instead of recursing per dimension. Gives the same result as
+NDT_eval_internal with NDTABLE_INTERP_LINEAR.
+
+table			:	Mesh_h
+					Table handle
+weight			:	npy_double
+					Weights for the interpolation (normalized)
+subs    		:   npy_double
+					Subscripts of the left sample point
+extrap_method	:	NDTable_ExtrapMethod_t
+					Extrapolation method (hold or linear)
+result			: 	npy_double[nvars]
+					interpolated result, one value per variable
+*/
+npy_intp NDT_eval_linear(const Mesh_h table, const npy_double *weigths,
+						 const npy_intp *subs,
+						 NDTable_ExtrapMethod_t extrap_method,
+						 npy_double *result);
+
+/*
+Kernel evaluating a single point for one combination of the methods, the
+data type and the number of dimensions.
+
+Same parameters as NDT_eval_linear, with the methods of the call. The
+result holds one value per variable of the table.
+*/
+typedef npy_intp (*NDTable_Kernel_t)(const Mesh_h table,
+									 const npy_double *weigths,
+									 const npy_intp *subs,
+									 NDTable_InterpMethod_t interp_method,
+									 NDTable_ExtrapMethod_t extrap_method,
+									 npy_double *result);
+
+/* Dimensions up to which the multilinear kernels are unrolled */
+#define NDT_SPECIALIZED_NDIM 4
+
+/*
+Kernel of the methods for table, picked once before the loop over the
+points so that the loop does not branch on the methods. Tables with up
+to NDT_SPECIALIZED_NDIM dimensions, all with two breakpoints or more, get
+multilinear kernels unrolled for their number of dimensions and their
+extrapolation method, and single sample kernels for the hold and nearest
+methods. The other combinations fall back to the generic evaluation.
+The cubic kernels need Hermite_prepare.
+*/
+NDTable_Kernel_t NDT_select_kernel(const Mesh_h table,
+								   NDTable_InterpMethod_t interp_method,
+								   NDTable_ExtrapMethod_t extrap_method);
+
+/*
+Value and gradient of a single point.
+
+Uses the same interpolants as NDT_eval_internal, or Hermite_eval for the
+cubic methods. The partial derivatives
+are taken with respect to the coordinates of the point; they are zero along
+the held dimensions.
+
+table			:	Mesh_h
+					Table handle
+weight			:	npy_double
+					Weights for the interpolation (normalized)
+subs    		:   npy_double
+					Subscripts of the left sample point
+interp_method	:	NDTable_InterpMethod_t
+					Interpolation method
+extrap_method	:	NDTable_ExtrapMethod_t
+					Extrapolation method
+result			: 	npy_double
+					interpolated result
+gradient		: 	npy_double[ndim]
+					partial derivatives of the result
+*/
+npy_intp NDT_eval_gradient(const Mesh_h table, const npy_double *weigths,
+						   const npy_intp *subs,
+						   NDTable_InterpMethod_t interp_method,
+						   NDTable_ExtrapMethod_t extrap_method,
+						   npy_double *result, npy_double *gradient);
+
+typedef npy_intp ( *interp_fun ) INTERP_PARAMETERS;
+
+static npy_intp interp_hold INTERP_PARAMETERS;
+static npy_intp interp_nearest INTERP_PARAMETERS;
+static npy_intp interp_linear INTERP_PARAMETERS;
+static npy_intp extrap_hold INTERP_PARAMETERS;
+static npy_intp extrap_linear INTERP_PARAMETERS;
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,265 @@
+/*
+Multilinear kernels, included by NDTable.c once per data type.
+
+Before inclusion, define
+	DATA_T					the C type of the table values
+	NDT_SUFFIX				the suffix of the generated names:
+	eval_linear_<suffix>		runtime number of dimensions and
+								extrapolation method
+	eval_linear_vector_<suffix>	tables with several variables
+	linear_kernels_<suffix>		NDTable_Kernel_t specialized per
+								extrapolation method and number of
+								dimensions, see NDT_select_kernel
+
+The values are read as DATA_T and blended in double precision.
+*/
+
+#define NDT_CAT_(a, b) a##b
+#define NDT_CAT(a, b) NDT_CAT_(a, b)
+#define NDT_NAME(name) NDT_CAT(name, NDT_SUFFIX)
+
+/*
+Value of the table at a byte offset from the start of the data buffer
+*/
+#define AT(base, offset) ((npy_double) *(const DATA_T *)((base) + (offset)))
+
+/*
+Linear blend of the left and right values, in the same order of operations
+as interp_linear
+*/
+#define BLEND(a, b, w) ((1 - (w)) * (a) + (w) * (b))
+
+
+/*
+Blend of the corners of the cell at base. Inlined with a constant ndim by
+the specialized kernels, which leaves a single case.
+*/
+NPY_FINLINE npy_double NDT_NAME(blend_cell_)(const char *base,
+											 const npy_double *w,
+											 const npy_intp *step,
+											 const npy_intp ndim)
+{
+	npy_intp dim;
+
+	switch (ndim) {
+	case 0:
+		return AT(base, 0);
+
+	case 1:
+		return BLEND(AT(base, 0), AT(base, step[0]), w[0]);
+
+	case 2: {
+		const npy_intp s0 = step[0], s1 = step[1];
+		const npy_double a = BLEND(AT(base, 0),  AT(base, s1),      w[1]);
+		const npy_double b = BLEND(AT(base, s0), AT(base, s0 + s1), w[1]);
+		return BLEND(a, b, w[0]);
+	}
+
+	case 3: {
+		const npy_intp s0 = step[0], s1 = step[1], s2 = step[2];
+		const npy_double a0 = BLEND(AT(base, 0),       AT(base, s2),           w[2]);
+		const npy_double a1 = BLEND(AT(base, s1),      AT(base, s1 + s2),      w[2]);
+		const npy_double b0 = BLEND(AT(base, s0),      AT(base, s0 + s2),      w[2]);
+		const npy_double b1 = BLEND(AT(base, s0 + s1), AT(base, s0 + s1 + s2), w[2]);
+		return BLEND(BLEND(a0, a1, w[1]), BLEND(b0, b1, w[1]), w[0]);
+	}
+
+	case 4: {
+		const npy_intp s0 = step[0], s1 = step[1], s2 = step[2], s3 = step[3];
+		npy_double v[4];
+		npy_intp i;
+
+		// reduce the two last dimensions for each corner of the first two
+		for (i = 0; i < 4; i++) {
+			const char *p = base + ((i & 2) ? s0 : 0) + ((i & 1) ? s1 : 0);
+			const npy_double a = BLEND(AT(p, 0),  AT(p, s3),      w[3]);
+			const npy_double b = BLEND(AT(p, s2), AT(p, s2 + s3), w[3]);
+			v[i] = BLEND(a, b, w[2]);
+		}
+		return BLEND(BLEND(v[0], v[1], w[1]), BLEND(v[2], v[3], w[1]), w[0]);
+	}
+
+	default: {
+		/* Walk the corners in C order, the last dimension being the least
+		   significant bit. Each time a right sample is reached it is blended
+		   with the pending left sample of the same dimension, which gives
+		   the reduction order of the recursive implementation. */
+		npy_double pending[NPY_MAXDIMS];
+		const npy_intp ncorners = ((npy_intp) 1) << ndim;
+		npy_double result = 0.;
+		npy_intp corner;
+
+		for (corner = 0; corner < ncorners; corner++) {
+			npy_intp offset = 0;
+			npy_double v;
+
+			for (dim = 0; dim < ndim; dim++) {
+				if ((corner >> (ndim - 1 - dim)) & 1) {
+					offset += step[dim];
+				}
+			}
+			v = AT(base, offset);
+
+			dim = ndim - 1;
+			while (dim >= 0 && ((corner >> (ndim - 1 - dim)) & 1)) {
+				v = BLEND(pending[dim], v, w[dim]);
+				dim--;
+			}
+			if (dim >= 0) {
+				pending[dim] = v;
+			}
+			else {
+				result = v;
+			}
+		}
+		return result;
+	}
+	}
+}
+
+
+static npy_intp NDT_NAME(eval_linear_)(const Mesh_h table,
+									   const npy_double *weigths,
+									   const npy_intp *subs,
+									   NDTable_ExtrapMethod_t extrap_method,
+									   npy_double *result)
+{
+	npy_double w[NPY_MAXDIMS];		// weight of the right sample per dimension
+	npy_intp step[NPY_MAXDIMS];		// byte offset from left to right sample
+	const char *base = linear_cell(table, weigths, subs, extrap_method,
+								   w, step);
+
+	*result = NDT_NAME(blend_cell_)(base, w, step, table->ndim);
+	return NDTABLE_INTERPSTATUS_OK;
+}
+
+
+/*
+Multilinear kernel of ndim dimensions, all with two breakpoints or more,
+with hold extrapolation if hold is set and linear otherwise. Both are
+constants of the specialized kernels below: the checks of linear_cell on
+the methods and the single breakpoint axes are compiled out.
+*/
+NPY_FINLINE npy_double NDT_NAME(eval_linear_fixed_)(const Mesh_h table,
+													const npy_double *weigths,
+													const npy_intp *subs,
+													const npy_intp ndim,
+													const int hold)
+{
+	npy_double w[NPY_MAXDIMS];
+	npy_intp step[NPY_MAXDIMS];
+	const char *base = (const char *) table->data;
+	npy_intp dim;
+
+	for (dim = 0; dim < ndim; dim++) {
+		const npy_double x = weigths[dim];
+		const npy_intp stride = table->strides[dim];
+
+		base += subs[dim] * stride;
+		if (hold) {
+			// a held sample: the right one past the cell, else the left one
+			const int outside = x < 0. || x > 1.;
+
+			base += x > 1. ? stride : 0;
+			w[dim] = outside ? 0. : x;
+			step[dim] = outside ? 0 : stride;
+		}
+		else {
+			w[dim] = x;
+			step[dim] = stride;
+		}
+	}
+	return NDT_NAME(blend_cell_)(base, w, step, ndim);
+}
+
+#define NDT_LINEAR_KERNEL(ndim, hold, method) \
+static npy_intp NDT_NAME(eval_linear_##ndim##_##method##_)( \
+	const Mesh_h table, const npy_double *weigths, const npy_intp *subs, \
+	NDTable_InterpMethod_t interp_method, \
+	NDTable_ExtrapMethod_t extrap_method, npy_double *result) \
+{ \
+	*result = NDT_NAME(eval_linear_fixed_)(table, weigths, subs, ndim, hold); \
+	return NDTABLE_INTERPSTATUS_OK; \
+}
+
+NDT_LINEAR_KERNEL(1, 1, hold)
+NDT_LINEAR_KERNEL(2, 1, hold)
+NDT_LINEAR_KERNEL(3, 1, hold)
+NDT_LINEAR_KERNEL(4, 1, hold)
+NDT_LINEAR_KERNEL(1, 0, linear)
+NDT_LINEAR_KERNEL(2, 0, linear)
+NDT_LINEAR_KERNEL(3, 0, linear)
+NDT_LINEAR_KERNEL(4, 0, linear)
+
+/* Indexed by [extrapolation is linear][ndim - 1] */
+static const NDTable_Kernel_t NDT_NAME(linear_kernels_)[2][NDT_SPECIALIZED_NDIM] = {
+	{
+		NDT_NAME(eval_linear_1_hold_), NDT_NAME(eval_linear_2_hold_),
+		NDT_NAME(eval_linear_3_hold_), NDT_NAME(eval_linear_4_hold_)
+	},
+	{
+		NDT_NAME(eval_linear_1_linear_), NDT_NAME(eval_linear_2_linear_),
+		NDT_NAME(eval_linear_3_linear_), NDT_NAME(eval_linear_4_linear_)
+	}
+};
+
+#undef NDT_LINEAR_KERNEL
+
+
+/*
+Values of the nvars variables of the table, written to result. The values
+of the variables of a sample are contiguous: each corner of the cell is
+weighted once and blended into all of them.
+*/
+static npy_intp NDT_NAME(eval_linear_vector_)(const Mesh_h table,
+											  const npy_double *weigths,
+											  const npy_intp *subs,
+											  NDTable_ExtrapMethod_t extrap_method,
+											  npy_double *result)
+{
+	const npy_intp nvars = table->nvars;
+	npy_double w[NPY_MAXDIMS];		// weight of the right sample per dimension
+	npy_intp step[NPY_MAXDIMS];		// byte offset from left to right sample
+	npy_intp active[NPY_MAXDIMS];	// dimensions with two distinct samples
+	npy_intp nactive = 0, corner, dim, k;
+	const char *base = linear_cell(table, weigths, subs, extrap_method,
+								   w, step);
+
+	for (dim = 0; dim < table->ndim; dim++) {
+		if (step[dim] != 0) {
+			active[nactive++] = dim;
+		}
+	}
+	for (k = 0; k < nvars; k++) {
+		result[k] = 0.;
+	}
+
+	for (corner = 0; corner < ((npy_intp) 1) << nactive; corner++) {
+		const DATA_T *values;
+		npy_intp offset = 0;
+		npy_double c = 1.;
+
+		for (dim = 0; dim < nactive; dim++) {
+			if ((corner >> dim) & 1) {
+				c *= w[active[dim]];
+				offset += step[active[dim]];
+			}
+			else {
+				c *= 1 - w[active[dim]];
+			}
+		}
+		values = (const DATA_T *) (base + offset);
+		for (k = 0; k < nvars; k++) {
+			result[k] += c * values[k];
+		}
+	}
+	return NDTABLE_INTERPSTATUS_OK;
+}
+
+#undef AT
+#undef BLEND
+#undef DATA_T
+#undef NDT_SUFFIX
+#undef NDT_NAME
+#undef NDT_CAT
+#undef NDT_CAT_
@@ -30,6 +30,43 @@ binary_search_with_guess(const npy_double key, const npy_double *arr,
                          npy_intp len, npy_intp guess);
 
 
+/**************************************************
+
+Same contract as binary_search_with_guess for a key known to be greater
+or equal to the key that produced guess. The breakpoints are walked
+forward from guess, so a sorted sweep of N keys over M breakpoints costs
+O(N + M).
+
+**************************************************/
+npy_intp
+linear_search_forward(const npy_double key, const npy_double *arr,
+                      npy_intp len, npy_intp guess);
+
+
+/**************************************************
+
+Same contract as binary_search_with_guess for equally spaced breakpoints:
+the index is computed from the origin and the inverse spacing of arr,
+then corrected against the actual breakpoints.
+
+**************************************************/
+npy_intp
+uniform_search(const npy_double key, const npy_double *arr, npy_intp len,
+               npy_double origin, npy_double inv_step);
+
+
+/**************************************************
+
+Returns 1 if arr is sorted in ascending order (no NaN), 0 otherwise.
+
+**************************************************/
+int
+is_sorted(const npy_double *arr, npy_intp len);
+
+int
+is_sorted_float(const npy_float *arr, npy_intp len);
+
+
 // PyObject *
 // my_interp(PyObject *, PyObject *, PyObject *);
 
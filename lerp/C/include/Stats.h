@@ -0,0 +1,73 @@
+
+#ifndef STATS_H
+#define STATS_H
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/*
+Instrumentation counters of the interpolation.
+
+They are only compiled in when LERP_STATS is defined, by building with
+the LERP_STATS environment variable set. Otherwise STATS(...) expands to
+nothing and the evaluation loops are left untouched.
+
+The worker threads count in a Stats_t of their own, merged into the
+counters of their interpolation() call at the end of their range. Those
+are merged into the global counters once the call is over, and returned
+to the caller that asked for them.
+*/
+#ifdef LERP_STATS
+#define STATS(statement) statement
+#else
+#define STATS(statement)
+#endif
+
+typedef struct {
+	npy_intp	calls;						// interpolation() calls
+	npy_intp	points;						// points evaluated
+	npy_intp	extrap_low[NPY_MAXDIMS];	// coordinates below the first
+											// breakpoint, per axis
+	npy_intp	extrap_high[NPY_MAXDIMS];	// coordinates above the last
+											// breakpoint, per axis
+	npy_intp	nan;						// NaN values
+	npy_intp	uniform;					// lookups on equally spaced axes
+	npy_intp	walks;						// forward walks of sorted targets
+	npy_intp	guess_hits;					// searches ending next to the hint
+	npy_intp	bisections;					// searches falling back to bisection
+	double		build_time;					// seconds building tables
+	double		search_time;				// seconds locating points
+	double		blend_time;					// seconds blending values
+} Stats_t;
+
+/* Zero the counters */
+void Stats_init(Stats_t *stats);
+
+/* Add the counters to total, or to the global ones if total is NULL.
+   Thread safe. */
+void Stats_merge(Stats_t *total, const Stats_t *stats);
+
+/* Monotonic clock, in seconds */
+double Stats_clock(void);
+
+/* Add the time elapsed since *last to *total and restart from now */
+void Stats_lap(double *total, double *last);
+
+/* Add seconds to the global time spent building tables, out of any call */
+void Stats_build(double seconds);
+
+/* Dict of the global counters, zeroed if reset is set. Only called with
+   the GIL held. */
+PyObject *Stats_AsDict(int reset);
+
+/* Update dict with the counters, as Stats_AsDict. Only called with the
+   GIL held. */
+int Stats_Update(PyObject *dict, const Stats_t *stats);
+
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,56 @@
+#ifndef TABLE_H
+#define TABLE_H
+
+#include "NDTable.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Tables are called through vectorcall where the C API offers it */
+#if PY_VERSION_HEX >= 0x03090000
+#define TABLE_VECTORCALL
+#endif
+
+/*
+Compiled lookup table.
+
+Owns the contiguous data and axes of a Mesh so that repeated
+interpolations do not have to rebuild a Mesh_t from the xarray object.
+
+Calling the table evaluates a single point given as numbers, with the
+interpolation and extrapolation methods resolved once and stored on it.
+*/
+typedef struct {
+	PyObject_HEAD
+	Mesh_t					mesh;		// Contiguous data and axes
+	PyObject				*dims;		// Tuple of dimension names
+	NDTable_InterpMethod_t	interp;		// Methods of the scalar calls
+	NDTable_ExtrapMethod_t	extrap;
+	npy_intp				hint[NPY_MAXDIMS]; // Cells of the last call
+#ifdef TABLE_VECTORCALL
+	vectorcallfunc			vectorcall;
+#endif
+} TableObject;
+
+extern PyTypeObject Table_Type;
+
+#define Table_Check(op) PyObject_TypeCheck(op, &Table_Type)
+#define Table_MESH(op) (&((TableObject *)(op))->mesh)
+
+/* 1 if the table was initialized, 0 with a ValueError set otherwise, as
+   for a Table created by Table.__new__ alone. Checked before reading the
+   mesh of a table. */
+int Table_Ready(PyObject *op);
+
+/* Value at the point of the nargs numbers args, a float or a 1-D array of
+   the variables. Defined with the evaluation kernels, in Interpolation.c. */
+PyObject *Table_evaluate(TableObject *self, PyObject *const *args,
+                         Py_ssize_t nargs);
+
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,48 @@
+#ifndef THREADS_H
+#define THREADS_H
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Minimum number of points evaluated by a worker thread */
+#define THREADS_MIN_CHUNK 8192
+
+/*
+Function evaluated on the contiguous range [start, stop) of a batch.
+Returns 0 on success, a status code otherwise.
+*/
+typedef npy_intp (*range_fun)(void *context, npy_intp start, npy_intp stop);
+
+/**************************************************
+
+Split [0, size) in at most nthreads contiguous chunks and evaluate func on
+each of them, one native thread per chunk. The calling thread evaluates the
+first chunk. Must not touch Python objects: the caller is expected to have
+released the GIL.
+
+Parameters
+---------
+func :     range_fun
+           Function evaluated on each chunk
+context :  void *
+           Passed as is to func
+size :     npy_intp
+           Number of points
+nthreads : npy_intp
+           Maximum number of threads
+
+Returns
+-------
+the first non zero status returned by func, or 0
+
+**************************************************/
+npy_intp
+parallel_for(range_fun func, void *context, npy_intp size, npy_intp nthreads);
+
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -0,0 +1,155 @@
+/*
+Vectorized linear interpolation of 1-D tables from cached slopes.
+*/
+
+#include <Python.h>
+#define NO_IMPORT_ARRAY
+#define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+#include <numpy/arrayobject.h>
+#include <math.h>
+
+#include "Curve.h"
+
+/* AVX2 kernel, selected at run time, with GCC and Clang on x86-64 */
+#if defined(__x86_64__) && (defined(__GNUC__) || defined(__clang__))
+#define CURVE_AVX2
+#include <immintrin.h>
+#endif
+
+
+npy_intp
+Curve_prepare(Mesh_h table)
+{
+	const npy_intp len = table->shape[0];
+	const npy_double *bkpts = table->coords[0];
+	npy_double *slopes;
+	npy_intp k;
+
+	if (table->slopes != NULL) {
+		return NDTABLE_INTERPSTATUS_OK;
+	}
+	slopes = (npy_double *) malloc(2 * len * sizeof(npy_double));
+	if (slopes == NULL) {
+		return NDTABLE_INTERPSTATUS_NOMEMORY;
+	}
+	for (k = 0; k < len; k++) {
+		const char *ptr = (const char *) table->data + k * table->strides[0];
+
+		slopes[2 * k] = table->typenum == NPY_FLOAT ?
+						(npy_double) *(const npy_float *) ptr :
+						*(const npy_double *) ptr;
+	}
+	for (k = 0; k < len - 1; k++) {
+		slopes[2 * k + 1] = (slopes[2 * k + 2] - slopes[2 * k]) /
+							(bkpts[k + 1] - bkpts[k]);
+	}
+	slopes[2 * len - 1] = 0.;
+	table->slopes = slopes;
+	return NDTABLE_INTERPSTATUS_OK;
+}
+
+
+/* Portable kernel, and tail of the AVX2 one with fused multiply-adds */
+#define CURVE_LOOP(start, madd) \
+	for (i = (start); i < n; i++) { \
+		const npy_intp k = index[i]; \
+		npy_double v = madd(slopes[2 * k + 1], x[i] - bkpts[k], \
+							slopes[2 * k]); \
+		if (x[i] >= last && (hold || x[i] == last)) { \
+			v = last_value; \
+		} \
+		else if (hold && x[i] < first) { \
+			v = first_value; \
+		} \
+		result[i] = v; \
+	}
+
+#define MADD(a, b, c) ((a) * (b) + (c))
+
+static void
+curve_eval_generic(const Mesh_h table, const npy_double *x,
+				   const npy_intp *index, npy_intp n, int hold,
+				   npy_double *result)
+{
+	const npy_double *slopes = table->slopes, *bkpts = table->coords[0];
+	const npy_intp len = table->shape[0];
+	const npy_double first = bkpts[0], last = bkpts[len - 1];
+	const npy_double first_value = slopes[0];
+	const npy_double last_value = slopes[2 * (len - 1)];
+	npy_intp i;
+
+	CURVE_LOOP(0, MADD)
+}
+
+
+#ifdef CURVE_AVX2
+__attribute__((target("avx2,fma")))
+static void
+curve_eval_avx2(const Mesh_h table, const npy_double *x,
+				const npy_intp *index, npy_intp n, int hold,
+				npy_double *result)
+{
+	const npy_double *slopes = table->slopes, *bkpts = table->coords[0];
+	const npy_intp len = table->shape[0];
+	const npy_double first = bkpts[0], last = bkpts[len - 1];
+	const npy_double first_value = slopes[0];
+	const npy_double last_value = slopes[2 * (len - 1)];
+	const __m256d first4 = _mm256_set1_pd(first);
+	const __m256d last4 = _mm256_set1_pd(last);
+	const __m256d first_value4 = _mm256_set1_pd(first_value);
+	const __m256d last_value4 = _mm256_set1_pd(last_value);
+	npy_intp i;
+
+	for (i = 0; i + 4 <= n; i += 4) {
+		const __m256i k = _mm256_loadu_si256((const __m256i *) &index[i]);
+		const __m256i k2 = _mm256_add_epi64(k, k);
+		const __m256d xi = _mm256_loadu_pd(&x[i]);
+		const __m256d left = _mm256_i64gather_pd(bkpts, k, 8);
+		const __m256d value = _mm256_i64gather_pd(slopes, k2, 8);
+		const __m256d slope = _mm256_i64gather_pd(slopes + 1, k2, 8);
+		__m256d v = _mm256_fmadd_pd(slope, _mm256_sub_pd(xi, left), value);
+		__m256d at_last = _mm256_cmp_pd(xi, last4, _CMP_EQ_OQ);
+
+		if (hold) {
+			at_last = _mm256_cmp_pd(xi, last4, _CMP_GE_OQ);
+			v = _mm256_blendv_pd(v, first_value4,
+								 _mm256_cmp_pd(xi, first4, _CMP_LT_OQ));
+		}
+		v = _mm256_blendv_pd(v, last_value4, at_last);
+		_mm256_storeu_pd(&result[i], v);
+	}
+	CURVE_LOOP(i, fma)
+}
+
+/* 1 if the processor runs the AVX2 kernel, detected on first use */
+static int
+has_avx2(void)
+{
+	static int supported = -1;
+
+	if (supported < 0) {
+		__builtin_cpu_init();
+		supported = __builtin_cpu_supports("avx2") &&
+					__builtin_cpu_supports("fma");
+	}
+	return supported;
+}
+#endif
+
+
+void
+Curve_eval(const Mesh_h table, const npy_double *x, const npy_intp *index,
+		   npy_intp n, NDTable_ExtrapMethod_t extrap_method,
+		   npy_double *result)
+{
+	const int hold = extrap_method == NDTABLE_EXTRAP_HOLD;
+
+#ifdef CURVE_AVX2
+	if (has_avx2()) {
+		curve_eval_avx2(table, x, index, n, hold, result);
+		return;
+	}
+#endif
+	curve_eval_generic(table, x, index, n, hold, result);
+}
@@ -0,0 +1,182 @@
+/*
+Separable multilinear evaluation on grids of targets.
+*/
+
+#include <Python.h>
+#define NO_IMPORT_ARRAY
+#define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+#include <numpy/arrayobject.h>
+
+#include "Grid.h"
+#include "Threads.h"
+
+
+/* Contraction of one axis of a C ordered (outer, n, inner) array into an
+   (outer, m, inner) one */
+typedef struct {
+    const char             *src;
+    int                    src_type;     // NPY_DOUBLE or NPY_FLOAT
+    char                   *dst;
+    npy_intp               dst_stride;   // in bytes
+    int                    dst_type;     // NPY_DOUBLE or NPY_FLOAT
+    npy_intp               n;            // breakpoints along the axis
+    npy_intp               m;            // targets along the axis
+    npy_intp               inner;        // values after the axis
+    const npy_intp         *index;
+    const npy_double       *weight;
+    NDTable_ExtrapMethod_t extrap_method;
+} Contraction_t;
+
+#define LOAD(type, base, i) ((type) == NPY_FLOAT ?\
+    (npy_double) ((const npy_float *) (base))[i] :\
+    ((const npy_double *) (base))[i])
+
+
+static npy_intp
+contract_range(void *context, npy_intp start, npy_intp stop)
+{
+    const Contraction_t *c = (const Contraction_t *) context;
+    npy_intp e = start;
+
+    // [start, stop) spans the flat destination, one row per target value
+    while (e < stop) {
+        const npy_intp row = e / c->inner;
+        const npy_intp first = e - row * c->inner;
+        const npy_intp last = stop - row * c->inner < c->inner ?
+                              stop - row * c->inner : c->inner;
+        const npy_intp target = row % c->m;
+        npy_intp k = c->index[target];
+        npy_double w = c->weight[target];
+        npy_intp step = c->inner, left, col;
+        char *dst;
+
+        // same handling of the held samples as NDT_eval_linear
+        if (c->n < 2) {
+            k = 0;
+            w = 0.;
+            step = 0;
+        }
+        else if (c->extrap_method == NDTABLE_EXTRAP_HOLD) {
+            if (w < 0.) {
+                w = 0.;
+                step = 0;
+            }
+            else if (w > 1.) {
+                k++;
+                w = 0.;
+                step = 0;
+            }
+        }
+
+        left = ((row / c->m) * c->n + k) * c->inner;
+        dst = c->dst + row * c->inner * c->dst_stride;
+
+        for (col = first; col < last; col++) {
+            const npy_double a = LOAD(c->src_type, c->src, left + col);
+            const npy_double b = LOAD(c->src_type, c->src, left + step + col);
+            const npy_double v = (1 - w) * a + w * b;
+
+            if (c->dst_type == NPY_FLOAT) {
+                *(npy_float *) (dst + col * c->dst_stride) = (npy_float) v;
+            }
+            else {
+                *(npy_double *) (dst + col * c->dst_stride) = v;
+            }
+        }
+        e = row * c->inner + last;
+    }
+    return NDTABLE_INTERPSTATUS_OK;
+}
+
+
+npy_intp
+Grid_eval_linear(const Mesh_h table, npy_intp *const *index,
+                 npy_double *const *weight, const npy_intp *size,
+                 NDTable_ExtrapMethod_t extrap_method,
+                 char *result, npy_intp result_stride, int result_type,
+                 npy_intp nthreads)
+{
+    const npy_intp ndim = table->ndim;
+    npy_double *buffers[2] = {NULL, NULL};
+    npy_intp outer, inner, largest = 0;
+    npy_intp dim, status = NDTABLE_INTERPSTATUS_OK;
+    Contraction_t c;
+
+    for (dim = 0; dim < ndim; dim++) {
+        if (size[dim] == 0) {
+            return NDTABLE_INTERPSTATUS_OK;
+        }
+    }
+
+    /* The intermediate arrays after the contraction of the axes
+       dim..ndim-1, the last one being the result itself. The variables
+       are carried along as the innermost values. */
+    inner = table->nvars;
+    for (dim = ndim - 1; dim > 0; dim--) {
+        npy_intp i, count;
+
+        inner *= size[dim];
+        count = inner;
+        for (i = 0; i < dim; i++) {
+            count *= table->shape[i];
+        }
+        if (count > largest) {
+            largest = count;
+        }
+    }
+    if (ndim > 1) {
+        buffers[0] = (npy_double *) malloc(largest * sizeof(npy_double));
+        buffers[1] = ndim > 2 ?
+            (npy_double *) malloc(largest * sizeof(npy_double)) : NULL;
+        if (buffers[0] == NULL || (ndim > 2 && buffers[1] == NULL)) {
+            status = NDTABLE_INTERPSTATUS_NOMEMORY;
+            goto out;
+        }
+    }
+
+    c.src = (const char *) table->data;
+    c.src_type = table->typenum;
+    c.extrap_method = extrap_method;
+
+    inner = table->nvars;
+    for (dim = ndim - 1; dim >= 0; dim--) {
+        npy_intp i;
+
+        outer = 1;
+        for (i = 0; i < dim; i++) {
+            outer *= table->shape[i];
+        }
+
+        if (dim == 0) {
+            c.dst = result;
+            c.dst_stride = result_stride;
+            c.dst_type = result_type;
+        }
+        else {
+            c.dst = (char *) buffers[(ndim - 1 - dim) % 2];
+            c.dst_stride = sizeof(npy_double);
+            c.dst_type = NPY_DOUBLE;
+        }
+        c.n = table->shape[dim];
+        c.m = size[dim];
+        c.inner = inner;
+        c.index = index[dim];
+        c.weight = weight[dim];
+
+        status = parallel_for(contract_range, &c, outer * c.m * inner,
+                              nthreads);
+        if (status != NDTABLE_INTERPSTATUS_OK) {
+            goto out;
+        }
+
+        c.src = c.dst;
+        c.src_type = NPY_DOUBLE;
+        inner *= c.m;
+    }
+
+out:
+    free(buffers[0]);
+    free(buffers[1]);
+    return status;
+}
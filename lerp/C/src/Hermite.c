@@ -0,0 +1,354 @@
+/*
+Tensor product cubic Hermite interpolation from cached coefficients.
+*/
+
+#include <Python.h>
+#define NO_IMPORT_ARRAY
+#define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+#include <numpy/arrayobject.h>
+#include <numpy/npy_math.h>
+
+#include "Hermite.h"
+
+
+/* Slope at the junction of two intervals of divided differences d0 and d1
+   and widths h0 and h1 */
+static npy_double fritsch_butland_slope(const npy_double d0, const npy_double d1,
+										const npy_double h0, const npy_double h1)
+{
+	if (d0 == 0 || d1 == 0 || (d0 < 0 && d1 > 0) || (d0 > 0 && d1 < 0)) {
+		return 0;
+	}
+	return 3 * (h0 + h1) / ((h0 + 2 * h1) / d0 + (h1 + 2 * h0) / d1);
+}
+
+static npy_double steffen_slope(const npy_double d0, const npy_double d1,
+								const npy_double h0, const npy_double h1)
+{
+	npy_double m, half_abs_m, abs_d0, abs_d1;
+
+	if (d0 == 0 || d1 == 0 || (d0 < 0 && d1 > 0) || (d0 > 0 && d1 < 0)) {
+		return 0;
+	}
+	m = (d0 * h1 + d1 * h0) / (h0 + h1);
+	half_abs_m = 0.5 * fabs(m);
+	abs_d0 = fabs(d0);
+	abs_d1 = fabs(d1);
+	if (half_abs_m > abs_d0 || half_abs_m > abs_d1) {
+		const npy_double two_a = d0 > 0 ? 2 : -2;
+		m = two_a * (abs_d0 < abs_d1 ? abs_d0 : abs_d1);
+	}
+	return m;
+}
+
+/* Akima slope from the four divided differences around a breakpoint */
+static npy_double akima_slope(const npy_double *d)
+{
+	const npy_double c = fabs(d[3] - d[2]) + fabs(d[1] - d[0]);
+	npy_double a;
+
+	if (c > 0) {
+		a = fabs(d[1] - d[0]) / c;
+		return (1 - a) * d[1] + a * d[2];
+	}
+	return 0.5 * d[1] + 0.5 * d[2];
+}
+
+/*
+Slopes of the method at the n breakpoints x of the strided values y,
+written with the same stride to m. work holds n + 3 values.
+*/
+static void knot_slopes(NDTable_InterpMethod_t interp_method,
+						const npy_double *x, npy_intp n,
+						const npy_double *y, npy_double *m, npy_intp stride,
+						npy_double *work)
+{
+	npy_double *d = work + 2;	// divided differences, from d[-2] to d[n]
+	npy_intp i;
+
+	if (n < 2) {
+		for (i = 0; i < n; i++) {
+			m[i * stride] = 0;
+		}
+		return;
+	}
+
+	for (i = 0; i < n - 1; i++) {
+		d[i] = (y[(i + 1) * stride] - y[i * stride]) / (x[i + 1] - x[i]);
+	}
+
+	if (interp_method == NDTABLE_INTERP_AKIMA) {
+		// two slopes extrapolated linearly past each end, or the single
+		// slope of two samples repeated
+		if (n == 2) {
+			d[-2] = d[-1] = d[1] = d[2] = d[0];
+		}
+		else {
+			d[-1] = 2.0 * d[0] - d[1];
+			d[-2] = 2.0 * d[-1] - d[0];
+			d[n - 1] = 2.0 * d[n - 2] - d[n - 3];
+			d[n] = 2.0 * d[n - 1] - d[n - 2];
+		}
+		for (i = 0; i < n; i++) {
+			m[i * stride] = akima_slope(&d[i - 2]);
+		}
+		return;
+	}
+
+	// fritsch-butland and steffen use the end intervals at the boundaries
+	m[0] = d[0];
+	m[(n - 1) * stride] = d[n - 2];
+	for (i = 1; i < n - 1; i++) {
+		const npy_double h0 = x[i] - x[i - 1], h1 = x[i + 1] - x[i];
+
+		m[i * stride] = interp_method == NDTABLE_INTERP_STEFFEN ?
+			steffen_slope(d[i - 1], d[i], h0, h1) :
+			fritsch_butland_slope(d[i - 1], d[i], h0, h1);
+	}
+}
+
+
+npy_intp
+Hermite_prepare(Mesh_h table, NDTable_InterpMethod_t interp_method)
+{
+	const npy_intp ndim = table->ndim;
+	const npy_intp nderiv = ((npy_intp) 1) << ndim;
+	const npy_intp slot = interp_method - NDTABLE_INTERP_AKIMA;
+	const int nd = PyArray_NDIM(table->array);
+	npy_intp shape[NPY_MAXDIMS + 1];
+	PyArrayObject *array;
+	npy_double *coefs, *work;
+	npy_intp i, dim, largest = 0;
+
+	if (table->hermite[slot] != NULL) {
+		return NDTABLE_INTERPSTATUS_OK;
+	}
+	if (table->size > NPY_MAX_INTP / (nderiv * (npy_intp) sizeof(npy_double))) {
+		return NDTABLE_INTERPSTATUS_NOMEMORY;
+	}
+	for (dim = 0; dim < ndim; dim++) {
+		if (table->shape[dim] > largest) {
+			largest = table->shape[dim];
+		}
+	}
+
+	// an array, so that the coefficients can be saved and loaded back
+	for (i = 0; i < nd; i++) {
+		shape[i] = PyArray_DIM(table->array, i);
+	}
+	shape[nd] = nderiv;
+	array = (PyArrayObject *) PyArray_SimpleNew(nd + 1, shape, NPY_DOUBLE);
+	work = (npy_double *) malloc((largest + 3) * sizeof(npy_double));
+	if (array == NULL || work == NULL) {
+		Py_XDECREF(array);
+		free(work);
+		return NDTABLE_INTERPSTATUS_NOMEMORY;
+	}
+	coefs = (npy_double *) PyArray_DATA(array);
+
+	// the data is C contiguous
+	for (i = 0; i < table->size; i++) {
+		coefs[i * nderiv] = table->typenum == NPY_FLOAT ?
+			(npy_double) ((const npy_float *) table->data)[i] :
+			((const npy_double *) table->data)[i];
+	}
+
+	/* Along each axis, differentiate the value and the derivatives with
+	   respect to the previous axes. The derivative with respect to dim is
+	   stored at the bit ndim - 1 - dim of the derivative index. */
+	for (dim = 0; dim < ndim; dim++) {
+		const npy_intp bit = ((npy_intp) 1) << (ndim - 1 - dim);
+		const npy_intp n = table->shape[dim];
+		npy_intp outer = 1, inner = 1, alpha, o, c;
+
+		for (i = 0; i < dim; i++) {
+			outer *= table->shape[i];
+		}
+		for (i = dim + 1; i < ndim; i++) {
+			inner *= table->shape[i];
+		}
+		inner *= table->nvars;
+
+		for (alpha = 0; alpha < nderiv; alpha += 2 * bit) {
+			for (o = 0; o < outer; o++) {
+				for (c = 0; c < inner; c++) {
+					npy_double *y = coefs + (o * n * inner + c) * nderiv + alpha;
+
+					knot_slopes(interp_method, table->coords[dim], n,
+								y, y + bit, inner * nderiv, work);
+				}
+			}
+		}
+	}
+
+	free(work);
+	// read-only from Python, see Table.coefficients
+	PyArray_CLEARFLAGS(array, NPY_ARRAY_WRITEABLE);
+	table->hermite_arrays[slot] = array;
+	table->hermite[slot] = coefs;
+	return NDTABLE_INTERPSTATUS_OK;
+}
+
+
+/*
+Sum over the 4^ndim coefficients of the cell of the product of their basis
+functions. offsets[dim][q] and basis[dim][q] are the offset of the q-th
+coefficient along dim and its weight, in the order left value, right value,
+left slope, right slope.
+*/
+static npy_double contract(const npy_double *coefs, npy_intp ndim,
+						   npy_intp (*offsets)[4],
+						   const npy_double *const *basis)
+{
+	npy_double acc[NPY_MAXDIMS];
+	int digit[NPY_MAXDIMS];
+	npy_intp dim, offset = 0;
+
+	if (ndim == 0) {
+		return coefs[0];
+	}
+	for (dim = 0; dim < ndim; dim++) {
+		acc[dim] = 0;
+		digit[dim] = 0;
+	}
+
+	for (;;) {
+		npy_double v = coefs[offset];
+
+		// accumulate, and fold the completed dimensions in the outer ones
+		dim = ndim - 1;
+		for (;;) {
+			acc[dim] += basis[dim][digit[dim]] * v;
+			if (digit[dim] < 3) {
+				break;
+			}
+			v = acc[dim];
+			acc[dim] = 0;
+			if (--dim < 0) {
+				return v;
+			}
+		}
+
+		// move to the next coefficient
+		offset += offsets[dim][digit[dim] + 1] - offsets[dim][digit[dim]];
+		digit[dim]++;
+		for (dim++; dim < ndim; dim++) {
+			offset -= offsets[dim][3];
+			digit[dim] = 0;
+		}
+	}
+}
+
+
+npy_intp
+Hermite_eval(const Mesh_h table, const npy_double *weigths,
+			 const npy_intp *subs, NDTable_InterpMethod_t interp_method,
+			 NDTable_ExtrapMethod_t extrap_method,
+			 npy_double *result, npy_double *gradient)
+{
+	const npy_intp ndim = table->ndim;
+	const npy_intp nderiv = ((npy_intp) 1) << ndim;
+	const npy_double *coefs = table->hermite[interp_method - NDTABLE_INTERP_AKIMA];
+
+	npy_double basis[NPY_MAXDIMS][4];	// value basis functions
+	npy_double dbasis[NPY_MAXDIMS][4];	// their derivatives along the axis
+	const npy_double *rows[NPY_MAXDIMS];
+	npy_intp offsets[NPY_MAXDIMS][4];
+	int constant[NPY_MAXDIMS];			// zero derivative along the axis
+	npy_intp dim;
+
+	if (coefs == NULL) {
+		return NDTABLE_INTERPSTATUS_DATASETNOTFOUND;
+	}
+
+	for (dim = 0; dim < ndim; dim++) {
+		const npy_intp n = table->shape[dim];
+		const npy_intp k = subs[dim];
+		const npy_intp step = table->strides[dim] / table->itemsize * nderiv;
+		const npy_intp bit = ((npy_intp) 1) << (ndim - 1 - dim);
+		npy_double *b = basis[dim], *db = dbasis[dim];
+		npy_double t = weigths[dim], h;
+
+		coefs += k * step;
+		offsets[dim][0] = 0;
+		offsets[dim][1] = step;
+		offsets[dim][2] = bit;
+		offsets[dim][3] = step + bit;
+		rows[dim] = b;
+		constant[dim] = 0;
+
+		if (n < 2) {
+			b[0] = 1;
+			b[1] = b[2] = b[3] = 0;
+			offsets[dim][1] = offsets[dim][3] = 0;
+			constant[dim] = 1;
+			continue;
+		}
+
+		if (t < 0 || t > 1) {
+			switch (extrap_method) {
+			case NDTABLE_EXTRAP_HOLD:
+				t = t < 0 ? 0 : 1;
+				constant[dim] = 1;
+				break;
+			case NDTABLE_EXTRAP_LINEAR:
+				break;
+			default:
+				return -1;
+			}
+		}
+
+		h = table->coords[dim][k + 1] - table->coords[dim][k];
+
+		if (t < 0) {			// extrapolate left along the end slope
+			b[0] = 1;
+			b[1] = 0;
+			b[2] = h * t;
+			b[3] = 0;
+			db[0] = db[1] = db[3] = 0;
+			db[2] = 1;
+		}
+		else if (t <= 1) {
+			const npy_double t2 = t * t, t3 = t2 * t;
+
+			b[0] = 2 * t3 - 3 * t2 + 1;
+			b[1] = 3 * t2 - 2 * t3;
+			b[2] = h * (t3 - 2 * t2 + t);
+			b[3] = h * (t3 - t2);
+			db[0] = 6 * (t2 - t) / h;
+			db[1] = -db[0];
+			db[2] = 3 * t2 - 4 * t + 1;
+			db[3] = 3 * t2 - 2 * t;
+		}
+		else {					// extrapolate right along the end slope
+			b[0] = 0;
+			b[1] = 1;
+			b[2] = 0;
+			b[3] = h * (t - 1);
+			db[0] = db[1] = db[2] = 0;
+			db[3] = 1;
+		}
+	}
+
+	*result = contract(coefs, ndim, offsets, rows);
+
+	if (gradient != NULL) {
+		for (dim = 0; dim < ndim; dim++) {
+			if (constant[dim]) {
+				gradient[dim] = 0;
+				continue;
+			}
+			rows[dim] = dbasis[dim];
+			gradient[dim] = contract(coefs, ndim, offsets, rows);
+			rows[dim] = basis[dim];
+		}
+		if (npy_isnan(*result)) {
+			for (dim = 0; dim < ndim; dim++) {
+				gradient[dim] = NPY_NAN;
+			}
+		}
+	}
+
+	return NDTABLE_INTERPSTATUS_OK;
+}
@@ -22,17 +22,21 @@ Reference count: http://edcjones.tripod.com/refcount.html
 #define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
 #define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
 #include <numpy/arrayobject.h>
+#include <numpy/npy_math.h>
 
 #include "NumPyWrapper.h"
 #include "NDTable.h"
 #include "Mesh.h"
+#include "Table.h"
+#include "Threads.h"
+#include "Grid.h"
+#include "Hermite.h"
+#include "Curve.h"
+#include "Locator.h"
+#include "Stats.h"
 
 #define ARRAYD64(arr) (PyArrayObject*) PyArray_ContiguousFromAny(arr, NPY_DOUBLE, 0, 0)
 #define error_converting(x)  (((x) == -1) && PyErr_Occurred())
-#define START_TIMING clock_t t; t = clock();
-#define END_TIMING t = clock() - t; double time_taken = ((double)t)/CLOCKS_PER_SEC; printf("function took %f seconds to execute \n", time_taken);
-
-#define DEBUG 0
 
 
 NDTable_InterpMethod_t
@@ -87,6 +91,837 @@ get_extrap_method(char *method)
     return extrapmethod;
 }
 
+/* Evaluation of a batch of points, shared by the worker threads */
+typedef struct {
+    Mesh_h                 table;
+    const char             *params[NPY_MAXDIMS]; // target values per dimension
+    int                    params_type[NPY_MAXDIMS]; // NPY_DOUBLE or NPY_FLOAT
+    Mesh_h                 views;                // per variable tables
+    char                   *result;
+    npy_intp               result_stride;        // in bytes, between points
+    int                    result_type;          // NPY_DOUBLE or NPY_FLOAT
+    char                   *gradient;            // NULL, or (ndim,) + result
+    npy_intp               gradient_stride;      // in bytes, between dims
+    NDTable_InterpMethod_t interp_method;
+    NDTable_ExtrapMethod_t extrap_method;
+    NDTable_Kernel_t       kernel;              // of the table, or of views
+    npy_intp               nd;                  // axes of the broadcast shape
+    npy_intp               shape[NPY_MAXDIMS];  // broadcast shape of targets
+    npy_intp               strides[NPY_MAXDIMS][NPY_MAXDIMS]; // per target
+    int                    sorted[NPY_MAXDIMS]; // grid mode, merged targets
+    npy_intp               size[NPY_MAXDIMS];   // grid mode, values per axis
+    npy_intp               *located_index[NPY_MAXDIMS];  // grid or Locator
+    npy_double             *located_weight[NPY_MAXDIMS]; // grid or Locator
+    npy_intp               npoints;             // points of the call
+    const npy_intp         *hints_in;           // NULL, or the search start
+                                                // values of the first range
+    npy_intp               *hints_out;          // NULL, or set to the last
+                                                // ones of the last range
+    Stats_t                *stats;              // counters of the call
+} Evaluation_t;
+
+/* Target value at ptr, as a double */
+#define LOAD_TARGET(type, ptr) ((type) == NPY_FLOAT ?\
+    (npy_double) *(const npy_float *) (ptr) : *(const npy_double *) (ptr))
+
+/* i-th target value of dimension j, as a double (grid mode) */
+#define TARGET(evaluation, j, i) ((evaluation)->params_type[j] == NPY_FLOAT ?\
+    (npy_double) ((const npy_float *) (evaluation)->params[j])[i] :\
+    ((const npy_double *) (evaluation)->params[j])[i])
+
+
+/* Position in the C ordered walk over the broadcast targets */
+typedef struct {
+    npy_intp   coords[NPY_MAXDIMS];
+    const char *ptrs[NPY_MAXDIMS];  // current value of each target
+} Cursor_t;
+
+static void
+cursor_seek(const Evaluation_t *evaluation, Cursor_t *cursor, npy_intp i)
+{
+    npy_intp d, j;
+
+    for (d = evaluation->nd - 1; d >= 0; d--) {
+        cursor->coords[d] = i % evaluation->shape[d];
+        i /= evaluation->shape[d];
+    }
+    for (j = 0; j < evaluation->table->ndim; j++) {
+        cursor->ptrs[j] = evaluation->params[j];
+        for (d = 0; d < evaluation->nd; d++) {
+            cursor->ptrs[j] += cursor->coords[d] * evaluation->strides[j][d];
+        }
+    }
+}
+
+static void
+cursor_next(const Evaluation_t *evaluation, Cursor_t *cursor)
+{
+    const npy_intp ntargets = evaluation->table->ndim;
+    npy_intp d, j;
+
+    for (d = evaluation->nd - 1; d >= 0; d--) {
+        for (j = 0; j < ntargets; j++) {
+            cursor->ptrs[j] += evaluation->strides[j][d];
+        }
+        if (++cursor->coords[d] < evaluation->shape[d]) {
+            return;
+        }
+        for (j = 0; j < ntargets; j++) {
+            cursor->ptrs[j] -= evaluation->shape[d] * evaluation->strides[j][d];
+        }
+        cursor->coords[d] = 0;
+    }
+}
+
+
+/* Left subscript of the cell of x along dimension j of the table, with
+   at least two breakpoints. hint is the start value of the search, updated
+   to the found interval. A forward walk from the hint is used when walk
+   is set. */
+static npy_intp
+search(const Mesh_h table, npy_intp j, npy_double x, int walk,
+       npy_intp *hint, Stats_t *stats)
+{
+    const npy_intp len = table->shape[j];
+    const npy_double *bkpts = table->coords[j];
+    npy_intp k;
+
+    if (table->uniform[j]) {
+        k = uniform_search(x, bkpts, len, table->origin[j], table->inv_step[j]);
+        STATS(stats->uniform++);
+    }
+    else if (walk) {
+        k = linear_search_forward(x, bkpts, len, *hint);
+        STATS(stats->walks++);
+    }
+    else {
+        k = binary_search_with_guess(x, bkpts, len, *hint);
+        STATS(k - *hint < 2 && *hint - k < 2 ? stats->guess_hits++
+                                             : stats->bisections++);
+    }
+    *hint = k;
+
+    /* Handle keys outside of the arr range and the last
+       breakpoint: always keep a valid right sample */
+    if (k < 0) {
+        k = 0;
+    }
+    else if (k > len - 2) {
+        k = len - 2;
+    }
+    return k;
+}
+
+
+/* Left subscript and weight of x along dimension j of the table, see
+   search() */
+static void
+locate(const Mesh_h table, npy_intp j, npy_double x, int walk,
+       npy_intp *hint, npy_intp *index, npy_double *weight, Stats_t *stats)
+{
+    const npy_double *bkpts = table->coords[j];
+    npy_intp k;
+
+    if (table->shape[j] < 2) {
+        *index = 0;
+        *weight = 0.;
+        return;
+    }
+
+    k = search(table, j, x, walk, hint, stats);
+    *index = k;
+    *weight = (x - bkpts[k]) / (bkpts[k + 1] - bkpts[k]);
+    STATS(stats->extrap_low[j] += *weight < 0.);
+    STATS(stats->extrap_high[j] += *weight > 1.);
+}
+
+
+/* Scratch holding the values of the variables of one point, on the stack
+   when there are few of them */
+#define STACK_VALUES 64
+
+static npy_double *
+values_alloc(const Evaluation_t *evaluation, npy_double *stack)
+{
+    const npy_intp nvars = evaluation->table->nvars;
+
+    if (nvars <= STACK_VALUES) {
+        return stack;
+    }
+    return (npy_double *) malloc(nvars * sizeof(npy_double));
+}
+
+static void
+values_free(npy_double *values, npy_double *stack)
+{
+    if (values != stack) {
+        free(values);
+    }
+}
+
+
+/* Evaluate the i-th point from its subscripts and weights and store it.
+   values is a scratch of nvars values. */
+static npy_intp
+evaluate_point(const Evaluation_t *evaluation, const npy_double *weigths,
+               const npy_intp *index, npy_intp i, npy_double *values,
+               Stats_t *stats)
+{
+    const Mesh_h table = evaluation->table;
+    const npy_intp itemsize = evaluation->result_type == NPY_FLOAT ?
+                              sizeof(npy_float) : sizeof(npy_double);
+    npy_double gradient[NPY_MAXDIMS];
+    npy_intp   status, k;
+    char       *ptr;
+
+    if (evaluation->gradient == NULL && evaluation->views == NULL) {
+        // all the variables at once
+        status = evaluation->kernel(table, weigths, index,
+                                    evaluation->interp_method,
+                                    evaluation->extrap_method, values);
+        if (status != NDTABLE_INTERPSTATUS_OK) {
+            return status;
+        }
+    }
+    else {
+        // one variable at a time
+        for (k = 0; k < table->nvars; k++) {
+            const Mesh_h variable = evaluation->views == NULL ?
+                                    table : &evaluation->views[k];
+
+            if (evaluation->gradient != NULL) {
+                npy_intp j;
+
+                status = NDT_eval_gradient(variable, weigths, index,
+                                           evaluation->interp_method,
+                                           evaluation->extrap_method,
+                                           &values[k], gradient);
+                ptr = evaluation->gradient +
+                      (i * table->nvars + k) * itemsize;
+                for (j = 0; j < table->ndim; j++) {
+                    if (evaluation->result_type == NPY_FLOAT) {
+                        *(npy_float *) ptr = (npy_float) gradient[j];
+                    }
+                    else {
+                        *(npy_double *) ptr = gradient[j];
+                    }
+                    ptr += evaluation->gradient_stride;
+                }
+            }
+            else {
+                status = evaluation->kernel(variable, weigths, index,
+                                            evaluation->interp_method,
+                                            evaluation->extrap_method,
+                                            &values[k]);
+            }
+            if (status != NDTABLE_INTERPSTATUS_OK) {
+                return status;
+            }
+        }
+    }
+
+    STATS(for (k = 0; k < table->nvars; k++) {
+              stats->nan += npy_isnan(values[k]);
+          });
+
+    ptr = evaluation->result + i * evaluation->result_stride;
+    for (k = 0; k < table->nvars; k++) {
+        if (evaluation->result_type == NPY_FLOAT) {
+            ((npy_float *) ptr)[k] = (npy_float) values[k];
+        }
+        else {
+            ((npy_double *) ptr)[k] = values[k];
+        }
+    }
+    return NDTABLE_INTERPSTATUS_OK;
+}
+
+
+/* Per dimension flag, set if the targets of the points [start, stop)
+   are sorted and can be merged with the breakpoints */
+static void
+find_sorted(const Evaluation_t *evaluation, npy_intp start, npy_intp stop,
+            int *sorted)
+{
+    const Mesh_h table = evaluation->table;
+    npy_double    last[NPY_MAXDIMS];
+    Cursor_t      cursor;
+    npy_intp      i, j;
+
+    cursor_seek(evaluation, &cursor, start);
+    for (j = 0; j < table->ndim; j++) {
+        sorted[j] = 1;
+    }
+    for(i = start; i < stop; i++) {
+        for(j = 0; j < table->ndim; j++) {
+            const npy_double x = LOAD_TARGET(evaluation->params_type[j],
+                                             cursor.ptrs[j]);
+
+            if (!(i > start ? last[j] <= x : x == x)) {
+                sorted[j] = 0;
+            }
+            last[j] = x;
+        }
+        cursor_next(evaluation, &cursor);
+    }
+}
+
+
+static npy_intp
+evaluate_range(void *context, npy_intp start, npy_intp stop)
+{
+    const Evaluation_t *evaluation = (const Evaluation_t *) context;
+    const Mesh_h table = evaluation->table;
+
+    npy_intp      index[NPY_MAXDIMS]; // the subscripts
+    npy_double    weigths[NPY_MAXDIMS]; // the weights for the interpolation
+    npy_double    stack[STACK_VALUES];
+    npy_double    *values;            // the values of the variables
+    npy_intp      hints[NPY_MAXDIMS]; // per dimension search start values
+    int           sorted[NPY_MAXDIMS]; // sorted targets are merged
+    Cursor_t      cursor;
+    Stats_t       stats;
+
+    npy_intp i, j, status = NDTABLE_INTERPSTATUS_OK;
+
+    if (start >= stop) {
+        return NDTABLE_INTERPSTATUS_OK;
+    }
+
+    values = values_alloc(evaluation, stack);
+    if (values == NULL) {
+        return NDTABLE_INTERPSTATUS_NOMEMORY;
+    }
+    STATS(double lap);
+    STATS(Stats_init(&stats); lap = Stats_clock());
+
+    find_sorted(evaluation, start, stop, sorted);
+    for (j = 0; j < table->ndim; j++) {
+        hints[j] = evaluation->hints_in != NULL && start == 0 ?
+                   evaluation->hints_in[j] : 0;
+    }
+
+    // Iteration over each points
+    cursor_seek(evaluation, &cursor, start);
+    for(i = start; i < stop; i++) {
+
+        // for each point, iterate over each dimension
+        // search index for interpolation and calculate weight.
+        // hints[j] will serve for next iteration as start value
+        for(j = 0; j < table->ndim; j++) {
+            locate(table, j,
+                   LOAD_TARGET(evaluation->params_type[j], cursor.ptrs[j]),
+                   sorted[j] && i > start,
+                   &hints[j], &index[j], &weigths[j], &stats);
+        }
+        STATS(Stats_lap(&stats.search_time, &lap));
+
+        status = evaluate_point(evaluation, weigths, index, i, values,
+                                &stats);
+        STATS(Stats_lap(&stats.blend_time, &lap));
+        if(status != NDTABLE_INTERPSTATUS_OK) {
+            break;
+        }
+        cursor_next(evaluation, &cursor);
+    }
+
+    // carried over to the next call
+    if (evaluation->hints_out != NULL && stop == evaluation->npoints) {
+        for (j = 0; j < table->ndim; j++) {
+            evaluation->hints_out[j] = hints[j];
+        }
+    }
+
+    STATS(Stats_merge(evaluation->stats, &stats));
+    values_free(values, stack);
+    return status;
+}
+
+
+/* Targets [i, i + n) of a 1-D table, as doubles */
+static void
+load_targets(const Evaluation_t *evaluation, Cursor_t *cursor, npy_intp i,
+             npy_intp n, npy_double *x)
+{
+    npy_intp b;
+
+    if (evaluation->nd == 1) {
+        // a strided vector, read without the cursor
+        const npy_intp stride = evaluation->strides[0][0];
+        const char *ptr = evaluation->params[0] + i * stride;
+
+        if (evaluation->params_type[0] == NPY_FLOAT) {
+            for (b = 0; b < n; b++, ptr += stride) {
+                x[b] = *(const npy_float *) ptr;
+            }
+        }
+        else {
+            for (b = 0; b < n; b++, ptr += stride) {
+                x[b] = *(const npy_double *) ptr;
+            }
+        }
+        return;
+    }
+    for (b = 0; b < n; b++) {
+        x[b] = LOAD_TARGET(evaluation->params_type[0], cursor->ptrs[0]);
+        cursor_next(evaluation, cursor);
+    }
+}
+
+
+/* Linear 1-D tables: the points [start, stop) are searched then blended
+   by blocks of CURVE_BLOCK, from the slopes cached on the table. Double
+   results are written in place when contiguous. */
+static npy_intp
+evaluate_curve_range(void *context, npy_intp start, npy_intp stop)
+{
+    const Evaluation_t *evaluation = (const Evaluation_t *) context;
+    const Mesh_h table = evaluation->table;
+    const int direct = evaluation->result_type == NPY_DOUBLE &&
+                       evaluation->result_stride == sizeof(npy_double);
+
+    npy_double    x[CURVE_BLOCK];
+    npy_intp      index[CURVE_BLOCK];
+    npy_double    buffer[CURVE_BLOCK];
+    npy_double    last = -NPY_INFINITY;
+    npy_intp      hint = evaluation->hints_in != NULL && start == 0 ?
+                         evaluation->hints_in[0] : 0;
+    int           sorted = 1;
+    Cursor_t      cursor;
+    Stats_t       stats;
+
+    npy_intp i, b, n;
+
+    if (start >= stop) {
+        return NDTABLE_INTERPSTATUS_OK;
+    }
+    STATS(double lap);
+    STATS(Stats_init(&stats); lap = Stats_clock());
+
+    // sorted targets are merged with the breakpoints
+    cursor_seek(evaluation, &cursor, start);
+    for (i = start; i < stop && sorted; i += n) {
+        n = stop - i < CURVE_BLOCK ? stop - i : CURVE_BLOCK;
+        load_targets(evaluation, &cursor, i, n, x);
+        for (b = 0; b < n; b++) {
+            sorted &= last <= x[b];
+            last = x[b];
+        }
+    }
+
+    cursor_seek(evaluation, &cursor, start);
+    for (i = start; i < stop; i += n) {
+        npy_double *values = direct ?
+            (npy_double *) evaluation->result + i : buffer;
+
+        n = stop - i < CURVE_BLOCK ? stop - i : CURVE_BLOCK;
+        load_targets(evaluation, &cursor, i, n, x);
+        for (b = 0; b < n; b++) {
+            index[b] = search(table, 0, x[b], sorted && i + b > start,
+                              &hint, &stats);
+        }
+        STATS(for (b = 0; b < n; b++) {
+                  stats.extrap_low[0] += x[b] < table->coords[0][0];
+                  stats.extrap_high[0] +=
+                      x[b] > table->coords[0][table->shape[0] - 1];
+              });
+        STATS(Stats_lap(&stats.search_time, &lap));
+
+        Curve_eval(table, x, index, n, evaluation->extrap_method, values);
+
+        /* a cell with a non-finite sample gives inf * 0 = NaN from its
+           slope: such values are blended again from the two samples */
+        for (b = 0; b < n; b++) {
+            if (!npy_isfinite(values[b]) && !npy_isnan(x[b])) {
+                const npy_double *bkpts = table->coords[0] + index[b];
+                const npy_double w = (x[b] - bkpts[0]) / (bkpts[1] - bkpts[0]);
+
+                evaluation->kernel(table, &w, &index[b],
+                                   evaluation->interp_method,
+                                   evaluation->extrap_method, &values[b]);
+            }
+        }
+
+        STATS(for (b = 0; b < n; b++) {
+                  stats.nan += npy_isnan(values[b]);
+              });
+        if (!direct) {
+            for (b = 0; b < n; b++) {
+                char *ptr = evaluation->result +
+                            (i + b) * evaluation->result_stride;
+
+                if (evaluation->result_type == NPY_FLOAT) {
+                    *(npy_float *) ptr = (npy_float) values[b];
+                }
+                else {
+                    *(npy_double *) ptr = values[b];
+                }
+            }
+        }
+        STATS(Stats_lap(&stats.blend_time, &lap));
+    }
+
+    if (evaluation->hints_out != NULL && stop == evaluation->npoints) {
+        evaluation->hints_out[0] = hint;
+    }
+
+    STATS(Stats_merge(evaluation->stats, &stats));
+    return NDTABLE_INTERPSTATUS_OK;
+}
+
+
+/* Locator: locate the points [start, stop) without evaluating them */
+static npy_intp
+locate_range(void *context, npy_intp start, npy_intp stop)
+{
+    const Evaluation_t *evaluation = (const Evaluation_t *) context;
+    const Mesh_h table = evaluation->table;
+
+    npy_intp      hints[NPY_MAXDIMS]; // per dimension search start values
+    int           sorted[NPY_MAXDIMS]; // sorted targets are merged
+    Cursor_t      cursor;
+    Stats_t       stats;
+
+    npy_intp i, j;
+
+    if (start >= stop) {
+        return NDTABLE_INTERPSTATUS_OK;
+    }
+
+    STATS(double lap);
+    STATS(Stats_init(&stats); lap = Stats_clock());
+
+    find_sorted(evaluation, start, stop, sorted);
+    for (j = 0; j < table->ndim; j++) {
+        hints[j] = 0;
+    }
+
+    cursor_seek(evaluation, &cursor, start);
+    for(i = start; i < stop; i++) {
+        for(j = 0; j < table->ndim; j++) {
+            locate(table, j,
+                   LOAD_TARGET(evaluation->params_type[j], cursor.ptrs[j]),
+                   sorted[j] && i > start, &hints[j],
+                   &evaluation->located_index[j][i],
+                   &evaluation->located_weight[j][i], &stats);
+        }
+        cursor_next(evaluation, &cursor);
+    }
+
+    STATS(Stats_lap(&stats.search_time, &lap);
+          Stats_merge(evaluation->stats, &stats));
+    return NDTABLE_INTERPSTATUS_OK;
+}
+
+
+/* Locator: evaluate the points [start, stop) from their stored subscripts
+   and weights */
+static npy_intp
+evaluate_located_range(void *context, npy_intp start, npy_intp stop)
+{
+    const Evaluation_t *evaluation = (const Evaluation_t *) context;
+    const npy_intp ndim = evaluation->table->ndim;
+
+    npy_intp      index[NPY_MAXDIMS]; // the subscripts
+    npy_double    weigths[NPY_MAXDIMS]; // the weights for the interpolation
+    npy_double    stack[STACK_VALUES];
+    npy_double    *values;            // the values of the variables
+    Stats_t       stats;
+
+    npy_intp i, j, status = NDTABLE_INTERPSTATUS_OK;
+
+    values = values_alloc(evaluation, stack);
+    if (values == NULL) {
+        return NDTABLE_INTERPSTATUS_NOMEMORY;
+    }
+    STATS(double lap);
+    STATS(Stats_init(&stats); lap = Stats_clock());
+
+    for(i = start; i < stop; i++) {
+        for (j = 0; j < ndim; j++) {
+            index[j] = evaluation->located_index[j][i];
+            weigths[j] = evaluation->located_weight[j][i];
+        }
+
+        status = evaluate_point(evaluation, weigths, index, i, values,
+                                &stats);
+        if(status != NDTABLE_INTERPSTATUS_OK) {
+            break;
+        }
+    }
+
+    STATS(Stats_lap(&stats.blend_time, &lap);
+          Stats_merge(evaluation->stats, &stats));
+    values_free(values, stack);
+    return status;
+}
+
+
+/* Grid mode: locate each target value once per axis */
+static void
+locate_grid(Evaluation_t *evaluation)
+{
+    const Mesh_h table = evaluation->table;
+    Stats_t stats;
+    npy_intp i, j;
+
+    STATS(double lap);
+    STATS(Stats_init(&stats); lap = Stats_clock());
+
+    for (j = 0; j < table->ndim; j++) {
+        npy_intp hint = 0;
+
+        for (i = 0; i < evaluation->size[j]; i++) {
+            locate(table, j, TARGET(evaluation, j, i),
+                   evaluation->sorted[j] && i > 0, &hint,
+                   &evaluation->located_index[j][i],
+                   &evaluation->located_weight[j][i], &stats);
+        }
+    }
+
+    STATS(Stats_lap(&stats.search_time, &lap);
+          Stats_merge(evaluation->stats, &stats));
+}
+
+
+/* Grid mode: evaluate the points [start, stop) of the C ordered grid */
+static npy_intp
+evaluate_grid_range(void *context, npy_intp start, npy_intp stop)
+{
+    const Evaluation_t *evaluation = (const Evaluation_t *) context;
+    const npy_intp ndim = evaluation->table->ndim;
+
+    npy_intp      index[NPY_MAXDIMS]; // the subscripts
+    npy_double    weigths[NPY_MAXDIMS]; // the weights for the interpolation
+    npy_double    stack[STACK_VALUES];
+    npy_double    *values;            // the values of the variables
+    Stats_t       stats;
+
+    npy_intp i, j, status = NDTABLE_INTERPSTATUS_OK;
+
+    values = values_alloc(evaluation, stack);
+    if (values == NULL) {
+        return NDTABLE_INTERPSTATUS_NOMEMORY;
+    }
+    STATS(double lap);
+    STATS(Stats_init(&stats); lap = Stats_clock());
+
+    for(i = start; i < stop; i++) {
+        npy_intp rest = i;
+
+        for (j = ndim - 1; j >= 0; j--) {
+            const npy_intp t = rest % evaluation->size[j];
+
+            rest /= evaluation->size[j];
+            index[j] = evaluation->located_index[j][t];
+            weigths[j] = evaluation->located_weight[j][t];
+        }
+
+        status = evaluate_point(evaluation, weigths, index, i, values,
+                                &stats);
+        if(status != NDTABLE_INTERPSTATUS_OK) {
+            break;
+        }
+    }
+
+    STATS(Stats_lap(&stats.blend_time, &lap);
+          Stats_merge(evaluation->stats, &stats));
+    values_free(values, stack);
+    return status;
+}
+
+
+/* Convert the targets to aligned float32 or float64 arrays, contiguous
+   in grid mode. result_type is promoted to float64 unless all the
+   targets are float32. */
+static int
+convert_targets(Evaluation_t *evaluation, PyObject *targets, int grid,
+                NDTargets_h mytargets, int *result_type)
+{
+    for (Py_ssize_t j=0; j < mytargets->ndim; j++) {
+        PyObject *target = PySequence_GetItem(targets, j);
+        int target_type;
+
+        if (target == NULL) {
+            return -1;
+        }
+        target_type = Mesh_DataType(target);
+
+        // only the grid mode needs contiguous targets
+        if (grid) {
+            mytargets->coords[j] = (PyArrayObject*) PyArray_ContiguousFromAny(
+                target, target_type, 0, 0);
+        }
+        else {
+            mytargets->coords[j] = (PyArrayObject*) PyArray_FromAny(
+                target, PyArray_DescrFromType(target_type), 0, 0,
+                NPY_ARRAY_ALIGNED | NPY_ARRAY_NOTSWAPPED, NULL);
+        }
+        Py_DECREF(target);
+        if (mytargets->coords[j] == NULL) {
+            return -1;
+        }
+        evaluation->params[j] = PyArray_DATA(mytargets->coords[j]);
+        evaluation->params_type[j] = target_type;
+        evaluation->size[j] = PyArray_SIZE(mytargets->coords[j]);
+        if (target_type != NPY_FLOAT) {
+            *result_type = NPY_DOUBLE;
+        }
+    }
+    return 0;
+}
+
+
+/* Broadcast the targets. The iterator gives the broadcast shape and the
+   strides of each target along it, which the worker threads walk without
+   copying the broadcast targets. */
+static int
+broadcast_targets(Evaluation_t *evaluation, NDTargets_h mytargets)
+{
+    npy_uint32 op_flags[NPY_MAXDIMS];
+    NpyIter *iter;
+    npy_intp i, j;
+
+    for (j = 0; j < mytargets->ndim; j++) {
+        op_flags[j] = NPY_ITER_READONLY;
+    }
+    iter = NpyIter_MultiNew(mytargets->ndim, mytargets->coords,
+                            NPY_ITER_MULTI_INDEX | NPY_ITER_ZEROSIZE_OK |
+                            NPY_ITER_REFS_OK,
+                            NPY_CORDER, NPY_NO_CASTING, op_flags, NULL);
+    if (iter == NULL) {
+        return -1;
+    }
+    evaluation->nd = NpyIter_GetNDim(iter);
+    if (NpyIter_GetShape(iter, evaluation->shape) != NPY_SUCCEED) {
+        NpyIter_Deallocate(iter);
+        return -1;
+    }
+    for (i = 0; i < evaluation->nd; i++) {
+        const npy_intp *strides = NpyIter_GetAxisStrideArray(iter, i);
+
+        for (j = 0; j < mytargets->ndim; j++) {
+            evaluation->strides[j][i] = strides[j];
+        }
+    }
+    NpyIter_Deallocate(iter);
+    return 0;
+}
+
+
+/* Scalar call of a Table: the point is given as numbers, read as raw
+   doubles, and evaluated with the methods stored on the table. The cells
+   found are kept as the search hints of the next call. */
+PyObject *
+Table_evaluate(TableObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+    const Mesh_h  table = &self->mesh;
+    Evaluation_t  evaluation;
+    npy_intp      index[NPY_MAXDIMS];
+    npy_double    weigths[NPY_MAXDIMS];
+    npy_double    stack[STACK_VALUES];
+    npy_double    *values;
+    npy_double    value;
+    PyArrayObject *result_array = NULL;
+    Stats_t       stats;
+    npy_intp      status, j;
+
+    if (nargs != table->ndim) {
+        PyErr_Format(PyExc_TypeError,
+            "Table takes %zd coordinates (%zd given)", table->ndim,
+            (npy_intp) nargs);
+        return NULL;
+    }
+    if (table->ndim == 0) {
+        return Mesh_IS_VECTOR(table) ?
+               PyArray_NewCopy(table->array, NPY_CORDER) :
+               PyArray_GETITEM(table->array, PyArray_DATA(table->array));
+    }
+
+    STATS(Stats_init(&stats); stats.calls = 1; stats.points = 1);
+    for (j = 0; j < table->ndim; j++) {
+        npy_double x;
+
+        if (PyFloat_CheckExact(args[j])) {
+            x = PyFloat_AS_DOUBLE(args[j]);
+        }
+        else {
+            // arrays take the interpolation() path
+            if (PyArray_Check(args[j])) {
+                PyErr_SetString(PyExc_TypeError,
+                    "Table takes numbers, use interpolation() for arrays");
+                return NULL;
+            }
+            x = PyFloat_AsDouble(args[j]);
+            if (error_converting(x)) {
+                return NULL;
+            }
+        }
+        locate(table, j, x, 0, &self->hint[j], &index[j], &weigths[j],
+               &stats);
+    }
+
+    if (HERMITE_IS_CUBIC(self->interp) &&
+        Hermite_prepare(table, self->interp) != NDTABLE_INTERPSTATUS_OK) {
+        return PyErr_NoMemory();
+    }
+
+    evaluation.table = table;
+    evaluation.views = NULL;
+    evaluation.gradient = NULL;
+    evaluation.result = (char *) &value;
+    evaluation.result_stride = 0;
+    evaluation.result_type = NPY_DOUBLE;
+    evaluation.interp_method = self->interp;
+    evaluation.extrap_method = self->extrap;
+    if (Mesh_IS_VECTOR(table)) {
+        result_array = (PyArrayObject *) PyArray_SimpleNew(
+            1, &table->nvars, NPY_DOUBLE);
+        if (result_array == NULL) {
+            return NULL;
+        }
+        evaluation.result = PyArray_DATA(result_array);
+        if (table->nvars > 1 && self->interp != NDTABLE_INTERP_LINEAR) {
+            evaluation.views = Mesh_Variables(table);
+            if (evaluation.views == NULL) {
+                Py_DECREF(result_array);
+                return PyErr_NoMemory();
+            }
+        }
+    }
+
+    evaluation.kernel = NDT_select_kernel(
+        evaluation.views != NULL ? evaluation.views : table,
+        self->interp, self->extrap);
+
+    values = values_alloc(&evaluation, stack);
+    if (values == NULL) {
+        free(evaluation.views);
+        Py_XDECREF(result_array);
+        return PyErr_NoMemory();
+    }
+    status = evaluate_point(&evaluation, weigths, index, 0, values, &stats);
+    values_free(values, stack);
+    free(evaluation.views);
+    STATS(Stats_merge(NULL, &stats));
+
+    if (status != NDTABLE_INTERPSTATUS_OK) {
+        Py_XDECREF(result_array);
+        if (status == NDTABLE_INTERPSTATUS_NOMEMORY) {
+            return PyErr_NoMemory();
+        }
+        PyErr_Format(PyExc_ValueError,
+            "Error %zd occured in fancy_algorithm", status);
+        return NULL;
+    }
+    if (result_array != NULL) {
+        return (PyObject *) result_array;
+    }
+    return PyFloat_FromDouble(value);
+}
+
+
+
 static PyObject
 *interpolation(PyObject *NPY_UNUSED(self), PyObject *args, PyObject *kwdict) 
 {
@@ -95,38 +930,65 @@ static PyObject
 
     Parameters
     ---------
-    mesh :    Mesh object
-              Labeled nd-array  
-    targets : Sequence of array
-              Elements for which interpolation values are computed
+    mesh :    Mesh or Table object
+              Labeled nd-array, or its compiled Table
+    targets : Sequence of array, or Locator
+              Elements for which interpolation values are computed,
+              or the Locator returned by locate() for them
     inter :   str
               Interpolation method
     extrap :  str
               Extrapolation method
+    threads : int
+              Number of threads evaluating the points
+    grid :    bool
+              Evaluate on the tensor product of the targets
+    with_gradient : bool
+              Also return the partial derivatives, stacked on a
+              leading axis, a single vector of them with a single value
+    out :     float32 or float64 array
+              Written in place and returned instead of a new array
+    hints :   intp array
+              One search start value per dimension, read then set to
+              the cells of the last point, so that a stream of batches
+              is searched as a single one
+    stats :   dict
+              Updated with the counters of the call, as returned by
+              stats()
 
     **************************************************/
 
-    PyObject *ret = NULL;       // returned value, Py_BuildValue of result_array
+    PyObject *ret = NULL;       // returned value
     PyArrayObject *result_array = NULL;
+    PyArrayObject *gradient_array = NULL;
+    int with_gradient = 0;
 
     PyObject *mesh = NULL;      // function parameters from Python code
     PyObject *targets = NULL;   // function paramters from Python code
-
-    npy_intp result_array_size;
-
-    npy_intp      index[NPY_MAXDIMS]; // the subscripts
-    npy_intp      nsubs[NPY_MAXDIMS]; // the neighboring subscripts
-    npy_double    derivatives[NPY_MAXDIMS];
-    npy_double    weigths[NPY_MAXDIMS]; // the weights for the interpolation
-    npy_double    *params[NPY_MAXDIMS]; // the weights for the interpolation
+    PyObject *out = NULL;       // optional output array
+    PyObject *hints = NULL;     // optional search hints, updated
+    PyObject *counters = NULL;  // optional dict of the counters, updated
+    Stats_t  call;              // counters of the call
+    npy_intp hints_in[NPY_MAXDIMS];
+    LocatorObject *locator = NULL; // targets located beforehand
+    int grid = 0;               // evaluate on the grid of the targets
+    npy_intp grid_shape[NPY_MAXDIMS];
+    char *grid_buffer = NULL;   // grid indices and weights
+
+    npy_intp result_array_size;  // number of points
+    npy_intp result_shape[NPY_MAXDIMS + 1];
+    int      result_nd;
+    npy_intp value_stride;      // in bytes, between values of the result
+
+    Py_ssize_t    nthreads = 1;
+    Evaluation_t  evaluation;
+    int           result_type;
 
     Mesh_h table;
+    Mesh_t xmesh;               // built from an xarray.DataArray
+    NDTargets_t mytargets;      // targets converted to arrays
 
-    npy_double *result_data;
-
-    npy_intp i, j, _cache;
-
-    const npy_double *dx;
+    npy_intp i, j;
 
 
     /**************************************************
@@ -140,16 +1002,57 @@ static PyObject
     * Parse python call arguments
     **************************************************/
     static char *kwlist[] = {"mesh", "targets", "interp",
-                             "extrap", NULL};
+                             "extrap", "threads", "out", "grid",
+                             "with_gradient", "hints", "stats", NULL};
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwdict, "OO|ss", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kwdict, "OO|ssnOppOO", kwlist,
                                      &mesh, &targets,
-                                     &interp_method, &extrap_method)){
+                                     &interp_method, &extrap_method,
+                                     &nthreads, &out, &grid,
+                                     &with_gradient, &hints, &counters)){
         return NULL;       
     }
-    #if DEBUG == 1
-    printf("Called successful\n");
-    #endif
+    if (counters == Py_None) {
+        counters = NULL;
+    }
+    if (counters != NULL && !PyDict_Check(counters)) {
+        PyErr_SetString(PyExc_TypeError, "stats must be a dict");
+        return NULL;
+    }
+    // all zero for the caller when they are not compiled in
+    if (counters != NULL) {
+        Stats_init(&call);
+    }
+    STATS(Stats_init(&call));
+    if (out == Py_None) {
+        out = NULL;
+    }
+    if (out != NULL) {
+        if (!PyArray_Check(out) ||
+            (PyArray_TYPE((PyArrayObject *) out) != NPY_DOUBLE &&
+             PyArray_TYPE((PyArrayObject *) out) != NPY_FLOAT)) {
+            PyErr_SetString(PyExc_TypeError,
+                "out must be a float32 or float64 array");
+            return NULL;
+        }
+    }
+    if (hints == Py_None) {
+        hints = NULL;
+    }
+    if (hints != NULL) {
+        if (!PyArray_Check(hints) ||
+            PyArray_TYPE((PyArrayObject *) hints) != NPY_INTP ||
+            !PyArray_ISCARRAY((PyArrayObject *) hints)) {
+            PyErr_SetString(PyExc_TypeError,
+                "hints must be a writeable contiguous intp array");
+            return NULL;
+        }
+        if (grid || Locator_Check(targets)) {
+            PyErr_SetString(PyExc_ValueError,
+                "hints are not supported with grid or a Locator");
+            return NULL;
+        }
+    }
 
     /**************************************************
     * Check interpolation and extrapolation method
@@ -160,187 +1063,507 @@ static PyObject
     /**************************************************
     * Create Mesh_h
     **************************************************/
+    if (Table_Check(mesh)) {
+        if (!Table_Ready(mesh)) {
+            return NULL;
+        }
+        table = Table_MESH(mesh);
+    }
+    else {
+        STATS(double build = Stats_clock());
 
+        if (Mesh_FromXarray(&xmesh, mesh) < 0) {
+            return NULL;
+        }
+        table = &xmesh;
+        STATS(call.build_time += Stats_clock() - build);
+    }
 
-    // PyObject *data = PyObject_GetAttrString(mesh, "data");
-    // PyArrayObject* array = (PyArrayObject*) PyArray_ContiguousFromAny(
-    //                         data , NPY_DOUBLE, 0, 0);
-
-    // printf("Refcount array : %zi\n", array);
-    #if DEBUG == 1
-    printf("Table creation...\n");
-    #endif
-    table = Mesh_FromXarray(mesh); // , *interpmethod, *extrapmethod);
-
-    #if DEBUG == 1
-    printf("... success.\n");
-    #endif
     /**************************************************
     * Build targets and shape plausibility check
-        - first build : only accept if all target
-          shapes are identical
+        - the targets are broadcast together, or span
+          a grid in grid mode
     **************************************************/    
-    NDTargets_h mytargets = (NDTargets_h) malloc(sizeof(NDTargets_t));
-    mytargets->ndim = PySequence_Size(targets);
-
-    if (mytargets->ndim == 0) {
-        goto fail;
+    mytargets.ndim = 0;
+    evaluation.views = NULL;
+
+    if (Locator_Check(targets)) {
+        // the points were located beforehand, on the same breakpoints
+        locator = (LocatorObject *) targets;
+        if (grid) {
+            PyErr_SetString(PyExc_ValueError,
+                "grid is not supported with a Locator");
+            goto out;
+        }
+        if (!Locator_Matches(locator, table)) {
+            PyErr_SetString(PyExc_ValueError,
+                "Locator was built on different breakpoints");
+            goto out;
+        }
+        // the subscripts index the data without further checks
+        if (!Locator_InBounds(locator, table)) {
+            goto out;
+        }
+        result_type = locator->typenum == NPY_FLOAT ?
+                      table->typenum : NPY_DOUBLE;
+        evaluation.nd = locator->nd;
+        for (i = 0; i < locator->nd; i++) {
+            evaluation.shape[i] = locator->shape[i];
+        }
+        result_array_size = locator->size;
     }
+    else {
+        Py_ssize_t ntargets = PySequence_Size(targets);
 
-    //
-    for (Py_ssize_t j=0; j < mytargets->ndim; j++) {
-        mytargets->coords[j] = ARRAYD64(PyList_GetItem(targets, j));
-        params[j] = PyArray_DATA(mytargets->coords[j]);
+        if (ntargets < 0) {
+            goto out;
+        }
 
-        // printf("%zd\n", PyArray_SIZE(mytargets->coords[j]));
+        // mesh and targets must have the same shape.
+        if (ntargets != table->ndim) {
+            PyErr_Format(PyExc_ValueError,
+                "Targets shape and mesh coords have different shapes.");
+            goto out;
+        }
+        for (j = 0; j < ntargets; j++) {
+            mytargets.coords[j] = NULL;
+        }
+        mytargets.ndim = ntargets;
 
-        if (j==0) {
-            result_array = (PyArrayObject *) PyArray_NewLikeArray(mytargets->coords[0],
-                NPY_CORDER, NULL, 1);
+        // float32 results only if the table and all the targets are float32
+        result_type = table->typenum;
+        if (convert_targets(&evaluation, targets, grid, &mytargets,
+                            &result_type) < 0) {
+            goto out;
+        }
+
+        if (ntargets == 0) {
+            // a scalar table, evaluated as is
+            evaluation.nd = 0;
+            result_array_size = 1;
+        }
+        else if (grid) {
+            // one value per point of the grid of the targets
+            for (j = 0; j < mytargets.ndim; j++) {
+                grid_shape[j] = evaluation.size[j];
+            }
+            result_array_size = PyArray_MultiplyList(grid_shape,
+                                                     mytargets.ndim);
         }
         else {
-            if(PyArray_SIZE(mytargets->coords[j]) != 
-               PyArray_SIZE(mytargets->coords[0])) {
-                PyErr_Format(PyExc_ValueError,
-                    "All target breaking points must be the same size.");
+            if (broadcast_targets(&evaluation, &mytargets) < 0) {
                 goto out;
             }
+            result_array_size = PyArray_MultiplyList(evaluation.shape,
+                                                     evaluation.nd);
         }
+    }
 
+    // the variables of a vector table are on a trailing axis
+    result_nd = grid ? table->ndim : evaluation.nd;
+    for (i = 0; i < result_nd; i++) {
+        result_shape[i] = grid ? grid_shape[i] : evaluation.shape[i];
+    }
+    if (Mesh_IS_VECTOR(table)) {
+        result_shape[result_nd++] = table->nvars;
     }
-    //    Py_DECREF(targets);
 
-    // mesh and targets must have the same shape.
-    if(mytargets->ndim != table->ndim) {
-        PyErr_Format(PyExc_ValueError,
-            "Targets shape and mesh coords have different shapes.");
-        goto out;   
+    if (out != NULL) {
+        /* Written in place when 1-D or contiguous, else through a copy
+           resolved once evaluated */
+        int requirements = NPY_ARRAY_ALIGNED | NPY_ARRAY_WRITEABLE |
+                           NPY_ARRAY_WRITEBACKIFCOPY;
+
+        if (PyArray_SIZE((PyArrayObject *) out) !=
+            result_array_size * table->nvars) {
+            PyErr_Format(PyExc_ValueError,
+                "out has %zd elements, targets have %zd.",
+                PyArray_SIZE((PyArrayObject *) out),
+                result_array_size * table->nvars);
+            goto out;
+        }
+        if (PyArray_NDIM((PyArrayObject *) out) > 1 || table->nvars > 1) {
+            requirements |= NPY_ARRAY_C_CONTIGUOUS;
+        }
+        result_type = PyArray_TYPE((PyArrayObject *) out);
+        Py_INCREF(PyArray_DESCR((PyArrayObject *) out));
+        result_array = (PyArrayObject *) PyArray_FromArray(
+            (PyArrayObject *) out, PyArray_DESCR((PyArrayObject *) out),
+            requirements);
+    }
+    else {
+        result_array = (PyArrayObject *) PyArray_SimpleNew(
+            result_nd, result_shape, result_type);
     }
+    if (result_array == NULL) {
+        goto out;
+    }
+
+    evaluation.gradient = NULL;
+    if (with_gradient) {
+        // one C ordered block of the result shape per dimension
+        npy_intp gradient_shape[NPY_MAXDIMS + 2];
 
-    result_data = PyArray_DATA(result_array);
-    result_array_size = PyArray_SIZE(result_array);
+        gradient_shape[0] = table->ndim;
+        for (i = 0; i < result_nd; i++) {
+            gradient_shape[i + 1] = result_shape[i];
+        }
+        gradient_array = (PyArrayObject *) PyArray_SimpleNew(
+            result_nd + 1, gradient_shape, result_type);
+        if (gradient_array == NULL) {
+            goto out;
+        }
+        evaluation.gradient = PyArray_DATA(gradient_array);
+        evaluation.gradient_stride = result_array_size * table->nvars *
+                                     PyArray_ITEMSIZE(gradient_array);
+    }
     /**************************************************
     * Create NDTable_h
     **************************************************/
     // if the dataset is scalar return the value
     if (table->ndim == 0) {
-        // printf("ouais\n");
-        result_data = &table->data[0];
-        ret = Py_BuildValue("lf", result_data);
+        ret = Mesh_IS_VECTOR(table) ?
+              PyArray_NewCopy(table->array, NPY_CORDER) :
+              PyArray_GETITEM(table->array, PyArray_DATA(table->array));
         goto out;
     }
     else {
-        // TODO: add null check
-       NPY_BEGIN_THREADS_DEF;
-       NPY_BEGIN_THREADS_THRESHOLDED(result_array_size);
-  
-        // START_TIMING;
-    
-        // for(i = 0; i < params_size; i++) {
-        //     // set array of parameter in each direction
-        //     for(j = 0; j < mesh->ndim; j++) {
-        //         // Find index and weights
-        //         // NDTable_find_index(params[j][i], mesh->shape[j], mesh->coords[j],
-        //         //                    &index[j], &weigths[j]);
-
-        //         // index[j] = binary_search_with_guess(params[j][i], mesh->coords[j],
-        //         //                                     mesh->shape[j], index[j]);
-
-        //         _cache = binary_search_with_guess(params[j][i], mesh->coords[j],
-        //                                           mesh->shape[j], _cache);
-        //         index[j] = _cache;
-
-        //         weigths[j] = (params[j][_cache] - mesh->coords[j][_cache]) /
-        //                      (mesh->coords[j][_cache+1] - mesh->coords[j][_cache]);
-        //     }
-        //     npy_intp status = NDT_eval_internal(mesh, weigths, index, nsubs, 0, interp_method,
-        //                                     extrap_method, &result[i], derivatives);
-
-        //     if(status != NDTABLE_INTERPSTATUS_OK) {
-        //         return -1;
-        //     }
-        // }
-
-        // Iteration over each points
-        for(i = 0; i < result_array_size; i++) {
-
-            // for each point, iterate over each dimension
-            // search index for interpolation and calculate weight.
-            for(j = 0; j < table->ndim; j++) {
-                // dx = (const npy_double *)PyArray_DATA(mytargets->coords[j]);
-
-                // _cache will serve for next iteration as start value
-                _cache = binary_search_with_guess(params[j][i],
-                                                  table->coords[j],
-                                                  table->shape[j],
-                                                  _cache);
-
-                /* Handle keys outside of the arr range first */
-                if(_cache == -1) {
-                    _cache = 0;
-                 }
-                else if(_cache == table->shape[j]) {
-                    _cache = table->shape[j] - 2    ;
-                }
-
-                index[j] = _cache;
-                weigths[j] = (params[j][i] - table->coords[j][_cache]) /
-                             (table->coords[j][_cache+1] - table->coords[j][_cache]);
+        npy_intp status;
+        int curve;
+        STATS(double build = Stats_clock());
+
+        // the cubic methods use coefficients cached on the table
+        if (HERMITE_IS_CUBIC(interpmethod) &&
+            Hermite_prepare(table, interpmethod) != NDTABLE_INTERPSTATUS_OK) {
+            PyErr_NoMemory();
+            goto out;
+        }
 
-            // printf("%f between %f and %f, weight: %f\n", params[j][i],
-            //               table->coords[j][_cache],
-            //               table->coords[j][_cache+1],
-            //               weigths[j]);
+        // compiled 1-D tables are interpolated linearly from their slopes
+        curve = Table_Check(mesh) && locator == NULL && !grid &&
+                !with_gradient && table->ndim == 1 && table->nvars == 1 &&
+                table->shape[0] >= 2 &&
+                interpmethod == NDTABLE_INTERP_LINEAR &&
+                (extrapmethod == NDTABLE_EXTRAP_HOLD ||
+                 extrapmethod == NDTABLE_EXTRAP_LINEAR);
+        if (curve && Curve_prepare(table) != NDTABLE_INTERPSTATUS_OK) {
+            PyErr_NoMemory();
+            goto out;
+        }
+        STATS(call.build_time += Stats_clock() - build);
+
+        // the methods blending one variable at a time use views of them
+        if (table->nvars > 1 &&
+            (interpmethod != NDTABLE_INTERP_LINEAR || with_gradient)) {
+            evaluation.views = Mesh_Variables(table);
+            if (evaluation.views == NULL) {
+                PyErr_NoMemory();
+                goto out;
             }
-            // PyObject_Print(PyList_GetItem(targets, 0), stdout, 0);
-            #if DEBUG == 1
-            printf("****************************************\n");
-            #endif
-
-            npy_intp status = NDT_eval_internal(
-                table, weigths, index, nsubs, 0,
-                interpmethod, extrapmethod, &result_data[i]);
- 
-            // result_data
-
-            if(status != NDTABLE_INTERPSTATUS_OK) {
+        }
+
+        // the kernel of the methods is picked once for all the points
+        evaluation.kernel = NDT_select_kernel(
+            evaluation.views != NULL ? evaluation.views : table,
+            interpmethod, extrapmethod);
+
+        evaluation.table = table;
+        evaluation.npoints = result_array_size;
+        evaluation.stats = &call;
+        evaluation.hints_in = NULL;
+        evaluation.hints_out = NULL;
+        if (hints != NULL) {
+            npy_intp *carried = (npy_intp *) PyArray_DATA(
+                (PyArrayObject *) hints);
+
+            if (PyArray_SIZE((PyArrayObject *) hints) != table->ndim) {
                 PyErr_Format(PyExc_ValueError,
-                    "Error %d occured in fancy_algorithm", status);
+                    "hints has %zd elements, the table %zd dimensions.",
+                    PyArray_SIZE((PyArrayObject *) hints), table->ndim);
+                goto out;
+            }
+            // read by the first range, while the last one sets them
+            for (j = 0; j < table->ndim; j++) {
+                hints_in[j] = carried[j] < 0 ? 0 :
+                    carried[j] >= table->shape[j] ? table->shape[j] - 1 :
+                    carried[j];
+            }
+            evaluation.hints_in = hints_in;
+            evaluation.hints_out = carried;
+        }
+        evaluation.result = PyArray_DATA(result_array);
+        value_stride = PyArray_NDIM(result_array) == 1 ?
+            PyArray_STRIDE(result_array, 0) : PyArray_ITEMSIZE(result_array);
+        evaluation.result_stride = value_stride * table->nvars;
+        evaluation.result_type = result_type;
+        evaluation.interp_method = interpmethod;
+        evaluation.extrap_method = extrapmethod;
+
+        if (locator != NULL) {
+            for (j = 0; j < table->ndim; j++) {
+                evaluation.located_index[j] = (npy_intp *)
+                    PyArray_DATA(locator->index) + j * locator->size;
+                evaluation.located_weight[j] = (npy_double *)
+                    PyArray_DATA(locator->weight) + j * locator->size;
+            }
+        }
+        else if (grid) {
+            npy_intp count = 0;
+
+            for (j = 0; j < table->ndim; j++) {
+                evaluation.sorted[j] = evaluation.params_type[j] == NPY_FLOAT ?
+                    is_sorted_float((const npy_float *) evaluation.params[j],
+                                    evaluation.size[j]) :
+                    is_sorted((const npy_double *) evaluation.params[j],
+                              evaluation.size[j]);
+            }
+
+            for (j = 0; j < table->ndim; j++) {
+                count += evaluation.size[j];
+            }
+            grid_buffer = malloc(count * (sizeof(npy_intp) +
+                                          sizeof(npy_double)) + 1);
+            if (grid_buffer == NULL) {
+                PyErr_NoMemory();
                 goto out;
             }
+            count = 0;
+            for (j = 0; j < table->ndim; j++) {
+                evaluation.located_weight[j] = (npy_double *) grid_buffer + count;
+                count += evaluation.size[j];
+            }
+            for (j = 0; j < table->ndim; j++) {
+                evaluation.located_index[j] = (npy_intp *)
+                    ((npy_double *) grid_buffer + count);
+                count += evaluation.size[j];
+            }
+        }
+
+        STATS(call.calls = 1);
+        STATS(call.points = result_array_size);
+
+        NPY_BEGIN_THREADS_DEF;
+        NPY_BEGIN_THREADS_THRESHOLDED(result_array_size);
+
+        if (locator != NULL) {
+            status = parallel_for(evaluate_located_range, &evaluation,
+                                  result_array_size, nthreads);
+        }
+        else if (curve) {
+            status = parallel_for(evaluate_curve_range, &evaluation,
+                                  result_array_size, nthreads);
+        }
+        else if (!grid) {
+            status = parallel_for(evaluate_range, &evaluation,
+                                  result_array_size, nthreads);
+        }
+        else {
+            locate_grid(&evaluation);
+            if (interpmethod == NDTABLE_INTERP_LINEAR && !with_gradient) {
+                STATS(double lap = Stats_clock());
+
+                status = Grid_eval_linear(table, evaluation.located_index,
+                                          evaluation.located_weight,
+                                          evaluation.size, extrapmethod,
+                                          evaluation.result, value_stride,
+                                          result_type, nthreads);
+                STATS(Stats_lap(&call.blend_time, &lap));
+            }
+            else {
+                status = parallel_for(evaluate_grid_range, &evaluation,
+                                      result_array_size, nthreads);
+            }
         }
 
-        // END_TIMING;
         NPY_END_THREADS;
+
+        if (out != NULL &&
+            PyArray_ResolveWritebackIfCopy(result_array) < 0) {
+            goto out;
+        }
+
+        if (status == NDTABLE_INTERPSTATUS_NOMEMORY) {
+            PyErr_NoMemory();
+            goto out;
+        }
+        if(status != NDTABLE_INTERPSTATUS_OK) {
+            PyErr_Format(PyExc_ValueError,
+                "Error %zd occured in fancy_algorithm", status);
+            goto out;
+        }
     }
 
     /**************************************************
-    * Check interpolation and extrapolation method
+    * Build the returned value
     **************************************************/
 
-    if (PyArray_SIZE(result_array) == 1) {
-        // printf("%lf\n", result_data[0]);
-        ret = Py_BuildValue("f", (double) result_data[0]);
-        #if DEBUG == 1
-        printf("RET:\n");
-        PyObject_Print(ret, stdout, 0);
-        printf("\n");
-        #endif        
+    if (out != NULL) {
+        Py_INCREF(out);
+        ret = out;
     }
-    else{
-        ret = Py_BuildValue("O", (PyObject *) result_array);
+    else if (PyArray_SIZE(result_array) == 1 && !Mesh_IS_VECTOR(table)) {
+        ret = PyArray_GETITEM(result_array, PyArray_DATA(result_array));
+        if (gradient_array != NULL && ret != NULL) {
+            // the gradient of a single value is a vector, as the value is
+            PyArrayObject *vector = (PyArrayObject *) PyArray_Ravel(
+                gradient_array, NPY_CORDER);
+
+            Py_DECREF(gradient_array);
+            gradient_array = vector;
+            if (vector == NULL) {
+                Py_CLEAR(ret);
+            }
+        }
+    }
+    else {
+        Py_INCREF(result_array);
+        ret = (PyObject *) result_array;
+    }
+
+    if (gradient_array != NULL && ret != NULL) {
+        // the tuple steals both references
+        ret = Py_BuildValue("NN", ret, (PyObject *) gradient_array);
+        gradient_array = NULL;
     }
 
     out:
-        #if DEBUG == 1
-        printf("Clean output\n");
-        #endif
+        STATS(Stats_merge(NULL, &call));
+        if (ret != NULL && counters != NULL &&
+            Stats_Update(counters, &call) < 0) {
+            Py_CLEAR(ret);
+        }
+        free(grid_buffer);
+        free(evaluation.views);
+        for (j = 0; j < mytargets.ndim; j++) {
+            Py_XDECREF(mytargets.coords[j]);
+        }
+        Py_XDECREF(gradient_array);
+        if (result_array != NULL && out != NULL && ret == NULL) {
+            // left untouched, without writing the copy back
+            PyArray_DiscardWritebackIfCopy(result_array);
+        }
+        Py_XDECREF(result_array);
+        if (table == &xmesh) {
+            Mesh_Clear(&xmesh);
+        }
         return ret;
-    fail:
-        #if DEBUG == 1
-        printf("Failed\n");
-        #endif
-        return NULL;        
+}
+
+
+
+static PyObject
+*locate_points(PyObject *NPY_UNUSED(self), PyObject *args, PyObject *kwdict)
+{
+
+    /**************************************************
+
+    Parameters
+    ---------
+    table :   Table object
+              Compiled table whose breakpoints locate the points
+    targets : Sequence of array
+              Coordinates of the points, broadcast together
+    threads : int
+              Number of threads locating the points
+
+    Returns a Locator, handed to interpolation() in place of the
+    targets for any table on the same breakpoints.
+
+    **************************************************/
+
+    PyObject *table_object = NULL;
+    PyObject *targets = NULL;
+    Py_ssize_t nthreads = 1;
+    LocatorObject *locator = NULL;
+    NDTargets_t mytargets;
+    Evaluation_t evaluation;
+    int typenum = NPY_FLOAT;
+    Mesh_h table;
+    npy_intp j;
+
+    static char *kwlist[] = {"table", "targets", "threads", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwdict, "O!O|n:locate", kwlist,
+                                     &Table_Type, &table_object, &targets,
+                                     &nthreads) ||
+        !Table_Ready(table_object)) {
+        return NULL;
+    }
+    table = Table_MESH(table_object);
+
+    mytargets.ndim = PySequence_Size(targets);
+    if (mytargets.ndim < 0) {
+        return NULL;
+    }
+    if (mytargets.ndim != table->ndim) {
+        PyErr_Format(PyExc_ValueError,
+            "Targets shape and mesh coords have different shapes.");
+        return NULL;
+    }
+    for (j = 0; j < mytargets.ndim; j++) {
+        mytargets.coords[j] = NULL;
+    }
+
+    evaluation.table = table;
+    if (convert_targets(&evaluation, targets, 0, &mytargets, &typenum) < 0 ||
+        broadcast_targets(&evaluation, &mytargets) < 0) {
+        goto out;
+    }
+
+    locator = Locator_New(table, evaluation.nd, evaluation.shape, typenum);
+    if (locator == NULL) {
+        goto out;
+    }
+    for (j = 0; j < table->ndim; j++) {
+        evaluation.located_index[j] = (npy_intp *)
+            PyArray_DATA(locator->index) + j * locator->size;
+        evaluation.located_weight[j] = (npy_double *)
+            PyArray_DATA(locator->weight) + j * locator->size;
+    }
+    // counted with the global counters directly
+    evaluation.stats = NULL;
+
+    NPY_BEGIN_THREADS_DEF;
+    NPY_BEGIN_THREADS_THRESHOLDED(locator->size);
+    parallel_for(locate_range, &evaluation, locator->size, nthreads);
+    NPY_END_THREADS;
+
+    out:
+        for (j = 0; j < mytargets.ndim; j++) {
+            Py_XDECREF(mytargets.coords[j]);
+        }
+        return (PyObject *) locator;
+}
+
+
+
+static PyObject
+*stats(PyObject *NPY_UNUSED(self), PyObject *args, PyObject *kwdict)
+{
+
+    /**************************************************
+
+    Parameters
+    ---------
+    reset :   bool
+              Zero the counters once read
+
+    Returns a dict of the counters of the interpolations, all zero
+    unless the extension was built with LERP_STATS set. They add up the
+    calls of every thread; the ones of a single call are returned by
+    interpolation(..., stats=dict).
+
+    **************************************************/
+
+    int reset = 0;
+
+    static char *kwlist[] = {"reset", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwdict, "|p:stats", kwlist,
+                                     &reset)) {
+        return NULL;
+    }
+    return Stats_AsDict(reset);
 }
 
 
@@ -348,6 +1571,10 @@ static PyObject
 static PyMethodDef interpolation_methods[] = {
     {"interpolation", (PyCFunction) interpolation,
      METH_VARARGS | METH_KEYWORDS, "Interpolation."},
+    {"locate", (PyCFunction) locate_points,
+     METH_VARARGS | METH_KEYWORDS, "Locate points along the breakpoints."},
+    {"stats", (PyCFunction) stats,
+     METH_VARARGS | METH_KEYWORDS, "Instrumentation counters."},
     {"my_interp", (PyCFunction) my_interp,
      METH_VARARGS | METH_KEYWORDS, "my_interp."},         
     {NULL, NULL, 0, NULL}   /* sentinel */
@@ -366,7 +1593,20 @@ PyInit_interpolation(void)
 {
     PyObject *mod = NULL;
     import_array();
+
+    if (PyType_Ready(&Table_Type) < 0 || PyType_Ready(&Locator_Type) < 0) {
+        return NULL;
+    }
+
     mod = PyModule_Create(&interpolationmodule);
+    if (mod == NULL) {
+        return NULL;
+    }
+
+    Py_INCREF(&Table_Type);
+    PyModule_AddObject(mod, "Table", (PyObject *) &Table_Type);
+    Py_INCREF(&Locator_Type);
+    PyModule_AddObject(mod, "Locator", (PyObject *) &Locator_Type);
     return mod;
 }
 
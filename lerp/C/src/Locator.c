@@ -0,0 +1,234 @@
+/*
+Located targets type.
+
+A Locator is returned by locate() and handed to interpolation() in place
+of the targets. The search of the points along the breakpoints is then
+done once for all the tables built on the same breakpoints.
+*/
+
+#include <Python.h>
+#include <string.h>
+
+#define NO_IMPORT_ARRAY
+#define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+#include <numpy/arrayobject.h>
+
+#include "Locator.h"
+
+
+/* Locator of nd-dimensional points along the axes of table, with empty
+   index and weight arrays */
+LocatorObject *
+Locator_New(const Mesh_h table, npy_intp nd, const npy_intp *shape,
+            int typenum)
+{
+    LocatorObject *self;
+    npy_intp located_shape[NPY_MAXDIMS + 1];
+    npy_intp i, j;
+
+    self = PyObject_New(LocatorObject, &Locator_Type);
+    if (self == NULL) {
+        return NULL;
+    }
+    self->ndim = table->ndim;
+    self->nd = nd;
+    self->size = PyArray_MultiplyList((npy_intp *) shape, (int) nd);
+    self->typenum = typenum;
+    self->index = NULL;
+    self->weight = NULL;
+    for (j = 0; j < table->ndim; j++) {
+        Py_INCREF(table->axes[j]);
+        self->axes[j] = table->axes[j];
+    }
+
+    located_shape[0] = table->ndim;
+    for (i = 0; i < nd; i++) {
+        self->shape[i] = shape[i];
+        located_shape[i + 1] = shape[i];
+    }
+    self->index = (PyArrayObject *) PyArray_SimpleNew(
+        (int) nd + 1, located_shape, NPY_INTP);
+    self->weight = (PyArrayObject *) PyArray_SimpleNew(
+        (int) nd + 1, located_shape, NPY_DOUBLE);
+    if (self->index == NULL || self->weight == NULL) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    // filled through their buffers, and read-only from Python
+    PyArray_CLEARFLAGS(self->index, NPY_ARRAY_WRITEABLE);
+    PyArray_CLEARFLAGS(self->weight, NPY_ARRAY_WRITEABLE);
+    return self;
+}
+
+
+/* 1 if the points were located on the breakpoints of table. The axes are
+   compared by buffer first, then by value. */
+int
+Locator_Matches(const LocatorObject *locator, const Mesh_h table)
+{
+    npy_intp j;
+
+    if (locator->ndim != table->ndim) {
+        return 0;
+    }
+    for (j = 0; j < table->ndim; j++) {
+        const npy_double *bkpts = PyArray_DATA(locator->axes[j]);
+
+        if (PyArray_SIZE(locator->axes[j]) != table->shape[j]) {
+            return 0;
+        }
+        if (bkpts != table->coords[j] &&
+            memcmp(bkpts, table->coords[j],
+                   table->shape[j] * sizeof(npy_double)) != 0) {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+
+/* 1 if every subscript of the locator is the left one of a cell of
+   table, 0 with a ValueError set otherwise. The arrays can be made
+   writeable again from Python: they are checked before each evaluation. */
+int
+Locator_InBounds(const LocatorObject *locator, const Mesh_h table)
+{
+    const npy_intp *index = (const npy_intp *) PyArray_DATA(locator->index);
+    npy_intp i, j;
+
+    for (j = 0; j < locator->ndim; j++) {
+        const npy_intp last = table->shape[j] < 2 ? 0 : table->shape[j] - 2;
+        const npy_intp *subs = index + j * locator->size;
+
+        for (i = 0; i < locator->size; i++) {
+            if (subs[i] < 0 || subs[i] > last) {
+                PyErr_Format(PyExc_ValueError,
+                    "Locator index %zd out of bounds for axis %zd", subs[i],
+                    j);
+                return 0;
+            }
+        }
+    }
+    return 1;
+}
+
+
+static void
+Locator_dealloc(LocatorObject *self)
+{
+    npy_intp j;
+
+    for (j = 0; j < self->ndim; j++) {
+        Py_CLEAR(self->axes[j]);
+    }
+    Py_CLEAR(self->index);
+    Py_CLEAR(self->weight);
+    PyObject_Del(self);
+}
+
+
+static PyObject *
+Locator_get_ndim(LocatorObject *self, void *NPY_UNUSED(closure))
+{
+    return PyLong_FromSsize_t(self->ndim);
+}
+
+
+static PyObject *
+Locator_get_shape(LocatorObject *self, void *NPY_UNUSED(closure))
+{
+    PyObject *shape = PyTuple_New(self->nd);
+    npy_intp i;
+
+    if (shape == NULL) {
+        return NULL;
+    }
+    for (i = 0; i < self->nd; i++) {
+        PyTuple_SET_ITEM(shape, i, PyLong_FromSsize_t(self->shape[i]));
+    }
+    return shape;
+}
+
+
+static PyObject *
+Locator_get_axes(LocatorObject *self, void *NPY_UNUSED(closure))
+{
+    PyObject *axes = PyTuple_New(self->ndim);
+    npy_intp j;
+
+    if (axes == NULL) {
+        return NULL;
+    }
+    for (j = 0; j < self->ndim; j++) {
+        Py_INCREF(self->axes[j]);
+        PyTuple_SET_ITEM(axes, j, (PyObject *) self->axes[j]);
+    }
+    return axes;
+}
+
+
+static PyObject *
+Locator_get_index(LocatorObject *self, void *NPY_UNUSED(closure))
+{
+    Py_INCREF(self->index);
+    return (PyObject *) self->index;
+}
+
+
+static PyObject *
+Locator_get_weight(LocatorObject *self, void *NPY_UNUSED(closure))
+{
+    Py_INCREF(self->weight);
+    return (PyObject *) self->weight;
+}
+
+
+static PyGetSetDef Locator_getset[] = {
+    {"ndim", (getter) Locator_get_ndim, NULL, "Number of axes.", NULL},
+    {"shape", (getter) Locator_get_shape, NULL,
+     "Broadcast shape of the points.", NULL},
+    {"axes", (getter) Locator_get_axes, NULL,
+     "Breakpoints the points were located on.", NULL},
+    {"index", (getter) Locator_get_index, NULL,
+     "Left subscript of the cell of each point, per axis, read-only.",
+     NULL},
+    {"weight", (getter) Locator_get_weight, NULL,
+     "Position of each point in its cell, per axis, read-only.", NULL},
+    {NULL}  /* sentinel */
+};
+
+
+PyTypeObject Locator_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "lerp.core.interpolation.Locator",      /* tp_name */
+    sizeof(LocatorObject),                  /* tp_basicsize */
+    0,                                      /* tp_itemsize */
+    (destructor) Locator_dealloc,           /* tp_dealloc */
+    0,                                      /* tp_print */
+    0,                                      /* tp_getattr */
+    0,                                      /* tp_setattr */
+    0,                                      /* tp_reserved */
+    0,                                      /* tp_repr */
+    0,                                      /* tp_as_number */
+    0,                                      /* tp_as_sequence */
+    0,                                      /* tp_as_mapping */
+    0,                                      /* tp_hash  */
+    0,                                      /* tp_call */
+    0,                                      /* tp_str */
+    0,                                      /* tp_getattro */
+    0,                                      /* tp_setattro */
+    0,                                      /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                     /* tp_flags */
+    "Points located along the breakpoints of a Table, see locate().",
+                                            /* tp_doc */
+    0,                                      /* tp_traverse */
+    0,                                      /* tp_clear */
+    0,                                      /* tp_richcompare */
+    0,                                      /* tp_weaklistoffset */
+    0,                                      /* tp_iter */
+    0,                                      /* tp_iternext */
+    0,                                      /* tp_methods */
+    0,                                      /* tp_members */
+    Locator_getset,                         /* tp_getset */
+};
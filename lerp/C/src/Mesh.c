@@ -169,115 +169,265 @@ my_interp(PyObject *NPY_UNUSED(self), PyObject *args, PyObject *kwdict)
 }
 
 
-Mesh_h Mesh_FromXarray(PyObject *mesh){
-
-    // TODO : check that mesh is subclass of xarray
-    // PyObject_IsSubclass(mesh , (PyObject*))
-    /*    if (!PyArray_Check(data_array))
-            goto out;
-    */
-    Mesh_h output = (Mesh_h) malloc(sizeof(Mesh_t));
+int Mesh_FromXarray(Mesh_h output, PyObject *mesh) {
 
     /**************************************************
-    * Get paramters from mesh:
-    *   - data
-    *   - coords
-    *   - dims
+
+    Parameters
+    ---------
+    output :  Mesh_h
+              Mesh to fill, previous content is ignored
+    mesh :    xarray.DataArray
+              Its data, and the coordinate of each of its dims as
+              breakpoints
+
     **************************************************/
-    // Return value: New reference.
-    PyObject *data = PyObject_GetAttrString(mesh, "data");
-    PyObject *coords = PyObject_GetAttrString(mesh, "coords");
-    // PyObject *variable = PyObject_GetAttrString(mesh, "variable");
-    PyObject *coords_list = PyObject_GetAttrString(mesh, "dims");
-
-    // http://numerical.recipes/nr3_python_tutorial.html
-    // // Cast data to npy_double
-    // PyObject_Print(data, stdout, 0);
-
-    // printf("\n");
-    // printf("Refcount : %zi\n", data->ob_refcnt);
-    // PyObject *array = PyArray_ContiguousFromAny(
-    //                         data , NPY_DOUBLE, 1, 1);
-   
-    // printf("Refcount 1: %zi\n", data->ob_refcnt);
-    PyArrayObject* array = ARRAYD64(data);
-    output->array = ARRAYD64(data);
-    // printf("Refcount 2: %zi\n", data->ob_refcnt);
-
-    // printf("Refcount ARRAY 1 : %zi\n", PyArray_REFCOUNT(array));
-    // printf("Refcount : %zi\n", data->ob_refcnt);
-
-  
-    // coords
-
-    PyObject *key;
-
-    // Check that data array has the same dim number as coords
-    if (PySequence_Length(coords_list) != PyArray_NDIM(array)) {
-        PyErr_SetString(PyExc_ValueError, 
-            "Data and bkpts have different shapes");
-        // todo : exit
+
+    PyObject *data = NULL, *dims = NULL, *axes = NULL;
+    Py_ssize_t j, ndim;
+    int status = -1;
+
+    memset(output, 0, sizeof(Mesh_t));
+
+    data = PyObject_GetAttrString(mesh, "data");
+    dims = PyObject_GetAttrString(mesh, "dims");
+    if (data == NULL || dims == NULL) {
+        goto out;
+    }
+    ndim = PySequence_Size(dims);
+    if (ndim < 0) {
+        goto out;
+    }
+
+    axes = PyTuple_New(ndim);
+    if (axes == NULL) {
+        goto out;
+    }
+    for (j = 0; j < ndim; j++) {
+        PyObject *key = PySequence_GetItem(dims, j);
+        PyObject *axis;
+
+        if (key == NULL) {
+            goto out;
+        }
+        axis = PyObject_GetAttr(mesh, key);
+        Py_DECREF(key);
+        if (axis == NULL) {
+            goto out;
+        }
+        PyTuple_SET_ITEM(axes, j, axis);
     }
 
-    npy_intp *shape_x = PyArray_SHAPE(array);
-    output->ndim = PyArray_NDIM(array);
-  
-    for (Py_ssize_t j=0; j < output->ndim; j++) {
-        output->shape[j] = *shape_x++;
+    // the mesh owns its data and axes arrays, released by Mesh_Clear. It
+    // is released after the call, the data is used as is
+    status = Mesh_Init(output, data, axes, 0);
+
+    out:
+        Py_XDECREF(axes);
+        Py_XDECREF(dims);
+        Py_XDECREF(data);
+        return status;
+}
+
 
-        // printf("SHAPE %li\n", *--shape_x);
+int Mesh_Init(Mesh_h output, PyObject *data, PyObject *axes, int snapshot) {
 
-        /* TODO: check if is tuple */
-        // if (PyTuple_Check(coords_list)) {
-            /* PySequence_GetItem INCREFs key. */
-        key = PyTuple_GetItem(coords_list, j);
-        // }
+    /**************************************************
+
+    Parameters
+    ---------
+    output :  Mesh_h
+              Mesh to fill, previous content is ignored
+    data :    array_like
+              Values of the table
+    axes :    Sequence of array_like
+              Breakpoints, one 1D array per dimension of data
+    snapshot : int
+              Copy writeable data, and leave the array of the mesh
+              read-only
+
+    **************************************************/
+
+    PyArrayObject *array = NULL;
+    Py_ssize_t j, naxes;
 
-        #if DEBUG == 1
-        printf("Refcount key (1): %zi\n", key->ob_refcnt);
-        #endif
+    memset(output, 0, sizeof(Mesh_t));
+
+    output->typenum = Mesh_DataType(data);
+    // read-only buffers, such as memory maps, are used in place
+    array = (PyArrayObject*) PyArray_FROMANY(data, output->typenum, 0, 0,
+                                             NPY_ARRAY_IN_ARRAY);
+    if (array == NULL) {
+        return -1;
+    }
+    // writeable ones are copied, the caches derived from the data must
+    // not see it change
+    if (snapshot && PyArray_ISWRITEABLE(array) &&
+        ((PyObject *) array == data || PyArray_BASE(array) != NULL)) {
+        Py_SETREF(array, (PyArrayObject *) PyArray_NewCopy(array,
+                                                           NPY_CORDER));
+        if (array == NULL) {
+            return -1;
+        }
+    }
+    if (snapshot) {
+        PyArray_CLEARFLAGS(array, NPY_ARRAY_WRITEABLE);
+    }
+    output->array = array;
 
-        PyObject *axis = PyObject_GetAttrString(mesh,
-            (char *)PyUnicode_AS_DATA(key));
+    naxes = PySequence_Size(axes);
+    if (naxes < 0) {
+        goto fail;
+    }
 
-        #if DEBUG == 1
-        printf("Refcount key (2): %zi\n", key->ob_refcnt);
-        #endif
+    // Check that data array has the same dim number as coords, the data
+    // may have a trailing axis of variables
+    if (naxes != PyArray_NDIM(array) && naxes + 1 != PyArray_NDIM(array)) {
+        PyErr_SetString(PyExc_ValueError,
+            "Data and bkpts have different shapes");
+        goto fail;
+    }
 
-        PyArrayObject *coords_tmp =  (PyArrayObject*) PyArray_ContiguousFromAny(
-            axis, NPY_DOUBLE, 0, 0);
-        output->coords[j] = PyArray_DATA(coords_tmp);
+    output->ndim = naxes;
+    output->nvars = naxes < PyArray_NDIM(array) ?
+                    PyArray_DIM(array, naxes) : 1;
 
+    for (j = 0; j < output->ndim; j++) {
+        PyObject *axis = PySequence_GetItem(axes, j);
+        if (axis == NULL) {
+            goto fail;
+        }
+        output->axes[j] = (PyArrayObject*) PyArray_FROMANY(
+            axis, NPY_DOUBLE, 1, 1, NPY_ARRAY_IN_ARRAY);
         Py_DECREF(axis);
-        #if DEBUG == 1
-        printf("Refcount key (3): %zi\n", key->ob_refcnt);
-        #endif        
-        // Py_DECREF(key);
+        if (output->axes[j] == NULL) {
+            goto fail;
+        }
 
+        output->shape[j] = PyArray_DIM(array, j);
+        output->strides[j] = PyArray_STRIDE(array, j);
+        if (PyArray_SIZE(output->axes[j]) != output->shape[j]) {
+            PyErr_Format(PyExc_ValueError,
+                "Axis %zd has %zd breakpoints, data has %zd along this dimension",
+                j, PyArray_SIZE(output->axes[j]), output->shape[j]);
+            goto fail;
+        }
+        output->coords[j] = PyArray_DATA(output->axes[j]);
     }
-    output->data = PyArray_DATA(array);
-    // printf("Refcount 2: %zi\n", data->ob_refcnt);
 
+    output->data = PyArray_DATA(array);
     output->size = PyArray_SIZE(array);
     output->itemsize = PyArray_ITEMSIZE(array);
-    // output->interpmethod = &myfunction; // *interp_linear;
-    // output->interpmethod = interpmethod; // *interp_linear;
-    // output->extrapmethod = extrapmethod; // *interp_linear;
 
+    Mesh_DetectUniform(output);
+
+    return 0;
+
+    fail:
+        Mesh_Clear(output);
+        return -1;
+}
+
+
+int Mesh_DataType(PyObject *data) {
+
+    if (PyArray_Check(data) &&
+        PyArray_TYPE((PyArrayObject *) data) == NPY_FLOAT) {
+        return NPY_FLOAT;
+    }
+    return NPY_DOUBLE;
+}
+
+
+/* Relative tolerance on the spacing of uniform axes */
+#define UNIFORM_RTOL 1e-9
+
+void Mesh_DetectUniform(Mesh_h mesh) {
+
+    npy_intp i, j;
+
+    for (j = 0; j < mesh->ndim; j++) {
+        const npy_double *bkpts = mesh->coords[j];
+        const npy_intp len = mesh->shape[j];
+        npy_double step;
+
+        mesh->uniform[j] = 0;
+        mesh->origin[j] = 0.;
+        mesh->inv_step[j] = 0.;
+
+        if (len < 2) {
+            continue;
+        }
+
+        step = (bkpts[len - 1] - bkpts[0]) / (len - 1);
+        if (!(step > 0) || !npy_isfinite(step)) {
+            continue;
+        }
+
+        for (i = 1; i < len; i++) {
+            if (fabs(bkpts[i] - (bkpts[0] + i * step)) > UNIFORM_RTOL * step) {
+                break;
+            }
+        }
+
+        if (i == len) {
+            mesh->uniform[j] = 1;
+            mesh->origin[j] = bkpts[0];
+            mesh->inv_step[j] = 1. / step;
+        }
+    }
+}
+
+#undef UNIFORM_RTOL
+
+
+Mesh_h Mesh_Variables(const Mesh_h mesh) {
 
-    Py_DECREF(coords_list);    
-    Py_DECREF(coords);    
-    Py_DECREF(array);    
-    // printf("Refcount ARRAY 2 : %zi\n", PyArray_REFCOUNT(array));
-    // PyObject_Print(data, stdout, 0);
-    Py_DECREF(data);
-    Py_DECREF(data);
+    const npy_intp nderiv = ((npy_intp) 1) << mesh->ndim;
+    Mesh_h views = (Mesh_h) malloc(mesh->nvars * sizeof(Mesh_t));
+    npy_intp j, k;
+
+    if (views == NULL) {
+        return NULL;
+    }
+    for (k = 0; k < mesh->nvars; k++) {
+        Mesh_h view = &views[k];
+
+        memcpy(view, mesh, sizeof(Mesh_t));
+        view->data = (char *) mesh->data + k * mesh->itemsize;
+        view->nvars = 1;
+        view->array = NULL;
+        view->slopes = NULL;
+        for (j = 0; j < NPY_MAXDIMS; j++) {
+            view->axes[j] = NULL;
+        }
+        // the coefficients of the variables are interleaved likewise
+        for (j = 0; j < MESH_NCUBIC; j++) {
+            if (mesh->hermite[j] != NULL) {
+                view->hermite[j] = mesh->hermite[j] + k * nderiv;
+            }
+            view->hermite_arrays[j] = NULL;
+        }
+    }
+    return views;
+}
 
-    /* Remianing references:
-        data
 
+void Mesh_Clear(Mesh_h mesh) {
 
-    */ 
+    npy_intp j;
 
-    return output;
+    for (j = 0; j < NPY_MAXDIMS; j++) {
+        Py_CLEAR(mesh->axes[j]);
+        mesh->coords[j] = NULL;
+    }
+    for (j = 0; j < MESH_NCUBIC; j++) {
+        Py_CLEAR(mesh->hermite_arrays[j]);
+        mesh->hermite[j] = NULL;
+    }
+    free(mesh->slopes);
+    mesh->slopes = NULL;
+    Py_CLEAR(mesh->array);
+    mesh->data = NULL;
+    mesh->ndim = 0;
 }
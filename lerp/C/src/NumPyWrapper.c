@@ -114,6 +114,87 @@ binary_search_with_guess(const npy_double key, const npy_double *arr,
 #undef LIKELY_IN_CACHE_SIZE
 
 
+npy_intp
+linear_search_forward(const npy_double key, const npy_double *arr,
+                      npy_intp len, npy_intp guess)
+{
+    npy_intp i = guess;
+
+    if (key > arr[len - 1]) {
+        return len;
+    }
+    if (i < 0) {
+        if (key < arr[0]) {
+            return -1;
+        }
+        i = 0;
+    }
+    while (i < len - 1 && key >= arr[i + 1]) {
+        i++;
+    }
+    return i;
+}
+
+
+npy_intp
+uniform_search(const npy_double key, const npy_double *arr, npy_intp len,
+               npy_double origin, npy_double inv_step)
+{
+    npy_intp i;
+
+    if (key > arr[len - 1]) {
+        return len;
+    }
+    /* also handles NaN */
+    if (!(key >= arr[0])) {
+        return -1;
+    }
+
+    i = (npy_intp) ((key - origin) * inv_step);
+    if (i > len - 1) {
+        i = len - 1;
+    }
+
+    /* rounding may put the key one cell away */
+    while (i > 0 && key < arr[i]) {
+        i--;
+    }
+    while (i < len - 1 && key >= arr[i + 1]) {
+        i++;
+    }
+    return i;
+}
+
+
+int
+is_sorted(const npy_double *arr, npy_intp len)
+{
+    npy_intp i;
+
+    for (i = 1; i < len; i++) {
+        /* also false if any of the values is NaN */
+        if (!(arr[i - 1] <= arr[i])) {
+            return 0;
+        }
+    }
+    return len < 1 || arr[0] == arr[0];
+}
+
+
+int
+is_sorted_float(const npy_float *arr, npy_intp len)
+{
+    npy_intp i;
+
+    for (i = 1; i < len; i++) {
+        if (!(arr[i - 1] <= arr[i])) {
+            return 0;
+        }
+    }
+    return len < 1 || arr[0] == arr[0];
+}
+
+
 PyArrayObject* get_it(PyObject *array) {
 
     PyArrayObject *afp = NULL;
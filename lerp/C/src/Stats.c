@@ -0,0 +1,193 @@
+/*
+Instrumentation counters of the interpolation.
+*/
+
+#include <Python.h>
+#include <string.h>
+#define NO_IMPORT_ARRAY
+#define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+#include <numpy/arrayobject.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <pthread.h>
+#include <time.h>
+#endif
+
+#include "Stats.h"
+
+
+static Stats_t global;
+
+#ifdef _WIN32
+static SRWLOCK lock = SRWLOCK_INIT;
+#define LOCK() AcquireSRWLockExclusive(&lock)
+#define UNLOCK() ReleaseSRWLockExclusive(&lock)
+#else
+static pthread_mutex_t lock = PTHREAD_MUTEX_INITIALIZER;
+#define LOCK() pthread_mutex_lock(&lock)
+#define UNLOCK() pthread_mutex_unlock(&lock)
+#endif
+
+
+void
+Stats_init(Stats_t *stats)
+{
+    memset(stats, 0, sizeof(Stats_t));
+}
+
+
+void
+Stats_merge(Stats_t *total, const Stats_t *stats)
+{
+    npy_intp j;
+
+    if (total == NULL) {
+        total = &global;
+    }
+    LOCK();
+    total->calls += stats->calls;
+    total->points += stats->points;
+    for (j = 0; j < NPY_MAXDIMS; j++) {
+        total->extrap_low[j] += stats->extrap_low[j];
+        total->extrap_high[j] += stats->extrap_high[j];
+    }
+    total->nan += stats->nan;
+    total->uniform += stats->uniform;
+    total->walks += stats->walks;
+    total->guess_hits += stats->guess_hits;
+    total->bisections += stats->bisections;
+    total->build_time += stats->build_time;
+    total->search_time += stats->search_time;
+    total->blend_time += stats->blend_time;
+    UNLOCK();
+}
+
+
+double
+Stats_clock(void)
+{
+#ifdef _WIN32
+    LARGE_INTEGER count, frequency;
+
+    QueryPerformanceCounter(&count);
+    QueryPerformanceFrequency(&frequency);
+    return (double) count.QuadPart / (double) frequency.QuadPart;
+#else
+    struct timespec now;
+
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return now.tv_sec + 1e-9 * now.tv_nsec;
+#endif
+}
+
+
+void
+Stats_lap(double *total, double *last)
+{
+    const double now = Stats_clock();
+
+    *total += now - *last;
+    *last = now;
+}
+
+
+void
+Stats_build(double seconds)
+{
+    LOCK();
+    global.build_time += seconds;
+    UNLOCK();
+}
+
+
+/* Tuple of the per axis counters, up to the last axis counted */
+static PyObject *
+axes_tuple(const npy_intp *counts)
+{
+    PyObject *tuple;
+    npy_intp j, n = NPY_MAXDIMS;
+
+    while (n > 0 && counts[n - 1] == 0) {
+        n--;
+    }
+    tuple = PyTuple_New(n);
+    if (tuple == NULL) {
+        return NULL;
+    }
+    for (j = 0; j < n; j++) {
+        PyTuple_SET_ITEM(tuple, j, PyLong_FromSsize_t(counts[j]));
+    }
+    return tuple;
+}
+
+
+static PyObject *
+as_dict(const Stats_t *stats)
+{
+    PyObject *low, *high, *dict;
+
+    low = axes_tuple(stats->extrap_low);
+    high = axes_tuple(stats->extrap_high);
+    if (low == NULL || high == NULL) {
+        Py_XDECREF(low);
+        Py_XDECREF(high);
+        return NULL;
+    }
+
+#ifdef LERP_STATS
+#define ENABLED Py_True
+#else
+#define ENABLED Py_False
+#endif
+    dict = Py_BuildValue(
+        "{s:O,s:n,s:n,s:N,s:N,s:n,s:n,s:n,s:n,s:n,s:d,s:d,s:d}",
+        "enabled", ENABLED,
+        "calls", stats->calls,
+        "points", stats->points,
+        "extrapolated_low", low,
+        "extrapolated_high", high,
+        "nan", stats->nan,
+        "uniform_lookups", stats->uniform,
+        "walks", stats->walks,
+        "guess_hits", stats->guess_hits,
+        "bisections", stats->bisections,
+        "build_time", stats->build_time,
+        "search_time", stats->search_time,
+        "blend_time", stats->blend_time);
+#undef ENABLED
+    return dict;
+}
+
+
+PyObject *
+Stats_AsDict(int reset)
+{
+    Stats_t stats;
+
+    LOCK();
+    stats = global;
+    if (reset) {
+        Stats_init(&global);
+    }
+    UNLOCK();
+
+    return as_dict(&stats);
+}
+
+
+int
+Stats_Update(PyObject *dict, const Stats_t *stats)
+{
+    PyObject *counters = as_dict(stats);
+    int status;
+
+    if (counters == NULL) {
+        return -1;
+    }
+    status = PyDict_Update(dict, counters);
+    Py_DECREF(counters);
+    return status;
+}
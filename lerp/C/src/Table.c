@@ -0,0 +1,564 @@
+/*
+Compiled table type.
+
+A Table is built once from the data and the breakpoints of a Mesh and can
+then be handed to interpolation() in place of the Mesh itself, saving the
+attribute lookups and array conversions of Mesh_FromXarray on every call.
+
+A Table is also callable on a single point given as numbers, the fast path
+of scalar lookups: the methods are stored on the table and the arguments
+are read as raw doubles, without building any array.
+*/
+
+#include <Python.h>
+#include <structmember.h>
+
+#define NO_IMPORT_ARRAY
+#define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+#include <numpy/arrayobject.h>
+
+#include "Table.h"
+#include "Hermite.h"
+#include "Stats.h"
+
+/* Method names, indexed by enum value */
+static const char *interp_names[] = {
+    NULL, "hold", "nearest", "linear", "akima", "fritsch_butland", "steffen"
+};
+static const char *extrap_names[] = {NULL, "hold", "linear", "none"};
+
+
+int
+Table_Ready(PyObject *op)
+{
+    if (Table_MESH(op)->array == NULL) {
+        PyErr_SetString(PyExc_ValueError, "Table is not initialized");
+        return 0;
+    }
+    return 1;
+}
+
+
+#ifdef TABLE_VECTORCALL
+static PyObject *
+Table_vectorcall(TableObject *self, PyObject *const *args, size_t nargsf,
+                 PyObject *kwnames)
+{
+    if (kwnames != NULL && PyTuple_GET_SIZE(kwnames) != 0) {
+        PyErr_SetString(PyExc_TypeError,
+            "Table takes no keyword arguments");
+        return NULL;
+    }
+    if (!Table_Ready((PyObject *) self)) {
+        return NULL;
+    }
+    return Table_evaluate(self, args, PyVectorcall_NARGS(nargsf));
+}
+#else
+static PyObject *
+Table_call(TableObject *self, PyObject *args, PyObject *kwargs)
+{
+    if (kwargs != NULL && PyDict_GET_SIZE(kwargs) != 0) {
+        PyErr_SetString(PyExc_TypeError,
+            "Table takes no keyword arguments");
+        return NULL;
+    }
+    if (!Table_Ready((PyObject *) self)) {
+        return NULL;
+    }
+    return Table_evaluate(self, &PyTuple_GET_ITEM(args, 0),
+                          PyTuple_GET_SIZE(args));
+}
+#endif
+
+
+/* Uninitialized table, evaluated once Table_init has filled its mesh */
+static PyObject *
+Table_new(PyTypeObject *type, PyObject *NPY_UNUSED(args),
+          PyObject *NPY_UNUSED(kwdict))
+{
+    TableObject *self = (TableObject *) type->tp_alloc(type, 0);
+
+    if (self == NULL) {
+        return NULL;
+    }
+#ifdef TABLE_VECTORCALL
+    self->vectorcall = (vectorcallfunc) Table_vectorcall;
+#endif
+    return (PyObject *) self;
+}
+
+
+static int
+Table_init(TableObject *self, PyObject *args, PyObject *kwdict)
+{
+
+    /**************************************************
+
+    Parameters
+    ---------
+    data :    array_like
+              Values of the table, with an optional trailing axis of
+              variables interpolated together. Writeable arrays are
+              copied, read-only ones are used in place
+    axes :    Sequence of 1D array_like
+              Breakpoints of each dimension
+    dims :    Sequence of str, optional
+              Names of the dimensions
+    interp :  str
+              Interpolation method of the calls of the table
+    extrap :  str
+              Extrapolation method of the calls of the table
+
+    **************************************************/
+
+    PyObject *data = NULL, *axes = NULL, *dims = Py_None;
+    char *interp = "linear", *extrap = "hold";
+    npy_intp j;
+
+    static char *kwlist[] = {"data", "axes", "dims", "interp", "extrap",
+                             NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwdict, "OO|Oss:Table", kwlist,
+                                     &data, &axes, &dims, &interp, &extrap)) {
+        return -1;
+    }
+    // the buffers of a table may be read by calls running without the GIL
+    if (self->mesh.array != NULL) {
+        PyErr_SetString(PyExc_ValueError, "Table is already initialized");
+        return -1;
+    }
+    self->interp = get_interp_method(interp);
+    self->extrap = get_extrap_method(extrap);
+    for (j = 0; j < NPY_MAXDIMS; j++) {
+        self->hint[j] = 0;
+    }
+    STATS(double build = Stats_clock());
+    if (Mesh_Init(&self->mesh, data, axes, 1) < 0) {
+        return -1;
+    }
+    STATS(Stats_build(Stats_clock() - build));
+
+    if (dims == Py_None) {
+        self->dims = PyTuple_New(0);
+    }
+    else {
+        self->dims = PySequence_Tuple(dims);
+    }
+    if (self->dims == NULL) {
+        goto fail;
+    }
+    if (PyTuple_GET_SIZE(self->dims) != 0 &&
+        PyTuple_GET_SIZE(self->dims) != self->mesh.ndim) {
+        PyErr_SetString(PyExc_ValueError,
+            "Number of dims does not match the number of axes");
+        goto fail;
+    }
+
+    return 0;
+
+    fail:
+        // left uninitialized
+        Mesh_Clear(&self->mesh);
+        Py_CLEAR(self->dims);
+        return -1;
+}
+
+
+static void
+Table_dealloc(TableObject *self)
+{
+    Mesh_Clear(&self->mesh);
+    Py_CLEAR(self->dims);
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+
+static PyObject *
+Table_get_ndim(TableObject *self, void *NPY_UNUSED(closure))
+{
+    return PyLong_FromSsize_t(self->mesh.ndim);
+}
+
+
+static PyObject *
+Table_get_shape(TableObject *self, void *NPY_UNUSED(closure))
+{
+    PyObject *shape = PyTuple_New(self->mesh.ndim);
+    npy_intp j;
+
+    if (shape == NULL) {
+        return NULL;
+    }
+    for (j = 0; j < self->mesh.ndim; j++) {
+        PyTuple_SET_ITEM(shape, j, PyLong_FromSsize_t(self->mesh.shape[j]));
+    }
+    return shape;
+}
+
+
+static PyObject *
+Table_get_nvars(TableObject *self, void *NPY_UNUSED(closure))
+{
+    return PyLong_FromSsize_t(self->mesh.nvars);
+}
+
+
+static PyObject *
+Table_get_data(TableObject *self, void *NPY_UNUSED(closure))
+{
+    if (self->mesh.array == NULL) {
+        Py_RETURN_NONE;
+    }
+    Py_INCREF(self->mesh.array);
+    return (PyObject *) self->mesh.array;
+}
+
+
+static PyObject *
+Table_get_axes(TableObject *self, void *NPY_UNUSED(closure))
+{
+    PyObject *axes = PyTuple_New(self->mesh.ndim);
+    npy_intp j;
+
+    if (axes == NULL) {
+        return NULL;
+    }
+    for (j = 0; j < self->mesh.ndim; j++) {
+        Py_INCREF(self->mesh.axes[j]);
+        PyTuple_SET_ITEM(axes, j, (PyObject *) self->mesh.axes[j]);
+    }
+    return axes;
+}
+
+
+static PyObject *
+Table_get_dims(TableObject *self, void *NPY_UNUSED(closure))
+{
+    if (self->dims == NULL) {
+        Py_RETURN_NONE;
+    }
+    Py_INCREF(self->dims);
+    return self->dims;
+}
+
+
+static PyObject *
+Table_get_uniform(TableObject *self, void *NPY_UNUSED(closure))
+{
+    PyObject *uniform = PyTuple_New(self->mesh.ndim);
+    npy_intp j;
+
+    if (uniform == NULL) {
+        return NULL;
+    }
+    for (j = 0; j < self->mesh.ndim; j++) {
+        PyTuple_SET_ITEM(uniform, j, PyBool_FromLong(self->mesh.uniform[j]));
+    }
+    return uniform;
+}
+
+
+static PyObject *
+Table_get_interp(TableObject *self, void *NPY_UNUSED(closure))
+{
+    return PyUnicode_FromString(interp_names[self->interp]);
+}
+
+
+static int
+Table_set_interp(TableObject *self, PyObject *value,
+                 void *NPY_UNUSED(closure))
+{
+    const char *method;
+
+    if (value == NULL) {
+        PyErr_SetString(PyExc_AttributeError, "cannot delete interp");
+        return -1;
+    }
+    method = PyUnicode_AsUTF8(value);
+    if (method == NULL) {
+        return -1;
+    }
+    self->interp = get_interp_method((char *) method);
+    return 0;
+}
+
+
+static PyObject *
+Table_get_extrap(TableObject *self, void *NPY_UNUSED(closure))
+{
+    return PyUnicode_FromString(extrap_names[self->extrap]);
+}
+
+
+static int
+Table_set_extrap(TableObject *self, PyObject *value,
+                 void *NPY_UNUSED(closure))
+{
+    const char *method;
+
+    if (value == NULL) {
+        PyErr_SetString(PyExc_AttributeError, "cannot delete extrap");
+        return -1;
+    }
+    method = PyUnicode_AsUTF8(value);
+    if (method == NULL) {
+        return -1;
+    }
+    self->extrap = get_extrap_method((char *) method);
+    return 0;
+}
+
+
+/* Slot of the coefficients of a cubic method, -1 with an exception set if
+   the method has none */
+static npy_intp
+coefficients_slot(const char *method)
+{
+    const NDTable_InterpMethod_t interp = get_interp_method((char *) method);
+
+    if (!HERMITE_IS_CUBIC(interp)) {
+        PyErr_Format(PyExc_ValueError,
+            "%s interpolation has no coefficients", method);
+        return -1;
+    }
+    return interp - NDTABLE_INTERP_AKIMA;
+}
+
+
+static PyObject *
+Table_coefficients(TableObject *self, PyObject *args)
+{
+
+    /**************************************************
+
+    Parameters
+    ---------
+    interp :  str
+              Cubic interpolation method
+
+    Returns the read-only float64 array of the cached Hermite
+    coefficients of the method, computed if needed, with shape
+    data.shape + (2**ndim,).
+
+    **************************************************/
+
+    const char *method;
+    npy_intp slot;
+
+    if (!PyArg_ParseTuple(args, "s:coefficients", &method) ||
+        !Table_Ready((PyObject *) self)) {
+        return NULL;
+    }
+    slot = coefficients_slot(method);
+    if (slot < 0) {
+        return NULL;
+    }
+    if (Hermite_prepare(&self->mesh, (NDTable_InterpMethod_t)
+                        (slot + NDTABLE_INTERP_AKIMA)) !=
+        NDTABLE_INTERPSTATUS_OK) {
+        return PyErr_NoMemory();
+    }
+    Py_INCREF(self->mesh.hermite_arrays[slot]);
+    return (PyObject *) self->mesh.hermite_arrays[slot];
+}
+
+
+static PyObject *
+Table_set_coefficients(TableObject *self, PyObject *args)
+{
+
+    /**************************************************
+
+    Parameters
+    ---------
+    interp :  str
+              Cubic interpolation method
+    coefficients : array_like
+              Coefficients returned by coefficients(interp) on the same
+              data and axes
+
+    The coefficients are used in place when a read-only float64
+    aligned C contiguous array, memory mapped ones included, and copied
+    otherwise. The coefficients of a method can be set once, before
+    they are computed: calls running without the GIL may be reading
+    them.
+
+    **************************************************/
+
+    const char *method;
+    PyObject *coefficients;
+    PyArrayObject *array;
+    npy_intp slot, i;
+    int nd;
+
+    if (!PyArg_ParseTuple(args, "sO:set_coefficients", &method,
+                          &coefficients) ||
+        !Table_Ready((PyObject *) self)) {
+        return NULL;
+    }
+    nd = PyArray_NDIM(self->mesh.array);
+    slot = coefficients_slot(method);
+    if (slot < 0) {
+        return NULL;
+    }
+    if (self->mesh.hermite[slot] != NULL) {
+        PyErr_Format(PyExc_ValueError,
+            "%s coefficients are already set", method);
+        return NULL;
+    }
+    array = (PyArrayObject *) PyArray_FROMANY(coefficients, NPY_DOUBLE,
+                                              0, 0, NPY_ARRAY_IN_ARRAY);
+    if (array == NULL) {
+        return NULL;
+    }
+    // a snapshot, as the data
+    if (PyArray_ISWRITEABLE(array) &&
+        ((PyObject *) array == coefficients || PyArray_BASE(array) != NULL)) {
+        Py_SETREF(array, (PyArrayObject *) PyArray_NewCopy(array,
+                                                           NPY_CORDER));
+        if (array == NULL) {
+            return NULL;
+        }
+    }
+    PyArray_CLEARFLAGS(array, NPY_ARRAY_WRITEABLE);
+    if (PyArray_NDIM(array) != nd + 1 ||
+        PyArray_DIM(array, nd) != ((npy_intp) 1) << self->mesh.ndim) {
+        goto wrong_shape;
+    }
+    for (i = 0; i < nd; i++) {
+        if (PyArray_DIM(array, i) != PyArray_DIM(self->mesh.array, i)) {
+            goto wrong_shape;
+        }
+    }
+
+    self->mesh.hermite_arrays[slot] = array;
+    self->mesh.hermite[slot] = PyArray_DATA(array);
+    Py_RETURN_NONE;
+
+    wrong_shape:
+        PyErr_SetString(PyExc_ValueError,
+            "Coefficients do not match the shape of the table");
+        Py_DECREF(array);
+        return NULL;
+}
+
+
+/* Rebuilt from its data, axes, dims and methods, the cached coefficients
+   being computed again */
+static PyObject *
+Table_reduce(TableObject *self, PyObject *NPY_UNUSED(args))
+{
+    PyObject *axes;
+
+    if (!Table_Ready((PyObject *) self)) {
+        return NULL;
+    }
+    axes = Table_get_axes(self, NULL);
+    if (axes == NULL) {
+        return NULL;
+    }
+    return Py_BuildValue("O(ONOss)", (PyObject *) Py_TYPE(self),
+                         (PyObject *) self->mesh.array, axes, self->dims,
+                         interp_names[self->interp],
+                         extrap_names[self->extrap]);
+}
+
+
+static PyMethodDef Table_methods[] = {
+    {"coefficients", (PyCFunction) Table_coefficients, METH_VARARGS,
+     "Cached coefficients of a cubic interpolation method."},
+    {"set_coefficients", (PyCFunction) Table_set_coefficients, METH_VARARGS,
+     "Set the coefficients of a cubic interpolation method, once, before "
+     "they are computed."},
+    {"__reduce__", (PyCFunction) Table_reduce, METH_NOARGS,
+     "Pickling support."},
+    {NULL}  /* sentinel */
+};
+
+
+static PyGetSetDef Table_getset[] = {
+    {"ndim", (getter) Table_get_ndim, NULL, "Number of dimensions.", NULL},
+    {"shape", (getter) Table_get_shape, NULL,
+     "Shape of the data along the axes.", NULL},
+    {"nvars", (getter) Table_get_nvars, NULL,
+     "Number of variables on the trailing axis of the data, 1 if none.",
+     NULL},
+    {"data", (getter) Table_get_data, NULL, "Contiguous data array.", NULL},
+    {"axes", (getter) Table_get_axes, NULL, "Contiguous breakpoints.", NULL},
+    {"dims", (getter) Table_get_dims, NULL, "Dimension names.", NULL},
+    {"uniform", (getter) Table_get_uniform, NULL,
+     "Per axis flag, True if the breakpoints are equally spaced and looked "
+     "up without search.", NULL},
+    {"interp", (getter) Table_get_interp, (setter) Table_set_interp,
+     "Interpolation method of the calls of the table.", NULL},
+    {"extrap", (getter) Table_get_extrap, (setter) Table_set_extrap,
+     "Extrapolation method of the calls of the table.", NULL},
+    {NULL}  /* sentinel */
+};
+
+
+PyTypeObject Table_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "lerp.core.interpolation.Table",        /* tp_name */
+    sizeof(TableObject),                    /* tp_basicsize */
+    0,                                      /* tp_itemsize */
+    (destructor) Table_dealloc,             /* tp_dealloc */
+#ifdef TABLE_VECTORCALL
+    offsetof(TableObject, vectorcall),      /* tp_vectorcall_offset */
+#else
+    0,                                      /* tp_print */
+#endif
+    0,                                      /* tp_getattr */
+    0,                                      /* tp_setattr */
+    0,                                      /* tp_reserved */
+    0,                                      /* tp_repr */
+    0,                                      /* tp_as_number */
+    0,                                      /* tp_as_sequence */
+    0,                                      /* tp_as_mapping */
+    0,                                      /* tp_hash  */
+#ifdef TABLE_VECTORCALL
+    PyVectorcall_Call,                      /* tp_call */
+#else
+    (ternaryfunc) Table_call,               /* tp_call */
+#endif
+    0,                                      /* tp_str */
+    0,                                      /* tp_getattro */
+    0,                                      /* tp_setattro */
+    0,                                      /* tp_as_buffer */
+#ifdef TABLE_VECTORCALL
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE |
+    Py_TPFLAGS_HAVE_VECTORCALL,             /* tp_flags */
+#else
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE, /* tp_flags */
+#endif
+    "Table(data, axes, dims=None, interp='linear', extrap='hold')\n\n"
+    "Compiled lookup table owning contiguous data and breakpoints.\n"
+    "data may have one more dimension than there are axes, holding "
+    "variables interpolated together.\n"
+    "Writeable data is copied, the table holds a read-only snapshot of it; "
+    "read-only data, such as a memory map, is used in place and must not "
+    "change.\n\n"
+    "table(x, y, ...) evaluates a single point given as numbers with the "
+    "interp and extrap methods of the table.",
+                                            /* tp_doc */
+    0,                                      /* tp_traverse */
+    0,                                      /* tp_clear */
+    0,                                      /* tp_richcompare */
+    0,                                      /* tp_weaklistoffset */
+    0,                                      /* tp_iter */
+    0,                                      /* tp_iternext */
+    Table_methods,                          /* tp_methods */
+    0,                                      /* tp_members */
+    Table_getset,                           /* tp_getset */
+    0,                                      /* tp_base */
+    0,                                      /* tp_dict */
+    0,                                      /* tp_descr_get */
+    0,                                      /* tp_descr_set */
+    0,                                      /* tp_dictoffset */
+    (initproc) Table_init,                  /* tp_init */
+    0,                                      /* tp_alloc */
+    Table_new,                              /* tp_new */
+};
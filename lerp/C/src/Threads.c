@@ -0,0 +1,116 @@
+/*
+Native worker threads for the evaluation of large batches.
+*/
+
+#include <Python.h>
+#define NO_IMPORT_ARRAY
+#define PY_ARRAY_UNIQUE_SYMBOL UTILS_ARRAY_API
+#define NPY_NO_DEPRECATED_API NPY_1_13_API_VERSION
+#include <numpy/arrayobject.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <pthread.h>
+#endif
+
+#include "Threads.h"
+
+
+typedef struct {
+    range_fun func;
+    void      *context;
+    npy_intp  start;
+    npy_intp  stop;
+    npy_intp  status;
+} Chunk_t;
+
+
+#ifdef _WIN32
+static DWORD WINAPI
+run_chunk(LPVOID arg)
+#else
+static void *
+run_chunk(void *arg)
+#endif
+{
+    Chunk_t *chunk = (Chunk_t *) arg;
+    chunk->status = chunk->func(chunk->context, chunk->start, chunk->stop);
+    return 0;
+}
+
+
+npy_intp
+parallel_for(range_fun func, void *context, npy_intp size, npy_intp nthreads)
+{
+    Chunk_t *chunks;
+    npy_intp i, step, status = 0;
+#ifdef _WIN32
+    HANDLE *handles;
+#else
+    pthread_t *handles;
+#endif
+    char *started;
+
+    if (nthreads > size / THREADS_MIN_CHUNK) {
+        nthreads = size / THREADS_MIN_CHUNK;
+    }
+    if (nthreads <= 1) {
+        return func(context, 0, size);
+    }
+
+    chunks = (Chunk_t *) malloc(nthreads * sizeof(Chunk_t));
+    handles = malloc(nthreads * sizeof(*handles));
+    started = (char *) calloc(nthreads, 1);
+    if (chunks == NULL || handles == NULL || started == NULL) {
+        free(chunks);
+        free(handles);
+        free(started);
+        return func(context, 0, size);
+    }
+
+    step = size / nthreads;
+    for (i = 0; i < nthreads; i++) {
+        chunks[i].func = func;
+        chunks[i].context = context;
+        chunks[i].start = i * step;
+        chunks[i].stop = (i == nthreads - 1) ? size : (i + 1) * step;
+        chunks[i].status = 0;
+    }
+
+    for (i = 1; i < nthreads; i++) {
+#ifdef _WIN32
+        handles[i] = CreateThread(NULL, 0, run_chunk, &chunks[i], 0, NULL);
+        started[i] = handles[i] != NULL;
+#else
+        started[i] = pthread_create(&handles[i], NULL, run_chunk,
+                                    &chunks[i]) == 0;
+#endif
+    }
+
+    run_chunk(&chunks[0]);
+
+    for (i = 1; i < nthreads; i++) {
+        if (started[i]) {
+#ifdef _WIN32
+            WaitForSingleObject(handles[i], INFINITE);
+            CloseHandle(handles[i]);
+#else
+            pthread_join(handles[i], NULL);
+#endif
+        }
+        else {
+            /* could not spawn a thread: evaluate the chunk here */
+            run_chunk(&chunks[i]);
+        }
+    }
+
+    for (i = 0; i < nthreads && status == 0; i++) {
+        status = chunks[i].status;
+    }
+
+    free(chunks);
+    free(handles);
+    free(started);
+    return status;
+}
@@ -8,10 +8,22 @@ import lerp.core.config_init
 from lerp.core.config import (get_option, set_option, reset_option,
                               describe_option, option_context, options)
 
-from lerp.mesh import Mesh
 # from lerp.polymesh import polymesh2d, polymesh3d
 
 
+def __getattr__(name):
+    # Mesh is a DataArray: xarray and pandas are only imported on first use,
+    # the compiled tables of lerp.core need NumPy alone
+    if name == "Mesh":
+        from lerp.mesh import Mesh
+        return Mesh
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
+
 __version__ = "0.1aN"
 
 # Attention, utilisation d'ascii pour les chaînes de caractères
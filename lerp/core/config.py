@@ -62,8 +62,6 @@ import re
 from collections import namedtuple
 from contextlib import contextmanager
 import warnings
-from pandas.compat import map, lmap, u
-import pandas.compat as compat
 
 DeprecatedOption = namedtuple('DeprecatedOption', 'key msg rkey removal_ver')
 RegisteredOption = namedtuple('RegisteredOption',
@@ -149,7 +147,7 @@ def _describe_option(pat='', _print_desc=True):
     if len(keys) == 0:
         raise OptionError('No such keys(s)')
 
-    s = u('')
+    s = ''
     for k in keys:  # filter by pat
         s += _build_option_description(k)
 
@@ -642,7 +640,7 @@ def _build_option_description(k):
     o = _get_registered_option(k)
     d = _get_deprecated_option(k)
 
-    s = u('%s ') % k
+    s = '%s ' % k
 
     if o.doc:
         s += '\n'.join(o.doc.strip().split('\n'))
@@ -650,13 +648,13 @@ def _build_option_description(k):
         s += 'No description available.'
 
     if o:
-        s += u('\n    [default: %s] [currently: %s]') % (o.defval,
-                                                         _get_option(k, True))
+        s += '\n    [default: %s] [currently: %s]' % (o.defval,
+                                                      _get_option(k, True))
 
     if d:
-        s += u('\n    (Deprecated')
-        s += (u(', use `%s` instead.') % d.rkey if d.rkey else '')
-        s += u(')')
+        s += '\n    (Deprecated'
+        s += (', use `%s` instead.' % d.rkey if d.rkey else '')
+        s += ')'
 
     s += '\n\n'
     return s
@@ -783,8 +781,7 @@ def is_instance_factory(_type):
     """
     if isinstance(_type, (tuple, list)):
         _type = tuple(_type)
-        from pandas.io.formats.printing import pprint_thing
-        type_repr = "|".join(map(pprint_thing, _type))
+        type_repr = "|".join(map(str, _type))
     else:
         type_repr = "'%s'" % _type
 
@@ -801,11 +798,10 @@ def is_one_of_factory(legal_values):
     legal_values = [c for c in legal_values if not callable(c)]
 
     def inner(x):
-        from pandas.io.formats.printing import pprint_thing as pp
         if x not in legal_values:
 
             if not any([c(x) for c in callables]):
-                pp_values = pp("|".join(lmap(pp, legal_values)))
+                pp_values = "|".join(map(str, legal_values))
                 msg = "Value must be one of {0}".format(pp_values)
                 if len(callables):
                     msg += " or a callable"
@@ -820,7 +816,7 @@ is_int = is_type_factory(int)
 is_bool = is_type_factory(bool)
 is_float = is_type_factory(float)
 is_str = is_type_factory(str)
-is_unicode = is_type_factory(compat.text_type)
+is_unicode = is_type_factory(str)
 is_text = is_instance_factory((str, bytes))
 
 
@@ -35,9 +35,19 @@ pc_max_rows_doc = """
     correct auto-detection.
 """
 
+interpolation_threads_doc = """
+: int
+    Number of native threads used by Mesh.interpolation to evaluate large
+    target batches. 0 uses one thread per available core.
+"""
+
 
 style_backup = dict()
 
 
 with cf.config_prefix('display'):
     cf.register_option('max_rows', 15, pc_max_rows_doc)
+
+with cf.config_prefix('interpolation'):
+    cf.register_option('threads', 1, interpolation_threads_doc,
+                       validator=cf.is_int)
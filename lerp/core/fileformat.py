@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Binary file format of the meshes, see Mesh.save and Mesh.load.
+
+A file is made of::
+
+    magic       8 bytes, b'LERPMESH'
+    version     uint32, little endian
+    length      uint32, little endian, of the metadata
+    metadata    UTF-8 JSON: name, dims, attrs, labels of the dimensions
+                without breakpoints, uniform flags of the axes, and the
+                dtype, shape and offset of each array
+    padding     up to a multiple of ALIGNMENT
+    arrays      data, axes and cubic coefficients, C ordered, each one
+                starting at a multiple of ALIGNMENT
+
+The offsets of the arrays are counted from the end of the padding. The
+arrays are stored as the compiled table holds them, so that they are used
+in place once the file is mapped.
+"""
+
+import json
+import mmap as _mmap
+import struct
+
+import numpy as np
+
+from lerp.core.interpolation import Table
+
+MAGIC = b'LERPMESH'
+VERSION = 1
+ALIGNMENT = 64
+
+_HEADER = struct.Struct('<8sII')
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _json_default(value):
+    """JSON form of the numpy values found in attrs"""
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} attribute can not be saved")
+
+
+def write(path, data, axes, dims, name=None, attrs=None, labels=None,
+          uniform=(), coefficients=None):
+    """Write the arrays of a mesh to path
+
+    Parameters
+    ----------
+    path : str or path-like
+    data : ndarray
+        float32 or float64 data.
+    axes : sequence of ndarray
+        float64 breakpoints of the interpolated dimensions.
+    dims : sequence of str
+        Names of the dimensions of the data, the interpolated ones first.
+    name : str, optional
+    attrs : dict, optional
+        JSON serializable attributes, numpy values being saved as lists.
+    labels : dict, optional
+        Coordinate values of the dimensions without breakpoints, as lists.
+    uniform : sequence of bool
+        Per axis flag of equally spaced breakpoints.
+    coefficients : dict, optional
+        Cubic coefficients of the table, per interpolation method.
+    """
+    arrays = [('data', data)]
+    arrays += [(f'axis:{dim}', axis) for dim, axis in zip(dims, axes)]
+    arrays += [(f'coefficients:{method}', array)
+               for method, array in (coefficients or {}).items()]
+
+    layout = {}
+    offset = 0
+    for key, array in arrays:
+        layout[key] = {'dtype': array.dtype.newbyteorder('<').str,
+                       'shape': list(array.shape), 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+
+    metadata = json.dumps({
+        'name': name,
+        'dims': list(dims),
+        'attrs': attrs or {},
+        'labels': labels or {},
+        'uniform': [bool(flag) for flag in uniform],
+        'arrays': layout,
+    }, default=_json_default).encode('utf-8')
+    start = _aligned(_HEADER.size + len(metadata))
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(metadata)))
+        file.write(metadata)
+        for key, array in arrays:
+            file.seek(start + layout[key]['offset'])
+            array = np.ascontiguousarray(array, dtype=layout[key]['dtype'])
+            array.tofile(file)
+        file.truncate(start + offset)
+
+
+def read(path, mmap=True):
+    """Metadata and arrays of a file written by write
+
+    Parameters
+    ----------
+    path : str or path-like
+    mmap : bool
+        Map the file read-only, the arrays being views of the mapping.
+        Otherwise it is read in memory, in writeable arrays.
+
+    Returns
+    -------
+    metadata : dict
+        name, dims, attrs, labels and uniform, as given to write.
+    arrays : dict
+        The data, the axes under axis:<dim> and the coefficients under
+        coefficients:<method>.
+    """
+    with open(path, 'rb') as file:
+        if mmap:
+            buffer = _mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ)
+        else:
+            buffer = bytearray(file.read())
+
+    if len(buffer) < _HEADER.size:
+        raise ValueError(f"{path} is not a lerp mesh file")
+    magic, version, length = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a lerp mesh file")
+    if version > VERSION:
+        raise ValueError(f"{path} has version {version}, "
+                         f"this lerp reads up to version {VERSION}")
+    metadata = json.loads(bytes(buffer[_HEADER.size:_HEADER.size + length]))
+    start = _aligned(_HEADER.size + length)
+
+    arrays = {}
+    for key, entry in metadata.pop('arrays').items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.intp))
+        if count == 0:
+            arrays[key] = np.empty(entry['shape'], dtype)
+            continue
+        arrays[key] = np.frombuffer(
+            buffer, dtype=dtype, count=count,
+            offset=start + entry['offset']).reshape(entry['shape'])
+    return metadata, arrays
+
+
+def read_table(path, mmap=True):
+    """Compiled table of a file written by write, without building the
+    Mesh, hence without importing xarray
+
+    Parameters
+    ----------
+    path : str or path-like
+    mmap : bool
+        Map the file read-only, otherwise it is read in memory.
+
+    Returns
+    -------
+    Table
+        The table on the data and breakpoints of the file, with its saved
+        coefficients.
+    """
+    metadata, arrays = read(path, mmap=mmap)
+    dims = [d for d in metadata['dims'] if 'axis:' + d in arrays]
+    table = Table(arrays['data'], [arrays['axis:' + d] for d in dims],
+                  dims=dims)
+    for key, array in arrays.items():
+        if key.startswith('coefficients:'):
+            table.set_coefficients(key[len('coefficients:'):], array)
+    return table
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled tables in shared memory, see Mesh.share.
+
+The data and the breakpoints of a table are copied once into a block of
+multiprocessing.shared_memory. The SharedTable handle pickles to the name
+and layout of the block only. A process unpickling it attaches the block
+and builds a Table on it in place, once per process, and keeps it until
+the close() of a handle of the block in that process detaches it.
+"""
+
+from multiprocessing import shared_memory
+import weakref
+
+import numpy as np
+
+from lerp.core.interpolation import Table, interpolation
+
+ALIGNMENT = 64
+
+# blocks attached by this process and their tables, per block name, the
+# blocks created by this process excluded
+_attached = {}
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _attach(name):
+    """Block of shared memory created by another process"""
+    try:
+        # not unlinked by the resource tracker of this process at exit
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13, whose pool workers share the tracker of the parent
+        return shared_memory.SharedMemory(name=name)
+
+
+def _unmap(block):
+    # numpy arrays hold the mapping itself, not a buffer of it: it is left
+    # to them, and unmapped once the last table on it is released
+    block._buf.release()
+    block._buf = block._mmap = None
+    block.close()
+
+
+def _release(block):
+    block.unlink()
+    _unmap(block)
+
+
+def _detach(name):
+    entry = _attached.pop(name, None)
+    if entry is not None:
+        _unmap(entry[0])
+
+
+class SharedTable(object):
+    """Table in shared memory, attached by other processes without copies
+
+    Created by :meth:`lerp.Mesh.share`. The creating process owns the
+    block: it is released by :meth:`close`, on exit from a ``with``
+    statement, or once the handle is garbage collected. The handle must
+    outlive the work of the other processes.
+
+    The other processes attach the block once, on the first use of a
+    handle they unpickled, and keep it for the next handles of the same
+    block. A long lived worker detaches it by :meth:`close` on any of
+    them.
+
+    Parameters
+    ----------
+    table : Table
+        Compiled table copied into shared memory.
+    """
+
+    def __init__(self, table):
+        arrays = [table.data] + list(table.axes)
+        offsets, size = [], 0
+        for array in arrays:
+            offsets.append(size)
+            size = _aligned(size + array.nbytes)
+
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.name = block.name
+        self._finalizer = weakref.finalize(self, _release, block)
+        self.layout = [(array.dtype.str, array.shape, offset)
+                       for array, offset in zip(arrays, offsets)]
+        self.dims = table.dims
+        for array, (dtype, shape, offset) in zip(arrays, self.layout):
+            np.ndarray(shape, dtype, block.buf, offset)[...] = array
+        self._table = self._build(block)
+
+    def __getstate__(self):
+        return {'name': self.name, 'layout': self.layout, 'dims': self.dims}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._finalizer = None
+        self._table = None
+
+    def _build(self, block):
+        data, *axes = [np.ndarray(shape, dtype, block.buf, offset)
+                       for dtype, shape, offset in self.layout]
+        # read-only, the table uses it in place instead of copying it
+        data.flags.writeable = False
+        return Table(data, axes, dims=self.dims)
+
+    def table(self):
+        """Table on the shared block, attached once per process"""
+        if self._table is not None:
+            return self._table
+        if self.name not in _attached:
+            block = _attach(self.name)
+            _attached[self.name] = (block, self._build(block))
+        return _attached[self.name][1]
+
+    def __call__(self, *points, **kwargs):
+        """Interpolation of the table at points, see
+        :func:`lerp.core.interpolation.interpolation`"""
+        return interpolation(self.table(), list(points), **kwargs)
+
+    def close(self):
+        """Release the block in the process that created it, or detach
+        it from this process in the others
+
+        The tables returned by :meth:`table` remain valid, on the mapping
+        of the block, as long as they are referenced. A handle of a
+        detached block attaches it again when used.
+        """
+        if self._finalizer is not None:
+            self._table = None
+            self._finalizer()
+        else:
+            _detach(self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
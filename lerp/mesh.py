@@ -4,6 +4,11 @@ This module delivers utilities to manipulate data meshes
 
 """
 
+import numbers
+import os
+import queue
+import threading
+import uuid
 import xml.etree.ElementTree as ET
 from itertools import islice
 
@@ -13,10 +18,11 @@ from xarray.core.pycompat import dask_array_type
 from xarray.core.formatting import (unindexed_dims_repr, dim_summary,
                                     short_dask_repr, short_array_repr, attrs_repr)
 from lerp.core.config import get_option
+from lerp.core import fileformat
 
 # from .core.interpolation_ctypes import derivate
 
-from lerp.core.interpolation import interpolation
+from lerp.core.interpolation import interpolation, locate, Locator, Table
 
 _html_style = {
     'table': 'border: 0px none;',
@@ -26,6 +32,67 @@ _html_style = {
     'none': 'border:0px none;background:none;',
 }
 
+def _threads(threads):
+    """Number of threads, defaulting to the interpolation.threads option"""
+    if threads is None:
+        threads = get_option('interpolation.threads')
+    if threads == 0:
+        threads = os.cpu_count() or 1
+    return threads
+
+def _prefetched(iterable):
+    """Items of iterable, the next one read by a background thread while
+    the current one is used"""
+    items = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as error:
+            put((end, error))
+        else:
+            put((end, None))
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # the reader exits once its pending read, if any, is done
+        stop.set()
+
+def _interpolate_block(table, *blocks, interp, extrap, threads, result_type,
+                       variables):
+    """Values at a block of dask targets, one block per dimension"""
+    out = np.empty(blocks[0].shape + variables, dtype=result_type)
+    interpolation(table, list(blocks), interp=interp, extrap=extrap,
+                  threads=threads, out=out)
+    return out
+
+def _interpolate_shared(shared, points, interp, extrap, variables):
+    """Values at a chunk of points of a pool worker"""
+    values = shared(*points, interp=interp, extrap=extrap, threads=1)
+    return np.reshape(values, (len(points[0]),) + variables)
+
 def _StyledSubElement(parent, child):
     return ET.SubElement(parent, child,
                          {'style': _html_style[child]})
@@ -52,6 +119,11 @@ class Mesh(DataArray):
 
     """
     # AXES = 'xyzvw'
+
+    #: Name of a trailing dimension holding output variables. It is not
+    #: interpolated: all the variables are blended together at each point.
+    VARIABLE_DIM = 'variable'
+
     def __init__(self, *pargs, **kwargs):
 
         # from xarray.core.variable import (Variable, as_compatible_data)
@@ -64,6 +136,10 @@ class Mesh(DataArray):
             "step": False,
             "deepcopy": False
         }
+        self._table = None
+        self._table_sources = None
+        self._call_tables = {}
+        self._locked = None
 
         # if 'coords' in kwargs:
         #     assert not bool(set(kwargs) & set(kwargs['coords'])), \
@@ -131,47 +207,589 @@ class Mesh(DataArray):
         # self._initialized = True
 
 
+    def __setitem__(self, key, value):
+        self._unlock()
+        super(Mesh, self).__setitem__(key, value)
+
+    def _lock(self):
+        """Make the data read-only while a compiled table reads it."""
+        data = self.variable._data
+        if isinstance(data, np.ndarray) and data.flags.writeable:
+            data.flags.writeable = False
+            self._locked = data
+
+    def _unlock(self):
+        """Make the data writeable again and drop the compiled table."""
+        if self._locked is not None:
+            self._locked.flags.writeable = True
+            self._locked = None
+        self._table = None
+
+    def _set_values(self, value):
+        self._unlock()
+        DataArray.values.fset(self, value)
+
+    def _set_data(self, value):
+        self._unlock()
+        DataArray.data.fset(self, value)
+
+    values = property(DataArray.values.fget, _set_values,
+                      doc=DataArray.values.__doc__)
+    data = property(DataArray.data.fget, _set_data,
+                    doc=DataArray.data.__doc__)
+
+    def _inplace_op(name):
+        """In place operator of DataArray, on writeable data."""
+        op = getattr(DataArray, name)
+
+        def method(self, other):
+            self._unlock()
+            return op(self, other)
+
+        method.__name__ = name
+        return method
+
+    for _name in ('__iadd__', '__isub__', '__imul__', '__itruediv__',
+                  '__ifloordiv__', '__imod__', '__ipow__', '__iand__',
+                  '__ior__', '__ixor__'):
+        locals()[_name] = _inplace_op(_name)
+    del _inplace_op, _name
+
+    def _axes(self):
+        """Interpolated dimensions, all but a trailing variable one."""
+        if self.dims and self.dims[-1] == self.VARIABLE_DIM:
+            return self.dims[:-1]
+        return self.dims
+
+    def _variables(self):
+        """Shape of the values at a point: (number of variables,), or ()"""
+        if len(self._axes()) < len(self.dims):
+            return self.shape[-1:]
+        return ()
+
+    def _sources(self):
+        """Objects holding the data and coords buffers of the mesh."""
+        return (self.variable._data,) + tuple(self._coords[d]._data
+                                               for d in self._axes())
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """Vector-valued mesh of the data variables of a Dataset
+
+        The data variables, on the same dimensions, are stacked along a
+        trailing :attr:`VARIABLE_DIM` dimension and interpolated in a
+        single pass: each point is located once for all of them.
+
+        Parameters
+        ----------
+        dataset : xarray.Dataset
+
+        Returns
+        -------
+        Mesh
+        """
+        array = dataset.to_array(dim=cls.VARIABLE_DIM)
+        dims = [d for d in array.dims if d != cls.VARIABLE_DIM]
+        return cls(array.transpose(*dims, cls.VARIABLE_DIM))
+
+    @classmethod
+    def open(cls, path, coords, mmap=True, dtype=np.float64, **kwargs):
+        """Mesh of the data of a file, memory mapped
+
+        The data is mapped read-only and the table compiled from the mesh
+        points to the mapped buffer: a lookup only reads the pages of the
+        cells it blends, and the processes opening the same file share
+        its pages. float64 and float32 data is used in place, any other
+        dtype is converted to float64 when compiled. The cubic methods
+        compute their coefficients over the whole table.
+
+        Parameters
+        ----------
+        path : str or path-like
+            A ``.npy`` file, or a raw C ordered array of dtype, its shape
+            given by the coords.
+        coords : sequence of (dim, values) or dict
+            Coords of the dimensions of the data.
+        mmap : bool
+            Map the file, otherwise it is read in memory.
+        dtype : data-type
+            Type of the values of a raw file.
+        kwargs :
+            Passed on to Mesh, name and attrs for instance.
+
+        Returns
+        -------
+        Mesh
+        """
+        if str(path).endswith('.npy'):
+            data = np.load(path, mmap_mode='r' if mmap else None)
+        else:
+            items = coords.items() if hasattr(coords, 'items') else coords
+            shape = tuple(len(values) for _, values in items)
+            if mmap:
+                data = np.memmap(path, dtype=dtype, mode='r', shape=shape)
+            else:
+                data = np.fromfile(path, dtype=dtype).reshape(shape)
+        return cls(data=data, coords=coords, **kwargs)
+
+    def save(self, path, coefficients=()):
+        """Save the mesh in the binary format of :meth:`load`
+
+        The file holds the data and the breakpoints as the compiled table
+        holds them, the dims, the name, the attrs, the uniform flags of
+        the axes, and the Hermite coefficients of the cubic methods given.
+
+        Parameters
+        ----------
+        path : str or path-like
+        coefficients : sequence of str
+            Cubic interpolation methods whose coefficients are saved, so
+            that they are not computed again once loaded. They take
+            2**ndim times the size of the data.
+        """
+        table = self.compile()
+        axes = self._axes()
+        labels = {d: self.coords[d].values.tolist()
+                  for d in self.dims[len(axes):] if d in self.coords}
+        fileformat.write(path, table.data, table.axes, self.dims,
+                         name=self.name, attrs=dict(self.attrs),
+                         labels=labels, uniform=table.uniform,
+                         coefficients={m: table.coefficients(m)
+                                       for m in coefficients})
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Mesh saved by :meth:`save`
+
+        The file is mapped once and the data, the breakpoints and the
+        saved coefficients are read in place by the compiled table,
+        without copies. :func:`lerp.core.fileformat.read_table` reads the
+        compiled table alone, without importing xarray.
+
+        Parameters
+        ----------
+        path : str or path-like
+        mmap : bool
+            Map the file read-only, otherwise it is read in memory.
+
+        Returns
+        -------
+        Mesh
+        """
+        metadata, arrays = fileformat.read(path, mmap=mmap)
+        dims = metadata['dims']
+        coords = {d: arrays['axis:' + d] for d in dims
+                  if 'axis:' + d in arrays}
+        coords.update(metadata['labels'])
+        mesh = cls(data=arrays['data'], coords=coords, dims=dims,
+                   name=metadata['name'], attrs=metadata['attrs'])
+
+        table = mesh.compile()
+        for key, array in arrays.items():
+            if key.startswith('coefficients:'):
+                table.set_coefficients(key[len('coefficients:'):], array)
+        return mesh
+
+    def compile(self):
+        """Compiled lookup table of the mesh.
+
+        The returned :class:`lerp.core.interpolation.Table` holds contiguous
+        arrays of the data and of the coords, the ones of the mesh when
+        already contiguous, memory mapped included, see :meth:`open`.
+        float32 data is kept as is, any other dtype is converted to
+        float64. A trailing
+        :attr:`VARIABLE_DIM` dimension is kept as the variables of the
+        table. It is cached on the mesh and
+        only rebuilt when the data or the coords have been replaced, or
+        after an item assignment or an in place operation on the mesh,
+        such as ``mesh += 1``.
+
+        The data array of the mesh is read-only while the table is
+        cached: writing to it directly, as in ``mesh.values[:] = 0``,
+        raises ValueError instead of leaving the table stale. It is made
+        writeable again by these operations.
+
+        The table is callable on a single point given as numbers,
+        ``table(x, y)``, with its ``interp`` and ``extrap`` methods. Calling
+        the mesh leaves them as they are: it uses tables of its own, on the
+        same arrays.
+
+        Returns
+        -------
+        Table
+        """
+        sources = self._sources()
+        if self._table is None or \
+           any(a is not b for a, b in zip(sources, self._table_sources)):
+            axes = self._axes()
+            self._unlock()
+            self._lock()
+            self._table = Table(self.values,
+                                [self.coords[d].values for d in axes],
+                                dims=axes)
+            self._table_sources = sources
+            self._call_tables = {}
+        return self._table
+
+    def _call_table(self):
+        """Table of the scalar calls, with the methods of the options."""
+        table = self.compile()
+        methods = self._call_methods()
+        call_table = self._call_tables.get(methods)
+        if call_table is None:
+            # reads the read-only arrays of the compiled table in place
+            call_table = Table(table.data, table.axes, dims=table.dims,
+                               interp=methods[0], extrap=methods[1])
+            self._call_tables[methods] = call_table
+        return call_table
+
+    def recompile(self):
+        """Compiled lookup table rebuilt from the current values
+
+        To be called after the data was edited through a reference that
+        bypasses the mesh, such as another array on the same buffer, which
+        the table cached by :meth:`compile` does not see.
+
+        Returns
+        -------
+        Table
+        """
+        self._unlock()
+        return self.compile()
+
     @property
     def options(self):
         from lerp.util import DictWrapper
         return DictWrapper(self._options)
 
+    def _call_methods(self):
+        """Interpolation and extrapolation methods of __call__."""
+        if self._options['step']:
+            return 'hold', 'hold'
+        if self._options['extrapolate']:
+            return 'linear', 'linear'
+        return 'linear', 'hold'
+
     def __call__(self, *pargs, **kwargs):
         """
         Interpolate the function.
 
         Parameters
         ----------
-        x  : 1D array
+        x  : array_like
             x-coordinates of the mesh on which to interpolate.
-        y : 1D array
-            y-coordinates of the mesh on which to interpolate.
+        y : array_like
+            y-coordinates of the mesh on which to interpolate, broadcast
+            with x.
+        out : ndarray, optional
+            float32 or float64 array receiving the values, returned in
+            place of a new array.
+        grid : bool, optional
+            Evaluate on the grid spanned by x and y.
 
         Returns
         -------
-            2D array with shape (len(x), len(y))
+            array with the broadcast shape of x and y, or (len(x), len(y))
+            with grid=True
             The interpolated values.
+
+        Notes
+        -----
+        A point given as numbers, without keyword arguments, is evaluated
+        by calling a table, skipping the conversion of the targets to
+        arrays. Hold a reference to :meth:`compile` and call it directly
+        for the lowest overhead per lookup.
         """
-        if self.options.step:
+        if not kwargs and len(pargs) == len(self._axes()) and \
+           all(isinstance(p, numbers.Real) for p in pargs):
+            # a point given as numbers is evaluated by a table itself
+            return self._call_table()(*pargs)
+
+        if self._options['step']:
             kwargs.pop('interp', None)
             kwargs.pop('extrap', None)
             return self.interpolation(interp="hold", extrap='hold',
                                       *pargs, **kwargs)
         else:
-            if self.options.extrapolate and 'extrap' not in kwargs:
+            if self._options['extrapolate'] and 'extrap' not in kwargs:
                 kwargs.pop('extrap', None)
                 return self.interpolation(extrap='linear', *pargs, **kwargs)
             else:
                 return self.interpolation(*pargs, **kwargs)
 
-    def interpolation(self, *points, interp='linear', extrap='hold'):
+    def interpolation(self, *points, interp='linear', extrap='hold',
+                      threads=None, out=None, grid=False,
+                      with_gradient=False):
         """Interpolation
+
+        Parameters
+        ----------
+        points : array_like
+            Coordinates of the points, one array per dimension. They are
+            broadcast together and the result has the broadcast shape.
+            A single :class:`Locator` from :meth:`locate` is also accepted.
+            With dask arrays, the result is a dask array evaluated block
+            by block, the blocks of the points being aligned.
+        interp : str
+            Interpolation method.
+        extrap : str
+            Extrapolation method.
+        threads : int, optional
+            Number of native threads evaluating the points, 0 for one per
+            core. Defaults to the ``interpolation.threads`` option.
+        out : ndarray, optional
+            float32 or float64 array with as many elements as the points,
+            filled in place and returned. It may be strided when 1-D.
+        grid : bool
+            Evaluate on the tensor product of the points, the result having
+            shape ``(len(points[0]), len(points[1]), ...)``. The points are
+            located once per axis.
+        with_gradient : bool
+            Also return the partial derivatives with respect to each
+            coordinate, see :meth:`gradient`.
+
+        Returns
+        -------
+        The interpolated values, or a ``(values, gradient)`` tuple with
+        ``with_gradient=True``. The values of a mesh with a trailing
+        :attr:`VARIABLE_DIM` dimension have one more trailing axis, one
+        value per variable.
+        """
+        threads = _threads(threads)
+        if any(isinstance(p, dask_array_type) for p in points):
+            if out is not None or grid or with_gradient:
+                raise NotImplementedError(
+                    "out, grid and with_gradient are not supported with "
+                    "dask targets")
+            return self._interpolation_dask(points, interp, extrap, threads)
+        if len(points) == 1 and isinstance(points[0], Locator):
+            targets = points[0]
+        else:
+            targets = list(points)
+        return interpolation(self.compile(), targets,
+                             interp=interp, extrap=extrap, threads=threads,
+                             out=out, grid=grid, with_gradient=with_gradient)
+
+    def interpolate_stream(self, batches, chunk_size=65536, interp='linear',
+                           extrap='hold', threads=None, prefetch=False):
+        """Interpolation of a stream of batches of points
+
+        The mesh is compiled once, and the batches are evaluated by chunks
+        into a reused output buffer. The search of each chunk starts from
+        the cells of the last point of the previous one, so that sorted
+        samples split across batches are walked as a single sequence.
+
+        Parameters
+        ----------
+        batches : iterable
+            Batches of points, each one a sequence of arrays, one per
+            dimension, broadcast together. A batch of a 1-D mesh may be a
+            single array.
+        chunk_size : int, optional
+            Number of points evaluated at once, None for whole batches.
+        interp : str
+            Interpolation method.
+        extrap : str
+            Extrapolation method.
+        threads : int, optional
+            As for :meth:`interpolation`.
+        prefetch : bool
+            Read the next batch from a background thread while the current
+            one is evaluated, overlapping I/O and evaluation.
+
+        Yields
+        ------
+        ndarray
+            The float64 values of each chunk, flat, with a trailing axis
+            of variables on a vector mesh. They are views of the reused
+            buffer, overwritten by the next chunk: copy them to keep them.
+
+        Raises
+        ------
+        ValueError
+            If chunk_size is not None and less than 1.
+        """
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, "
+                             f"not {chunk_size}")
+        # checked on the call, the chunks are evaluated on iteration
+        return self._stream(batches, chunk_size, interp, extrap, threads,
+                            prefetch)
+
+    def _stream(self, batches, chunk_size, interp, extrap, threads,
+                prefetch):
+        """Generator of the chunks of :meth:`interpolate_stream`"""
+        table = self.compile()
+        threads = _threads(threads)
+        hints = np.zeros(table.ndim, dtype=np.intp)
+        variables = self._variables()
+        buffer = np.empty(0)
+
+        for batch in _prefetched(batches) if prefetch else batches:
+            if table.ndim == 1 and isinstance(batch, np.ndarray) and \
+               batch.ndim == 1:
+                batch = [batch]
+            points = [p.ravel() for p in np.broadcast_arrays(*batch)]
+            size = points[0].size
+            step = size if chunk_size is None else chunk_size
+            if len(buffer) < min(step, size):
+                buffer = np.empty((min(step, size),) + variables)
+
+            for start in range(0, size, max(step, 1)):
+                chunk = [p[start:start + step] for p in points]
+                out = buffer[:min(step, size - start)]
+                interpolation(table, chunk, interp=interp, extrap=extrap,
+                              threads=threads, out=out, hints=hints)
+                yield out
+
+    def _interpolation_dask(self, points, interp, extrap, threads):
+        """Lazy interpolation of dask targets, block by block
+
+        The compiled table is a single key of the graph that every block
+        depends on, so that it is sent once to each worker rather than
+        pickled into every task.
+        """
+        import dask.array as da
+        from dask import delayed
+
+        table = self.compile()
+        targets = da.broadcast_arrays(*[da.asarray(p) for p in points])
+        result_type = np.float32 if table.data.dtype == np.float32 and \
+            all(t.dtype == np.float32 for t in targets) else np.float64
+        variables = self._variables()
+        shared = delayed(table, name='lerp-table-' + uuid.uuid4().hex,
+                         traverse=False)
+
+        kwargs = {}
+        if variables:
+            kwargs = dict(chunks=targets[0].chunks + (variables,),
+                          new_axis=targets[0].ndim)
+        return da.map_blocks(_interpolate_block, shared, *targets,
+                             dtype=result_type, interp=interp, extrap=extrap,
+                             threads=threads, result_type=result_type,
+                             variables=variables, **kwargs)
+
+    def share(self):
+        """Compiled table of the mesh in shared memory
+
+        The data and the coords are copied once into a block of
+        :mod:`multiprocessing.shared_memory`. The returned handle pickles
+        to the name of the block only, and is evaluated by other processes
+        on the shared block, without copies.
+
+        Returns
+        -------
+        lerp.core.shared.SharedTable
+            Callable as ``shared(x, y, interp=..., extrap=...)``. The block
+            is released by its ``close`` method, by a ``with`` statement
+            or once it is garbage collected, and must outlive its use by
+            the other processes.
+        """
+        from lerp.core.shared import SharedTable
+        return SharedTable(self.compile())
+
+    def map_pool(self, *points, processes=None, chunk_size=None,
+                 interp='linear', extrap='hold'):
+        """Interpolation spread over a pool of processes
+
+        The table is shared with the workers through :meth:`share`, and
+        the points are sent to them by chunks.
+
+        Parameters
+        ----------
+        points : array_like
+            Coordinates of the points, one array per dimension, broadcast
+            together.
+        processes : int, optional
+            Number of worker processes, one per core by default.
+        chunk_size : int, optional
+            Number of points per task, by default four tasks per worker.
+        interp : str
+            Interpolation method.
+        extrap : str
+            Extrapolation method.
+
+        Returns
+        -------
+        ndarray
+            The interpolated values, with the broadcast shape of the points.
+        """
+        import multiprocessing
+
+        points = np.broadcast_arrays(*points)
+        shape = points[0].shape + self._variables()
+        points = [p.ravel() for p in points]
+        size = points[0].size
+        processes = processes or os.cpu_count() or 1
+        step = chunk_size or max(1, -(-size // (4 * processes)))
+        if size == 0:
+            return np.empty(shape)
+
+        with self.share() as shared, \
+                multiprocessing.Pool(processes) as pool:
+            values = pool.starmap(_interpolate_shared, [
+                (shared, [p[i:i + step] for p in points], interp, extrap,
+                 self._variables())
+                for i in range(0, size, step)])
+        return np.concatenate(values).reshape(shape)
+
+    def locate(self, *points, threads=None):
+        """Locate points along the coords of the mesh
+
+        The cell of each point and its position in the cell are searched
+        once, and reused by :meth:`apply` on any mesh with the same coords.
+
+        Parameters
+        ----------
+        points : array_like
+            Coordinates of the points, one array per dimension, broadcast
+            together.
+        threads : int, optional
+            As for :meth:`interpolation`.
+
+        Returns
+        -------
+        Locator
+        """
+        return locate(self.compile(), list(points), threads=_threads(threads))
+
+    def apply(self, locator, **kwargs):
+        """Interpolation at located points
+
+        Parameters
+        ----------
+        locator : Locator
+            Points located by :meth:`locate` on a mesh with the same coords,
+            compared by buffer then by value. A ValueError is raised
+            otherwise.
+        kwargs :
+            interp, extrap, threads, out and with_gradient, as for
+            :meth:`interpolation`.
+
+        Returns
+        -------
+        The interpolated values, with the shape of the located points.
         """
-        return interpolation(self, list(points),
-                             interp=interp, extrap=extrap)
+        return self.interpolation(locator, **kwargs)
+
+    def gradient(self, *points, **kwargs):
+        """Gradient of the interpolated function
+
+        The partial derivatives are computed analytically in the same pass
+        as the values, for every interpolation method. They are zero along
+        a dimension where the value is held.
 
-    # def derivate(self, *points, interp='linear', extrap='hold', **kwargs):
-    #     """derivate
-    #     """
-    #     return derivate(self, *points, interp=interp, extrap=extrap,
-    #                     **kwargs)
+        Parameters
+        ----------
+        points : array_like
+            Coordinates of the points, one array per dimension.
+        kwargs :
+            interp, extrap, threads and grid, as for :meth:`interpolation`.
+
+        Returns
+        -------
+        ndarray
+            The partial derivatives, with shape ``(ndim,) + shape`` where
+            shape is the one of the interpolated values.
+        """
+        return self.interpolation(*points, with_gradient=True, **kwargs)[1]
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Lookup server batching the point queries of many processes.
+
+A Server holds the compiled tables of a set of meshes and answers point
+queries on a Unix socket or a localhost TCP port. The queries on the same
+table and methods arriving within a short window are evaluated together,
+by a single interpolation() call, then answered one by one.
+
+The protocol is line oriented, one JSON object per line. A query::
+
+    {"id": 1, "table": "m3d", "point": [1.5, 700.0],
+     "interp": "linear", "extrap": "hold"}
+
+is answered by ``{"id": 1, "value": 0.75}``, or ``{"id": 1, "error":
+"..."}``. interp and extrap are optional. The value of a mesh with
+variables is a list. Queries are pipelined: the answers of a connection
+come in the order their batches are evaluated, matched by id.
+
+Serving meshes saved by Mesh.save::
+
+    python -m lerp.serve m3d.lerp other.lerp --unix /tmp/lerp.sock
+
+Querying them::
+
+    client = await Client.connect(path='/tmp/lerp.sock')
+    value = await client('m3d', 1.5, 700.)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+import numpy as np
+
+from lerp.core.fileformat import read_table
+from lerp.core.interpolation import Table, interpolation
+
+
+class Server(object):
+    """Lookup server of a set of tables
+
+    Parameters
+    ----------
+    tables : dict
+        Mesh or compiled Table, per name.
+    window : float
+        Seconds a query waits for others to be evaluated with.
+    max_batch : int
+        Number of queries evaluated at once, without waiting for the end
+        of the window.
+    """
+
+    def __init__(self, tables, window=0.0005, max_batch=4096):
+        self.tables = {name: table if isinstance(table, Table)
+                       else table.compile()
+                       for name, table in tables.items()}
+        self.window = window
+        self.max_batch = max_batch
+        #: Number of queries answered, and of interpolation() calls
+        self.queries = 0
+        self.batches = 0
+        self._pending = {}
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """Listen on the Unix socket path, or else on host and port
+
+        Returns
+        -------
+        asyncio.AbstractServer
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self._serve, path)
+        return await asyncio.start_server(self._serve, host, port)
+
+    def submit(self, name, point, interp='linear', extrap='hold'):
+        """Future of the value of a table at a point, evaluated with the
+        other points submitted within the window"""
+        if name not in self.tables:
+            raise ValueError(f"Unknown table {name}")
+        table = self.tables[name]
+        point = [float(x) for x in point]
+        if len(point) != table.ndim:
+            raise ValueError(f"{name} takes {table.ndim} coordinates, "
+                             f"{len(point)} given")
+        key = (name, interp, extrap)
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((point, future))
+        if len(batch) == 1:
+            asyncio.get_running_loop().call_later(self.window, self._flush,
+                                                  key, batch)
+        if len(batch) >= self.max_batch:
+            self._flush(key, batch)
+        return future
+
+    def _flush(self, key, batch):
+        """Evaluate a batch of queries and resolve their futures"""
+        if self._pending.get(key) is not batch:
+            return  # already evaluated
+        del self._pending[key]
+        name, interp, extrap = key
+        table = self.tables[name]
+        points = np.array([point for point, _ in batch], dtype=np.float64)
+        values = np.empty((len(batch),) + table.data.shape[table.ndim:])
+        try:
+            interpolation(table, list(points.T), interp=interp,
+                          extrap=extrap, out=values)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.batches += 1
+        self.queries += len(batch)
+        for (_, future), value in zip(batch, values.tolist()):
+            # a query cancelled by its caller is not answered
+            if not future.done():
+                future.set_result(value)
+
+    async def _answer(self, query, writer):
+        try:
+            value = await self.submit(query['table'], query['point'],
+                                      query.get('interp', 'linear'),
+                                      query.get('extrap', 'hold'))
+            answer = {'id': query.get('id'), 'value': value}
+        except Exception as error:
+            answer = {'id': query.get('id'), 'error': str(error)}
+        writer.write(json.dumps(answer).encode() + b'\n')
+
+    async def _serve(self, reader, writer):
+        """Answer the queries of a connection"""
+        answers = set()
+        try:
+            async for line in reader:
+                try:
+                    query = json.loads(line)
+                except ValueError as error:
+                    writer.write(json.dumps(
+                        {'id': None, 'error': str(error)}).encode() + b'\n')
+                    continue
+                task = asyncio.ensure_future(self._answer(query, writer))
+                answers.add(task)
+                task.add_done_callback(answers.discard)
+                await writer.drain()
+            if answers:
+                await asyncio.wait(answers)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class Client(object):
+    """Connection to a Server, sending concurrent queries on one socket
+
+    Create it with :meth:`connect`.
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._futures = {}
+        self._next_id = 0
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, path=None, host='127.0.0.1', port=None):
+        """Client of the server on the Unix socket path, or else on host
+        and port"""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        try:
+            async for line in self._reader:
+                answer = json.loads(line)
+                future = self._futures.pop(answer['id'], None)
+                if future is None or future.done():
+                    continue
+                if 'error' in answer:
+                    future.set_exception(ValueError(answer['error']))
+                else:
+                    future.set_result(answer['value'])
+        finally:
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Server closed"))
+            self._futures.clear()
+
+    async def __call__(self, table, *point, interp='linear', extrap='hold'):
+        """Value of table at point, a list on a mesh with variables"""
+        if self._receiver.done():
+            raise ConnectionError("Server closed")
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._futures[self._next_id] = future
+        self._writer.write(json.dumps({
+            'id': self._next_id, 'table': table, 'point': point,
+            'interp': interp, 'extrap': extrap}).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._receiver
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve meshes saved by Mesh.save, named by file name.")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--unix', help="Unix socket path")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8470)
+    parser.add_argument('--window', type=float, default=0.0005,
+                        help="batching window, in seconds")
+    args = parser.parse_args(argv)
+
+    tables = {os.path.splitext(os.path.basename(path))[0]: read_table(path)
+              for path in args.files}
+    server = Server(tables, window=args.window)
+
+    async def run():
+        listening = await server.start(args.unix, args.host, args.port)
+        async with listening:
+            await listening.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
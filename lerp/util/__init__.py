@@ -5,17 +5,19 @@ from collections import namedtuple
 from os import mkdir, system
 import os.path
 import numpy as np
-import pandas as pd
-from lerp.mesh import Mesh
-from lerp.util.FigureData import go as digitizer
-
-from openpyxl import load_workbook
-from openpyxl.utils import rows_from_range
 import logging
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger()  # __name__
 
 
+def __getattr__(name):
+    # matplotlib is only imported by the digitizer
+    if name == "digitizer":
+        from lerp.util.FigureData import go
+        return go
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def to_clipboard_for_excel(array):
     r"""Copy an array into a string format acceptable by Excel.
 
@@ -78,6 +80,7 @@ class xlsx(object):
     def __init__(self, fileName=None):
         """Init."""
         if fileName is not None:
+            from openpyxl import load_workbook
             self.fileName = fileName
             self.wb = load_workbook(fileName, read_only=True, data_only=True)
 
@@ -108,6 +111,10 @@ class xlsx(object):
         Returns
         -------
         """
+        import pandas as pd
+        from openpyxl.utils import rows_from_range
+        from lerp.mesh import Mesh
+
         try:
             # Si named_range est donné en arguement, on récupère
             # le nom de l'onglet et le domaine via la méthode
@@ -34,14 +34,30 @@ class PyTest(TestCommand):
 extra_compile_args = ['-Wall', '-Wno-unused-function', '-Wno-unused-variable']\
     if os.name == 'posix' else ['-Wall']
 
+# Native worker threads
+libraries = ['pthread'] if os.name == 'posix' else []
+
+# Instrumentation counters of lerp.core.interpolation.stats(), compiled out
+# unless LERP_STATS is set
+define_macros = [('LERP_STATS', '1')] if os.environ.get('LERP_STATS') else []
+
 ext_modules = [Extension('lerp.core.interpolation',
                          sources=['lerp/C/src/NumPyWrapper.c',
                                   'lerp/C/src/NDTable.c',
                                   'lerp/C/src/Mesh.c',
-                                  'lerp/C/src/interpolation.c'],
+                                  'lerp/C/src/Table.c',
+                                  'lerp/C/src/Locator.c',
+                                  'lerp/C/src/Stats.c',
+                                  'lerp/C/src/Threads.c',
+                                  'lerp/C/src/Grid.c',
+                                  'lerp/C/src/Hermite.c',
+                                  'lerp/C/src/Curve.c',
+                                  'lerp/C/src/Interpolation.c'],
                          include_dirs=[np.get_include(),
                                        'lerp/C/include'],
 #                         libraries=["gsl"],
+                         libraries=libraries,
+                         define_macros=define_macros,
                          extra_compile_args=extra_compile_args),
                Extension('lerp.core.utils',
                          sources=['lerp/C/src/NumPyWrapper.c',
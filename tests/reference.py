@@ -0,0 +1,132 @@
+"""
+Reference interpolations the tests check the extension against.
+
+They are written for clarity, one point at a time, with numpy only, and
+share no code with lerp.
+"""
+
+import itertools
+
+import numpy as np
+
+
+def _cell(axis, x):
+    """Left breakpoint of the cell of x, and the position of x in it"""
+    k = min(max(np.searchsorted(axis, x, 'right') - 1, 0), len(axis) - 2)
+    return k, (x - axis[k]) / (axis[k + 1] - axis[k])
+
+
+def multilinear(axes, data, points, interp='linear', extrap='hold'):
+    """Values at the points of a table, by the corners of their cells
+
+    Parameters
+    ----------
+    axes : sequence of 1-D array
+        Breakpoints, increasing, at least two per axis.
+    data : ndarray
+        Samples, one axis per breakpoints.
+    points : sequence of array_like
+        Coordinates, one array per axis, broadcast together.
+    interp : str
+        'linear', 'hold' (the sample on the left in the cell, the last
+        breakpoint included) or 'nearest'.
+    extrap : str
+        'hold' (the coordinates are clamped to the axes) or 'linear'.
+
+    Returns
+    -------
+    ndarray
+        The values, with the broadcast shape of the points.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    points = np.broadcast_arrays(*[np.asarray(p, dtype=np.float64)
+                                   for p in points])
+    values = np.empty(points[0].shape)
+    for i in np.ndindex(values.shape):
+        cell, weights = [], []
+        for axis, x in zip(axes, (p[i] for p in points)):
+            k, t = _cell(axis, x)
+            outside = t < 0 or t > 1
+            if outside and extrap == 'hold':
+                t = min(max(t, 0.), 1.)
+            elif not outside and interp == 'hold':
+                t = 0.
+            elif not outside and interp == 'nearest':
+                t = float(t >= 0.5)
+            cell.append(k)
+            weights.append((1 - t, t))
+        value = 0.
+        for corner in itertools.product((0, 1), repeat=len(axes)):
+            weight = np.prod([w[c] for w, c in zip(weights, corner)])
+            if weight != 0:
+                value += weight * data[tuple(k + c
+                                             for k, c in zip(cell, corner))]
+        values[i] = np.nan if any(np.isnan(p[i]) for p in points) else value
+    return values
+
+
+def knot_slopes(interp, x, y):
+    """Slopes of a cubic method at the breakpoints x of y"""
+    d = np.diff(y) / np.diff(x)
+    h = np.diff(x)
+    if interp == 'akima':
+        if len(x) == 2:
+            return np.full(2, d[0])
+        d = np.concatenate([[3 * d[0] - 2 * d[1], 2 * d[0] - d[1]], d,
+                            [2 * d[-1] - d[-2], 3 * d[-1] - 2 * d[-2]]])
+        m = []
+        for i in range(len(x)):
+            d0, d1, d2, d3 = d[i:i + 4]
+            c = abs(d3 - d2) + abs(d1 - d0)
+            a = abs(d1 - d0) / c if c > 0 else 0.5
+            m.append((1 - a) * d1 + a * d2)
+        return np.array(m)
+
+    m = [d[0]]
+    for d0, d1, h0, h1 in zip(d[:-1], d[1:], h[:-1], h[1:]):
+        if d0 * d1 <= 0:
+            m.append(0.)
+        elif interp == 'fritsch_butland':
+            m.append(3 * (h0 + h1) / ((h0 + 2 * h1) / d0 + (h1 + 2 * h0) / d1))
+        else:
+            s = (d0 * h1 + d1 * h0) / (h0 + h1)
+            if abs(s) / 2 > min(abs(d0), abs(d1)):
+                s = 2 * np.sign(d0) * min(abs(d0), abs(d1))
+            m.append(s)
+    return np.array(m + [d[-1]])
+
+
+def hermite(interp, axes, data, points):
+    """Tensor product cubic Hermite interpolation, the derivatives being
+    taken along the axes in order, the cross ones included. The points
+    are clamped to the axes, as with the hold extrapolation."""
+    ndim = len(axes)
+    derivatives = {}
+    for flags in itertools.product((0, 1), repeat=ndim):
+        coefs = np.asarray(data, dtype=np.float64)
+        for dim in range(ndim):
+            if flags[dim]:
+                coefs = np.apply_along_axis(
+                    lambda y: knot_slopes(interp, axes[dim], y), dim, coefs)
+        derivatives[flags] = coefs
+
+    points = np.broadcast_arrays(*[np.asarray(p, dtype=np.float64)
+                                   for p in points])
+    values = np.empty(points[0].shape)
+    for i in np.ndindex(values.shape):
+        cell, basis = [], []
+        for a, x in zip(axes, (p[i] for p in points)):
+            k, t = _cell(a, min(max(x, a[0]), a[-1]))
+            h = a[k + 1] - a[k]
+            cell.append(k)
+            # value at k, value at k + 1, slope at k, slope at k + 1
+            basis.append([[2 * t**3 - 3 * t**2 + 1, 3 * t**2 - 2 * t**3],
+                          [h * (t**3 - 2 * t**2 + t), h * (t**3 - t**2)]])
+        value = 0.
+        for corner in itertools.product((0, 1), repeat=ndim):
+            index = tuple(k + c for k, c in zip(cell, corner))
+            for flags, coefs in derivatives.items():
+                value += coefs[index] * np.prod(
+                    [b[f][c] for b, f, c in zip(basis, flags, corner)])
+        values[i] = value
+    return values
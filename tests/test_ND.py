@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from lerp import Mesh
+
+from .reference import multilinear
+
+
+def affine_mesh(ndim):
+    np.random.seed(123)
+    axes = [np.sort(np.random.uniform(0, 10, size=3 + i)) for i in range(ndim)]
+    coefs = np.arange(1, ndim + 1)
+    grids = np.meshgrid(*axes, indexing='ij')
+    data = sum(c * g for c, g in zip(coefs, grids)) + 1.
+    mesh = Mesh(coords=[(f"x{i}", a) for i, a in enumerate(axes)], data=data)
+    return mesh, axes, coefs
+
+
+def random_mesh(ndim, seed=7):
+    rng = np.random.RandomState(seed)
+    axes = [np.sort(rng.uniform(0, 10, size=3 + i)) for i in range(ndim)]
+    data = rng.randn(*[len(a) for a in axes])
+    mesh = Mesh(coords=[(f"x{i}", a) for i, a in enumerate(axes)], data=data)
+    return mesh, axes, data
+
+
+def random_points(axes, size, seed=0):
+    rng = np.random.RandomState(seed)
+    return [rng.uniform(a[0] - 1, a[-1] + 1, size=size) for a in axes]
+
+
+@pytest.mark.parametrize("ndim", [1, 2, 3, 4, 5, 6])
+def test_multilinear_exact_on_affine(ndim):
+    mesh, axes, coefs = affine_mesh(ndim)
+    points = [np.random.uniform(a[0], a[-1], size=50) for a in axes]
+    expected = sum(c * p for c, p in zip(coefs, points)) + 1.
+    np.testing.assert_allclose(mesh.interpolation(*points), expected)
+    np.testing.assert_allclose(
+        mesh.interpolation(*points, extrap='linear'), expected)
+
+
+@pytest.mark.parametrize("extrap", ['hold', 'linear'])
+@pytest.mark.parametrize("interp", ['linear', 'hold', 'nearest'])
+@pytest.mark.parametrize("ndim", [1, 2, 3, 4])
+def test_multilinear_matches_reference(ndim, interp, extrap):
+    mesh, axes, data = random_mesh(ndim)
+    points = random_points(axes, 100)
+    # the breakpoints themselves, the last ones included
+    n = len(axes[-1])
+    points = [np.r_[p, a[np.arange(n) % len(a)]] for p, a in zip(points, axes)]
+    np.testing.assert_allclose(
+        mesh.interpolation(*points, interp=interp, extrap=extrap),
+        multilinear(axes, data, points, interp, extrap), rtol=1e-12,
+        atol=1e-12)
+
+
+@pytest.mark.parametrize("extrap", ['hold', 'linear'])
+def test_sorted_and_unsorted_targets(extrap):
+    mesh, axes, data = random_mesh(3)
+    points = random_points(axes, 200)
+    # repeated targets, and breakpoints, along the walked axis
+    points[0][::10] = np.resize(axes[0], 20)
+    expected = multilinear(axes, data, points, extrap=extrap)
+    for order in (np.arange(200), np.argsort(points[0]),
+                  np.argsort(points[0])[::-1]):
+        np.testing.assert_allclose(
+            mesh.interpolation(*[p[order] for p in points], extrap=extrap),
+            expected[order], rtol=1e-12, atol=1e-12)
+
+
+def test_last_breakpoint():
+    mesh, axes, data = random_mesh(2)
+    points = [a[[0, -1, -1, -2]] for a in axes]
+    np.testing.assert_array_equal(mesh.interpolation(*points),
+                                  data[[0, -1, -1, -2], [0, -1, -1, -2]])
+
+
+@pytest.mark.parametrize("interp", ["linear", "nearest"])
+def test_threads_match_reference(interp):
+    mesh, axes, data = random_mesh(3)
+    # enough targets for four threads, checked on a sample of every chunk
+    points = random_points(axes, 100_000)
+    res = mesh.interpolation(*points, interp=interp, threads=4)
+    sample = slice(None, None, 50)
+    np.testing.assert_allclose(
+        res[sample], multilinear(axes, data, [p[sample] for p in points],
+                                 interp), rtol=1e-12, atol=1e-12)
+    np.testing.assert_array_equal(
+        res, mesh.interpolation(*points, interp=interp, threads=1))
+
+
+@pytest.mark.parametrize("extrap", ['hold', 'linear'])
+@pytest.mark.parametrize("ndim", [1, 2, 3, 4])
+def test_grid_matches_reference(ndim, extrap):
+    mesh, axes, data = random_mesh(ndim)
+    points = [random_points([a], 4 + i, seed=i)[0]
+              for i, a in enumerate(axes)]
+    # the grid is the tensor product of the targets
+    grids = np.meshgrid(*points, indexing='ij')
+    for interp in ('linear', 'nearest'):
+        res = mesh.interpolation(*points, interp=interp, extrap=extrap,
+                                 grid=True)
+        assert res.shape == tuple(len(p) for p in points)
+        np.testing.assert_allclose(
+            res, multilinear(axes, data, grids, interp, extrap), rtol=1e-12,
+            atol=1e-12)
+
+
+def test_broadcast_targets():
+    mesh, axes, data = random_mesh(3)
+    rng = np.random.RandomState(0)
+    scalar = axes[0].mean()
+    vector = rng.uniform(axes[1][0], axes[1][-1], size=20)
+    column = rng.uniform(axes[2][0], axes[2][-1], size=(7, 1))
+    for targets in ((scalar, vector, column), (column, scalar, vector)):
+        res = mesh.interpolation(*targets)
+        assert res.shape == (7, 20)
+        np.testing.assert_allclose(res, multilinear(axes, data, targets),
+                                   rtol=1e-12, atol=1e-12)
+
+    with pytest.raises(ValueError):
+        mesh.interpolation(vector, vector[:3], column)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from lerp import Mesh
+
+from .reference import hermite
+
+CUBIC = ['akima', 'fritsch_butland', 'steffen']
+
+
+def random_mesh(ndim, seed=7):
+    rng = np.random.RandomState(seed)
+    axes = [np.sort(rng.uniform(0, 10, size=5 + i)) for i in range(ndim)]
+    data = rng.randn(*[len(a) for a in axes])
+    mesh = Mesh(coords=[(f"x{i}", a) for i, a in enumerate(axes)], data=data)
+    return mesh, axes, data
+
+
+@pytest.mark.parametrize("interp", CUBIC)
+@pytest.mark.parametrize("ndim", [1, 2, 3])
+def test_matches_tensor_hermite(interp, ndim):
+    mesh, axes, data = random_mesh(ndim)
+    rng = np.random.RandomState(0)
+    # breakpoints included, the ends of the axes and past them
+    points = [np.r_[rng.uniform(a[0] - 1, a[-1] + 1, size=30),
+                    a[0], a[1], a[-1]] for a in axes]
+    np.testing.assert_allclose(mesh.interpolation(*points, interp=interp),
+                               hermite(interp, axes, data, points),
+                               rtol=1e-10, atol=1e-10)
+
+
+@pytest.mark.parametrize("interp", CUBIC)
+def test_exact_on_affine(interp):
+    rng = np.random.RandomState(123)
+    axes = [np.sort(rng.uniform(0, 10, size=3 + i)) for i in range(3)]
+    grids = np.meshgrid(*axes, indexing='ij')
+    mesh = Mesh(coords=[(f"x{i}", a) for i, a in enumerate(axes)],
+                data=1. + grids[0] + 2. * grids[1] + 3. * grids[2])
+    points = [rng.uniform(a[0] - 1, a[-1] + 1, size=50) for a in axes]
+    expected = 1. + points[0] + 2. * points[1] + 3. * points[2]
+    np.testing.assert_allclose(
+        mesh.interpolation(*points, interp=interp, extrap='linear'), expected)
+
+
+@pytest.mark.parametrize("interp", CUBIC)
+def test_exact_on_multilinear(interp):
+    # the cross derivatives of x0 * x1 * x2 are the ones of the interpolant
+    rng = np.random.RandomState(123)
+    axes = [np.sort(rng.uniform(0, 10, size=3 + i)) for i in range(3)]
+    grids = np.meshgrid(*axes, indexing='ij')
+    mesh = Mesh(coords=[(f"x{i}", a) for i, a in enumerate(axes)],
+                data=grids[0] * grids[1] * grids[2] +
+                2. * grids[0] * grids[1] - grids[1] * grids[2])
+    points = [rng.uniform(a[0], a[-1], size=50) for a in axes]
+    expected = points[0] * points[1] * points[2] + \
+        2. * points[0] * points[1] - points[1] * points[2]
+    np.testing.assert_allclose(mesh.interpolation(*points, interp=interp),
+                               expected)
+
+
+@pytest.mark.parametrize("interp", CUBIC)
+def test_short_axes(interp):
+    # slopes from a single cell along x, from two along y
+    mesh = Mesh(coords=[('x', [0., 2.]), ('y', [1., 3., 4.])],
+                data=[[0., 1., 3.], [2., 5., 4.]])
+    x, y = np.array([0.5, 1.5, 1.]), np.array([1., 3., 3.5])
+    np.testing.assert_allclose(
+        mesh.interpolation(x, y, interp=interp),
+        hermite(interp, [np.array([0., 2.]), np.array([1., 3., 4.])],
+                mesh.values, [x, y]), rtol=1e-12)
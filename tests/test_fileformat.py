@@ -0,0 +1,118 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from lerp import Mesh
+from lerp.core.fileformat import read_table
+from lerp.core.interpolation import interpolation
+
+from .reference import hermite, multilinear
+
+AXES = [np.array([1., 2., 3., 6.]), np.array([13., 454., 645., 1233., 1535.])]
+DATA = np.random.RandomState(123).randn(4, 5)
+X, Y = np.array([1.5, 4., 7.]), np.array([20., 700., 1600.])
+
+
+def make_mesh(data=DATA, **kwargs):
+    return Mesh(coords=[('x', AXES[0]), ('y', AXES[1])], data=data.copy(),
+                **kwargs)
+
+
+def test_open(tmp_path):
+    coords = [('x', AXES[0]), ('y', AXES[1])]
+    np.save(tmp_path / 'data.npy', DATA)
+    DATA.astype(np.float32).tofile(tmp_path / 'data.f32')
+
+    mapped = Mesh.open(tmp_path / 'data.npy', coords)
+    table = mapped.compile()
+    # the table reads the mapped buffer in place
+    assert not table.data.flags.writeable
+    assert np.shares_memory(table.data, mapped.values)
+    np.testing.assert_allclose(mapped.interpolation(X, Y),
+                               multilinear(AXES, DATA, [X, Y]), rtol=1e-13)
+
+    raw = Mesh.open(tmp_path / 'data.f32', coords, dtype=np.float32)
+    assert raw.compile().data.dtype == np.float32
+    assert np.shares_memory(raw.compile().data, raw.values)
+    np.testing.assert_allclose(raw.interpolation(X, Y),
+                               multilinear(AXES, DATA, [X, Y]), rtol=1e-5)
+
+    # data in memory is made read-only and used in place
+    loaded = Mesh.open(tmp_path / 'data.npy', coords, mmap=False)
+    assert np.shares_memory(loaded.compile().data, loaded.values)
+    assert not loaded.values.flags.writeable
+
+
+def test_layout(tmp_path):
+    # the file read by hand, as described in lerp.core.fileformat
+    make_mesh(name='m3d').save(tmp_path / 'm3d.lerp')
+    raw = (tmp_path / 'm3d.lerp').read_bytes()
+    magic, version, length = struct.unpack_from('<8sII', raw)
+    assert (magic, version) == (b'LERPMESH', 1)
+    metadata = json.loads(raw[16:16 + length].decode('utf-8'))
+    assert metadata['name'] == 'm3d'
+    assert metadata['dims'] == ['x', 'y']
+    assert metadata['uniform'] == [False, False]
+
+    start = -(-(16 + length) // 64) * 64
+    expected = {'data': DATA, 'axis:x': AXES[0], 'axis:y': AXES[1]}
+    assert set(metadata['arrays']) == set(expected)
+    for key, array in expected.items():
+        entry = metadata['arrays'][key]
+        assert entry['offset'] % 64 == 0
+        assert entry['shape'] == list(array.shape)
+        stored = np.frombuffer(raw, entry['dtype'], array.size,
+                               start + entry['offset'])
+        np.testing.assert_array_equal(stored.reshape(array.shape), array)
+
+
+def test_save_load(tmp_path):
+    m3d = make_mesh(attrs={'unit': 'bar'})
+    m3d.save(tmp_path / 'm3d.lerp', coefficients=['akima'])
+    expected = {'linear': multilinear(AXES, DATA, [X, Y]),
+                'akima': hermite('akima', AXES, DATA, [X, Y]),
+                'steffen': hermite('steffen', AXES, DATA, [X, Y])}
+
+    for mmap in (True, False):
+        loaded = Mesh.load(tmp_path / 'm3d.lerp', mmap=mmap)
+        assert loaded.dims == ('x', 'y')
+        assert loaded.attrs == {'unit': 'bar'}
+        table = loaded.compile()
+        assert np.shares_memory(table.data, loaded.values)
+        assert table.uniform == (False, False)
+        for interp, values in expected.items():
+            np.testing.assert_allclose(
+                loaded.interpolation(X, Y, interp=interp), values,
+                rtol=1e-12)
+        # the saved coefficients are used in place
+        assert not np.shares_memory(table.coefficients('akima'),
+                                    m3d.compile().coefficients('akima'))
+        np.testing.assert_array_equal(table.coefficients('akima'),
+                                      m3d.compile().coefficients('akima'))
+
+    table = read_table(tmp_path / 'm3d.lerp')
+    assert table.dims == ('x', 'y')
+    np.testing.assert_allclose(interpolation(table, [X, Y], interp='akima'),
+                               expected['akima'], rtol=1e-12)
+
+    with pytest.raises(ValueError):
+        Mesh.load(__file__)
+
+
+def test_save_load_variables(tmp_path):
+    data = np.random.RandomState(1).randn(4, 5, 2).astype(np.float32)
+    vector = Mesh(coords=[('x', AXES[0]), ('y', AXES[1]),
+                          (Mesh.VARIABLE_DIM, ['a', 'b'])], data=data)
+    vector.save(tmp_path / 'vector.lerp')
+
+    loaded = Mesh.load(tmp_path / 'vector.lerp')
+    assert loaded.dtype == np.float32
+    assert list(loaded.coords[Mesh.VARIABLE_DIM].values) == ['a', 'b']
+    x, y = X.astype(np.float32), Y.astype(np.float32)
+    res = loaded.interpolation(x, y)
+    for k in range(2):
+        np.testing.assert_allclose(res[:, k],
+                                   multilinear(AXES, data[..., k], [x, y]),
+                                   rtol=1e-5)
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from lerp import Mesh
+
+from .reference import hermite, multilinear
+
+CUBIC = ['akima', 'fritsch_butland', 'steffen']
+
+
+def random_mesh(seed=42):
+    rng = np.random.RandomState(seed)
+    axes = [np.sort(rng.uniform(0, 10, size=6 + i)) for i in range(2)]
+    data = rng.randn(6, 7)
+    mesh = Mesh(coords=[('x', axes[0]), ('y', axes[1])], data=data)
+    return mesh, axes, data
+
+
+def central_differences(f, points, h=1e-6):
+    """Derivatives of f along each coordinate, one row per axis"""
+    grad = []
+    for j in range(len(points)):
+        plus = [p + h * (i == j) for i, p in enumerate(points)]
+        minus = [p - h * (i == j) for i, p in enumerate(points)]
+        grad.append((f(plus) - f(minus)) / (2 * h))
+    return np.array(grad)
+
+
+def test_gradient_on_affine():
+    rng = np.random.RandomState(123)
+    axes = [np.sort(rng.uniform(0, 10, size=3 + i)) for i in range(3)]
+    grids = np.meshgrid(*axes, indexing='ij')
+    mesh = Mesh(coords=[(f"x{i}", a) for i, a in enumerate(axes)],
+                data=1. + grids[0] + 2. * grids[1] + 3. * grids[2])
+    points = [rng.uniform(a[0], a[-1], size=20) for a in axes]
+    grad = mesh.gradient(*points)
+    assert grad.shape == (3, 20)
+    for c, g in zip([1., 2., 3.], grad):
+        np.testing.assert_allclose(g, c)
+
+    value, grad = mesh.interpolation(*points, with_gradient=True)
+    np.testing.assert_allclose(
+        value, 1. + points[0] + 2. * points[1] + 3. * points[2])
+
+
+@pytest.mark.parametrize("extrap", ['hold', 'linear'])
+def test_linear_matches_reference(extrap):
+    mesh, axes, data = random_mesh()
+    rng = np.random.RandomState(0)
+    points = [rng.uniform(a[0] - 1, a[-1] + 1, size=50) for a in axes]
+    value, grad = mesh.interpolation(*points, extrap=extrap,
+                                     with_gradient=True)
+    np.testing.assert_allclose(
+        value, multilinear(axes, data, points, extrap=extrap), rtol=1e-12)
+    np.testing.assert_allclose(
+        grad, central_differences(
+            lambda p: multilinear(axes, data, p, extrap=extrap), points),
+        rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("interp", CUBIC)
+def test_cubic_matches_reference(interp):
+    mesh, axes, data = random_mesh()
+    rng = np.random.RandomState(0)
+    points = [rng.uniform(a[0] - 1, a[-1] + 1, size=50) for a in axes]
+    value, grad = mesh.interpolation(*points, interp=interp,
+                                     with_gradient=True)
+    np.testing.assert_allclose(value, hermite(interp, axes, data, points),
+                               rtol=1e-10, atol=1e-10)
+    np.testing.assert_allclose(
+        grad, central_differences(
+            lambda p: hermite(interp, axes, data, p), points),
+        rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("grid", [False, True])
+def test_gradient_of_scalar_point(grid):
+    # a single value is a float, and its gradient a vector
+    mesh, axes, data = random_mesh()
+    point = [a.mean() for a in axes]
+    expected = central_differences(
+        lambda p: multilinear(axes, data, p), [np.array(p) for p in point])
+    for targets in (point, [[p] for p in point]):
+        value, grad = mesh.interpolation(*targets, grid=grid,
+                                         with_gradient=True)
+        assert isinstance(value, float)
+        np.testing.assert_allclose(value, multilinear(axes, data, point),
+                                   rtol=1e-13)
+        assert grad.shape == (2,)
+        np.testing.assert_allclose(grad, expected, rtol=1e-5)
+        np.testing.assert_array_equal(mesh.gradient(*targets, grid=grid),
+                                      grad)
+
+
+@pytest.mark.parametrize("interp", ['linear', 'akima'])
+def test_grid_gradient(interp):
+    mesh, axes, data = random_mesh()
+    rng = np.random.RandomState(1)
+    x, y = rng.uniform(0, 10, 4), rng.uniform(0, 10, 5)
+    grad = mesh.gradient(x, y, interp=interp, grid=True)
+    assert grad.shape == (2, 4, 5)
+    if interp == 'linear':
+        reference = lambda p: multilinear(axes, data, p)
+    else:
+        reference = lambda p: hermite(interp, axes, data, p)
+    np.testing.assert_allclose(
+        grad, central_differences(reference, [x[:, None], y]),
+        rtol=1e-5, atol=1e-6)
@@ -0,0 +1,22 @@
+import subprocess
+import sys
+
+HEAVY = ['xarray', 'pandas', 'matplotlib', 'openpyxl']
+
+
+def loaded_after(statement):
+    """Heavy modules imported by statement, in a fresh interpreter"""
+    return subprocess.run(
+        [sys.executable, '-c',
+         f'import sys; {statement}; '
+         f'print([m for m in {HEAVY!r} if m in sys.modules])'],
+        capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_lazy_imports():
+    assert loaded_after('import lerp, lerp.util, lerp.serve') == '[]'
+    assert loaded_after('from lerp.core.fileformat import read_table; '
+                        'from lerp.core.shared import SharedTable') == '[]'
+    # the Mesh brings xarray in on first use
+    assert 'xarray' in loaded_after('import lerp; lerp.Mesh')
+    assert 'Mesh' in dir(__import__('lerp'))
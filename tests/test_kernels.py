@@ -0,0 +1,296 @@
+import numpy as np
+import pytest
+
+from lerp import Mesh
+from lerp.core.interpolation import Table, interpolation, stats
+
+from .reference import hermite, multilinear
+
+AXES = [np.array([1., 2., 3., 6.]), np.array([13., 454., 645., 1233., 1535.])]
+DATA = np.random.RandomState(123).randn(4, 5)
+
+# inside, outside, on the breakpoints
+X = np.array([1.2, 5.6, 6., 0., 7., 2., 1., 2.5, 3.])
+Y = np.array([645., 700., 13., 2000., -5., 1535., 454., 1000., 13.])
+
+
+def make_table(data=DATA, **kwargs):
+    return Table(data, AXES, dims=('x', 'y'), **kwargs)
+
+
+@pytest.mark.parametrize("extrap", ['hold', 'linear'])
+@pytest.mark.parametrize("interp", ['linear', 'hold', 'nearest'])
+def test_methods(interp, extrap):
+    table = make_table()
+    np.testing.assert_allclose(
+        interpolation(table, [X, Y], interp=interp, extrap=extrap),
+        multilinear(AXES, DATA, [X, Y], interp, extrap),
+        rtol=1e-13, atol=1e-13)
+    # a DataArray is evaluated as its compiled table
+    mesh = Mesh(coords=[('x', AXES[0]), ('y', AXES[1])], data=DATA)
+    np.testing.assert_array_equal(
+        interpolation(mesh, [X, Y], interp=interp, extrap=extrap),
+        interpolation(table, [X, Y], interp=interp, extrap=extrap))
+
+
+@pytest.mark.parametrize("interp", ['akima', 'fritsch_butland', 'steffen'])
+def test_cubic_methods(interp):
+    np.testing.assert_allclose(
+        interpolation(make_table(), [X, Y], interp=interp),
+        hermite(interp, AXES, DATA, [X, Y]), rtol=1e-12, atol=1e-12)
+
+
+def test_nan_targets():
+    values = interpolation(make_table(), [[np.nan, 1.5, 2.], [700., 700.,
+                                                              np.nan]])
+    assert np.isnan(values[[0, 2]]).all()
+    assert values[1] == multilinear(AXES, DATA, [1.5, 700.])
+
+
+def test_uninitialized():
+    table = Table.__new__(Table)
+    for call in (lambda: interpolation(table, []),
+                 lambda: table.coefficients('akima'),
+                 lambda: table.set_coefficients('akima', [1.]),
+                 lambda: table.__reduce__(),
+                 lambda: table()):
+        with pytest.raises(ValueError, match='not initialized'):
+            call()
+    assert table.data is None
+
+    table = make_table()
+    with pytest.raises(ValueError, match='already initialized'):
+        table.__init__(np.zeros(2), [[0., 1.]])
+    assert table.shape == (4, 5)
+
+
+def test_snapshot():
+    # writeable data is copied, read-only data used in place
+    data = DATA.copy()
+    table = make_table(data)
+    assert not np.shares_memory(table.data, data)
+    assert not table.data.flags.writeable
+    data[...] = 0.
+    np.testing.assert_allclose(interpolation(table, [X, Y]),
+                               multilinear(AXES, DATA, [X, Y]), rtol=1e-13)
+
+    data.flags.writeable = False
+    assert make_table(data).data is data
+
+
+def test_uniform_axes():
+    assert make_table().uniform == (False, False)
+
+    axes = [np.linspace(0, 1, 11), np.array([0., 1., 3.])]
+    data = np.random.RandomState(0).randn(11, 3)
+    table = Table(data, axes)
+    assert table.uniform == (True, False)
+    # the cells found without a search, on and off the breakpoints
+    x = np.r_[np.linspace(-0.1, 1.1, 121), axes[0]]
+    y = np.random.RandomState(1).uniform(-1, 4, x.size)
+    for extrap in ('hold', 'linear'):
+        np.testing.assert_allclose(
+            interpolation(table, [x, y], extrap=extrap),
+            multilinear(axes, data, [x, y], extrap=extrap),
+            rtol=1e-13, atol=1e-13)
+
+
+def test_float32():
+    table = make_table(DATA.astype(np.float32))
+    assert table.data.dtype == np.float32
+
+    x, y = X.astype(np.float32), Y.astype(np.float32)
+    res = interpolation(table, [x, y])
+    assert res.dtype == np.float32
+    np.testing.assert_allclose(res, multilinear(AXES, DATA, [x, y]),
+                               rtol=1e-5, atol=1e-5)
+
+    # Any float64 input gives a float64 result
+    assert interpolation(table, [x, Y]).dtype == np.float64
+    assert interpolation(make_table(), [x, y]).dtype == np.float64
+
+
+def test_out():
+    table = make_table()
+    expected = multilinear(AXES, DATA, [X, Y], extrap='linear')
+
+    out = np.empty(X.size)
+    assert interpolation(table, [X, Y], extrap='linear', out=out) is out
+    np.testing.assert_allclose(out, expected, rtol=1e-13, atol=1e-13)
+
+    out = np.zeros(2 * X.size)
+    interpolation(table, [X, Y], extrap='linear', out=out[::2])
+    np.testing.assert_allclose(out[::2], expected, rtol=1e-13, atol=1e-13)
+    assert (out[1::2] == 0).all()
+
+    with pytest.raises(ValueError):
+        interpolation(table, [X, Y], out=np.empty(3))
+    with pytest.raises(TypeError):
+        interpolation(table, [X, Y], out=np.empty(X.size, dtype=int))
+
+
+def test_hints():
+    table = make_table()
+    hints = np.zeros(2, dtype=np.intp)
+    interpolation(table, [[1.5, 4.], [20., 700.]], hints=hints)
+    assert list(hints) == [2, 2]
+    with pytest.raises(TypeError):
+        interpolation(table, [[1.5], [20.]], hints=[0, 0])
+    with pytest.raises(ValueError):
+        interpolation(table, [[1.5], [20.]], hints=np.zeros(3, np.intp))
+
+    # batches of a sorted stream searched from the cells of the last one
+    rng = np.random.RandomState(0)
+    x = np.sort(rng.uniform(0, 7, 300))
+    y = np.sort(rng.uniform(0, 1600, 300))
+    hints = np.zeros(2, dtype=np.intp)
+    values = [interpolation(table, [x[i:i + 64], y[i:i + 64]], hints=hints)
+              for i in range(0, 300, 64)]
+    np.testing.assert_allclose(np.concatenate(values),
+                               multilinear(AXES, DATA, [x, y]), rtol=1e-13)
+
+
+def test_stats():
+    table = make_table()
+    stats(reset=True)
+    interpolation(table, [[0, 1.5, 7], [645, np.nan, 2000]])
+    counters = stats()
+    if not counters['enabled']:
+        assert counters['calls'] == counters['points'] == 0
+        call = {}
+        interpolation(table, [[7.], [1600.]], stats=call)
+        assert call == counters
+        return
+
+    assert counters['calls'] == 1
+    assert counters['points'] == 3
+    assert counters['extrapolated_low'][0] == 1
+    assert counters['extrapolated_high'] == (1, 1)
+    assert counters['nan'] == 1
+    assert stats(reset=True)['calls'] == 1
+    assert stats()['calls'] == 0
+
+    # the counters of a single call, the global ones adding them up
+    call = {}
+    interpolation(table, [[7.], [1600.]], stats=call)
+    assert call['calls'] == call['points'] == 1
+    assert call['extrapolated_high'] == (1, 1)
+    assert call['nan'] == 0
+    assert stats()['points'] == 1
+    with pytest.raises(TypeError):
+        interpolation(table, [[7.], [1600.]], stats=[])
+
+
+def test_scalar_call():
+    table = make_table()
+    assert (table.interp, table.extrap) == ('linear', 'hold')
+    for interp in ('hold', 'nearest', 'linear'):
+        for extrap in ('hold', 'linear'):
+            table.interp, table.extrap = interp, extrap
+            for x, y in zip(X, Y):
+                value = table(x, y)
+                assert isinstance(value, float)
+                np.testing.assert_allclose(
+                    value, multilinear(AXES, DATA, [x, y], interp, extrap),
+                    rtol=1e-13, atol=1e-13)
+
+    table.interp, table.extrap = 'akima', 'hold'
+    for x, y in zip(X, Y):
+        np.testing.assert_allclose(table(x, y),
+                                   hermite('akima', AXES, DATA, [x, y]),
+                                   rtol=1e-12)
+    assert table(np.float32(1.5), 700) == table(1.5, 700.)
+
+    with pytest.raises(TypeError):
+        table(np.array([1.2]), 645)
+    with pytest.raises(TypeError):
+        table(1.2)
+    with pytest.raises(TypeError):
+        table(1.2, 'a')
+
+
+def test_curve():
+    # the 1-D linear path interpolates from the slopes of the cells
+    rng = np.random.RandomState(123)
+    xp = np.sort(rng.uniform(0, 10, 50))
+    fp = rng.randn(50)
+    table = Table(fp, [xp])
+    x = rng.uniform(-2, 12, 1000)
+    x[:50] = xp
+
+    np.testing.assert_allclose(interpolation(table, [x]),
+                               np.interp(x, xp, fp), rtol=1e-13, atol=1e-13)
+    for targets in (x, np.sort(x)):
+        np.testing.assert_allclose(
+            interpolation(table, [targets], extrap='linear'),
+            multilinear([xp], fp, [targets], extrap='linear'),
+            rtol=1e-12, atol=1e-12)
+    # the breakpoints give their samples exactly
+    np.testing.assert_array_equal(interpolation(table, [xp], extrap='linear'),
+                                  fp)
+
+    # an infinite sample is blended as by the other paths, not inf * 0
+    table = Table(np.array([0., 1., 2., np.inf, 4.]), [np.arange(5.)])
+    x = np.array([2., 2.5, 3., 3.5, -1., 5.])
+    expected = {'hold': [np.nan, np.inf, np.inf, np.inf, 0., 4.],
+                'linear': [np.nan, np.inf, np.inf, np.inf, -1., -np.inf]}
+    for extrap, values in expected.items():
+        np.testing.assert_array_equal(
+            interpolation(table, [x], extrap=extrap), values)
+        np.testing.assert_array_equal(
+            interpolation(table, [x[::-1]], extrap=extrap), values[::-1])
+        np.testing.assert_array_equal(
+            interpolation(table, [x], extrap=extrap, grid=True), values)
+
+
+def test_references():
+    import sys
+
+    mesh = Mesh(coords=[('x', AXES[0]), ('y', AXES[1])], data=DATA)
+    table = mesh.compile()
+    x, y = np.array([1.5, 4., 7.]), np.array([20., 700., 1600.])
+    out = np.empty(3)
+    objects = [mesh, mesh.data, table, x, y, out]
+
+    def counts():
+        return [sys.getrefcount(o) for o in objects]
+
+    before = counts()
+    for _ in range(100):
+        interpolation(mesh, (x, y))
+        interpolation(table, [x, y], interp='akima', with_gradient=True)
+        interpolation(table, [x, y], out=out)
+        interpolation(table, [x, y], grid=True)
+        with pytest.raises(ValueError):
+            interpolation(table, [x, y, x])
+    assert counts() == before
+
+
+def test_set_coefficients():
+    coefficients = make_table().coefficients('akima')
+    assert not coefficients.flags.writeable
+
+    table = make_table()
+    table.set_coefficients('akima', coefficients)
+    with pytest.raises(ValueError, match='already set'):
+        table.set_coefficients('akima', coefficients)
+
+    # a writeable array is copied
+    table = make_table()
+    edited = coefficients.copy()
+    table.set_coefficients('akima', edited)
+    edited[...] = 0.
+    np.testing.assert_array_equal(table.coefficients('akima'), coefficients)
+    np.testing.assert_allclose(interpolation(table, [X, Y], interp='akima'),
+                               hermite('akima', AXES, DATA, [X, Y]),
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_pickle():
+    import pickle
+
+    table = make_table(interp='steffen')
+    copy = pickle.loads(pickle.dumps(table))
+    assert (copy.dims, copy.interp, copy.extrap) == (('x', 'y'), 'steffen',
+                                                     'hold')
+    assert copy(2.5, 500.) == table(2.5, 500.)
@@ -0,0 +1,230 @@
+import numpy as np
+import pytest
+
+from lerp import Mesh
+from lerp.core.interpolation import Table
+
+from .reference import hermite, multilinear
+
+AXES = [np.array([1., 2., 3., 6.]), np.array([13., 454., 645., 1233., 1535.])]
+DATA = np.random.RandomState(123).randn(4, 5)
+
+
+def make_mesh(data=DATA):
+    return Mesh(coords=[('x', AXES[0]), ('y', AXES[1])], data=data.copy())
+
+
+def test_compile_is_cached():
+    m3d = make_mesh()
+    table = m3d.compile()
+    assert isinstance(table, Table)
+    assert table is m3d.compile()
+    assert table.shape == (4, 5)
+    assert table.dims == ('x', 'y')
+    np.testing.assert_array_equal(table.data, DATA)
+    for axis, coords in zip(table.axes, AXES):
+        np.testing.assert_array_equal(axis, coords)
+
+
+def test_compile_invalidated():
+    m3d = make_mesh()
+    table = m3d.compile()
+    m3d[0, 0] = 10.
+    assert m3d.compile() is not table
+    assert m3d.compile().data[0, 0] == 10.
+    assert m3d(1., 13.) == 10.
+
+    table = m3d.compile()
+    m3d.values = np.zeros((4, 5))
+    assert m3d.compile() is not table
+    assert m3d(1., 13.) == 0.
+
+
+def test_values_edited_in_place():
+    m3d = make_mesh()
+    x, y = np.array([1.5, 4., 6.]), np.array([20., 700., 1535.])
+    table = m3d.compile()
+    assert np.shares_memory(table.data, m3d.values)
+
+    # the data of a compiled mesh cannot be written behind its back
+    for edit in (lambda: m3d.values.__setitem__(Ellipsis, 0.),
+                 lambda: m3d.data.__setitem__(slice(None), 0.),
+                 lambda: m3d.values.__imul__(10)):
+        with pytest.raises(ValueError, match='read-only'):
+            edit()
+    assert m3d.compile() is table
+
+    # in place operations on the mesh drop the table
+    m3d *= 10
+    assert m3d.compile() is not table
+    m3d += 1
+    data = 10 * DATA + 1
+    expected = {'linear': multilinear(AXES, data, [x, y]),
+                'nearest': multilinear(AXES, data, [x, y], 'nearest'),
+                'akima': hermite('akima', AXES, data, [x, y])}
+    for interp, values in expected.items():
+        np.testing.assert_allclose(m3d.interpolation(x, y, interp=interp),
+                                   values, rtol=1e-12)
+        np.testing.assert_allclose(
+            m3d.interpolation(x, y, interp=interp, grid=True).diagonal(),
+            values, rtol=1e-12)
+    m3d.values = np.zeros((4, 5))
+    assert m3d(1.5, 20.) == 0.
+
+    # the cached slopes of a curve follow the edits
+    curve = Mesh(coords=[('x', [0., 1., 2., 3.])], data=[0., 1., 4., 9.])
+    x = np.array([0.5, 1.5, 2.5])
+    for values in ([0.5, 2.5, 6.5], [5., 25., 65.]):
+        np.testing.assert_allclose(curve.interpolation(x), values)
+        np.testing.assert_allclose(curve.interpolation(x, grid=True), values)
+        curve *= 10
+
+
+def test_call():
+    m3d = make_mesh()
+    table = m3d.compile()
+    x, y = [1.2, 5.6, 0., 6.], [645., 13., 2000., 1535.]
+    # the mesh extrapolates linearly unless told otherwise
+    for point in zip(x, y):
+        value = m3d(*point)
+        assert isinstance(value, float)
+        np.testing.assert_allclose(
+            value, multilinear(AXES, DATA, point, extrap='linear'),
+            rtol=1e-13)
+    np.testing.assert_allclose(m3d(x, y),
+                               multilinear(AXES, DATA, [x, y], extrap='linear'),
+                               rtol=1e-13)
+    assert m3d(np.float32(1.5), 13) == m3d(1.5, 13.)
+
+    # the options are not set on the compiled table
+    table.interp, table.extrap = 'akima', 'hold'
+    m3d._options['step'] = True
+    for point in zip(x, y):
+        assert m3d(*point) == multilinear(AXES, DATA, point, 'hold')
+    np.testing.assert_array_equal(m3d(x, y),
+                                  multilinear(AXES, DATA, [x, y], 'hold'))
+    assert (table.interp, table.extrap) == ('akima', 'hold')
+
+    # errors of the call are not hidden by the array path
+    with pytest.raises(ValueError):
+        m3d(1.2)
+    with pytest.raises(ValueError):
+        m3d(1.2, 'a')
+
+
+def test_out():
+    m3d = make_mesh()
+    x, y = [1.2, 5.6, 6, 2.5], [645, 700, 13, 1000]
+    out = np.empty(4)
+    assert m3d(x, y, out=out) is out
+    np.testing.assert_allclose(
+        out, multilinear(AXES, DATA, [x, y], extrap='linear'), rtol=1e-13)
+
+
+def test_float32():
+    m32 = make_mesh().astype(np.float32)
+    assert m32.compile().data.dtype == np.float32
+    x = np.array([1.2, 5.6, 6], dtype=np.float32)
+    y = np.array([645, 700, 13], dtype=np.float32)
+    res = m32.interpolation(x, y)
+    assert res.dtype == np.float32
+    np.testing.assert_allclose(res, multilinear(AXES, DATA, [x, y]),
+                               rtol=1e-5)
+
+
+def test_locator():
+    m3d = make_mesh()
+    data = np.random.RandomState(1).randn(4, 5)
+    other = make_mesh(data)
+    x, y = np.array([[1.2], [5.6], [6]]), np.array([645, 700, 13, 1000])
+
+    locator = m3d.locate(x, y)
+    assert locator.shape == (3, 4)
+    for mesh, values in ((m3d, DATA), (other, data)):
+        np.testing.assert_allclose(
+            mesh.apply(locator, extrap='linear'),
+            multilinear(AXES, values, [x, y], extrap='linear'), rtol=1e-13)
+
+    shifted = Mesh(coords=[('x', [1, 2, 3, 7]), ('y', AXES[1])], data=data)
+    with pytest.raises(ValueError):
+        shifted.apply(locator)
+
+    # the subscripts index the data: read-only, and checked if forced
+    for array in (locator.index, locator.weight):
+        with pytest.raises(ValueError):
+            array[:] = 10**12
+    index = locator.index
+    index.flags.writeable = True
+    index[0, 0, 0] = 10**12
+    with pytest.raises(ValueError, match='out of bounds'):
+        m3d.apply(locator)
+    index[0, 0, 0] = -1
+    with pytest.raises(ValueError, match='out of bounds'):
+        m3d.apply(locator)
+
+
+def test_variables():
+    rng = np.random.RandomState(123)
+    data = rng.randn(4, 5, 3)
+    vector = Mesh(coords=[('x', AXES[0]), ('y', AXES[1]),
+                          (Mesh.VARIABLE_DIM, ['a', 'b', 'c'])], data=data)
+    assert vector.compile().nvars == 3
+    assert vector.compile().shape == (4, 5)
+
+    x, y = np.array([[1.2], [5.6], [6]]), np.array([645, 700, 13, 1000])
+    for interp in ('linear', 'hold'):
+        res = vector.interpolation(x, y, interp=interp, extrap='linear')
+        assert res.shape == (3, 4, 3)
+        for k in range(3):
+            np.testing.assert_allclose(
+                res[..., k],
+                multilinear(AXES, data[..., k], [x, y], interp, 'linear'),
+                rtol=1e-12)
+    res = vector.interpolation(x, y, interp='akima')
+    for k in range(3):
+        np.testing.assert_allclose(res[..., k],
+                                   hermite('akima', AXES, data[..., k],
+                                           [x, y]), rtol=1e-12)
+
+
+def test_interpolate_stream():
+    m3d = make_mesh()
+    rng = np.random.RandomState(0)
+    x = np.sort(rng.uniform(0, 7, 1000))
+    y = rng.uniform(0, 1600, 1000)
+    expected = multilinear(AXES, DATA, [x, y])
+    batches = [(x[i:i + 300], y[i:i + 300]) for i in range(0, 1000, 300)]
+
+    for chunk_size in (64, None):
+        for prefetch in (False, True):
+            chunks = [values.copy() for values in m3d.interpolate_stream(
+                iter(batches), chunk_size=chunk_size, prefetch=prefetch)]
+            np.testing.assert_allclose(np.concatenate(chunks), expected,
+                                       rtol=1e-13)
+
+    def failing():
+        yield batches[0]
+        raise OSError("read error")
+
+    with pytest.raises(OSError):
+        list(m3d.interpolate_stream(failing(), prefetch=True))
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError, match="chunk_size"):
+            m3d.interpolate_stream(iter(batches), chunk_size=chunk_size)
+
+
+def test_dask_targets():
+    da = pytest.importorskip('dask.array')
+    m3d = make_mesh()
+    rng = np.random.RandomState(0)
+    x = rng.uniform(0, 7, (40, 30))
+    y = rng.uniform(0, 1600, 30)
+
+    lazy = m3d.interpolation(da.from_array(x, chunks=(16, 10)), y,
+                             interp='akima')
+    assert isinstance(lazy, da.Array)
+    np.testing.assert_allclose(lazy.compute(scheduler='threads'),
+                               hermite('akima', AXES, DATA, [x, y]),
+                               rtol=1e-12)
+    with pytest.raises(NotImplementedError):
+        m3d.interpolation(da.from_array(x), y, grid=True)
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from lerp import Mesh
+from lerp.serve import Client, Server
+
+from .reference import hermite, multilinear
+
+AXES = [np.array([1., 2., 3., 6.]), np.array([13., 454., 645., 1233., 1535.])]
+DATA = np.random.RandomState(123).randn(4, 5)
+POINTS = np.random.RandomState(0).uniform(0, 7, (40, 2)) * [1, 300]
+
+
+def make_mesh():
+    return Mesh(coords=[('x', AXES[0]), ('y', AXES[1])], data=DATA.copy())
+
+
+def test_serve():
+    async def run():
+        server = Server({'m3d': make_mesh()}, window=0.01)
+        listening = await server.start(port=0)
+        port = listening.sockets[0].getsockname()[1]
+        clients = [await Client.connect(port=port) for _ in range(4)]
+        values = await asyncio.gather(*[
+            clients[i % 4]('m3d', *point) for i, point in enumerate(POINTS)])
+        akima = await clients[0]('m3d', *POINTS[0], interp='akima')
+        with pytest.raises(ValueError, match="takes 2 coordinates"):
+            await clients[0]('m3d', 1.)
+        with pytest.raises(ValueError, match="Unknown table"):
+            await clients[0]('other', 1., 2.)
+        for client in clients:
+            await client.close()
+        listening.close()
+        await listening.wait_closed()
+        return values, akima, server
+
+    values, akima, server = asyncio.run(run())
+    np.testing.assert_allclose(values, multilinear(AXES, DATA, POINTS.T),
+                               rtol=1e-13)
+    np.testing.assert_allclose(akima, hermite('akima', AXES, DATA,
+                                              POINTS[:1].T)[0], rtol=1e-12)
+    assert server.queries == len(POINTS) + 1
+    assert server.batches < len(POINTS)
+
+
+def test_protocol():
+    # the queries written by hand, one JSON object per line
+    async def run():
+        server = Server({'m3d': make_mesh()}, window=0.01)
+        listening = await server.start(port=0)
+        port = listening.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for i, point in enumerate(POINTS[:3]):
+            query = {'id': i, 'table': 'm3d', 'point': list(point)}
+            writer.write(json.dumps(query).encode() + b'\n')
+        writer.write(b'{"id": 3, "table": "m3d", "point": [1.5]}\n')
+        await writer.drain()
+        answers = [json.loads(await reader.readline()) for _ in range(4)]
+        writer.close()
+        await writer.wait_closed()
+        listening.close()
+        await listening.wait_closed()
+        return {answer['id']: answer for answer in answers}
+
+    answers = asyncio.run(run())
+    np.testing.assert_allclose([answers[i]['value'] for i in range(3)],
+                               multilinear(AXES, DATA, POINTS[:3].T),
+                               rtol=1e-13)
+    assert 'takes 2 coordinates' in answers[3]['error']
+
+
+def test_cancelled():
+    async def run():
+        # the futures cancelled within the window are skipped by the batch
+        server = Server({'m3d': make_mesh()}, window=0.01)
+        futures = [server.submit('m3d', point) for point in POINTS[:3]]
+        futures[1].cancel()
+        await asyncio.sleep(0.02)
+        with pytest.raises(asyncio.CancelledError):
+            futures[1].result()
+        return [futures[0].result(), futures[2].result()]
+
+    np.testing.assert_allclose(asyncio.run(run()),
+                               multilinear(AXES, DATA, POINTS[[0, 2]].T),
+                               rtol=1e-13)
@@ -0,0 +1,79 @@
+import multiprocessing
+import pickle
+
+import numpy as np
+
+from lerp import Mesh
+from lerp.core import shared as module
+
+from .reference import hermite, multilinear
+
+AXES = [np.array([1., 2., 3., 6.]), np.array([13., 454., 645., 1233., 1535.])]
+DATA = np.random.RandomState(123).randn(4, 5)
+
+
+def make_mesh():
+    return Mesh(coords=[('x', AXES[0]), ('y', AXES[1])], data=DATA.copy())
+
+
+def worker(shared, x, y):
+    """Values of a pool worker, which detaches the block once done"""
+    values = shared(x, y)
+    attached = shared.name in module._attached
+    shared.close()
+    return values, attached, shared.name in module._attached
+
+
+def test_share():
+    m3d = make_mesh()
+    rng = np.random.RandomState(0)
+    x = rng.uniform(0, 7, (50, 3))
+    y = np.array([20., 700., 1600.])
+    expected = multilinear(AXES, DATA, [x, y])
+
+    with m3d.share() as shared:
+        assert len(pickle.dumps(shared)) < 1000
+        np.testing.assert_allclose(shared(x, y), expected, rtol=1e-13)
+        attached = pickle.loads(pickle.dumps(shared))
+        np.testing.assert_allclose(attached(x, y), expected, rtol=1e-13)
+        assert not attached.table().data.flags.writeable
+        assert attached.table().dims == ('x', 'y')
+
+
+def test_detach():
+    m3d = make_mesh()
+    x, y = np.array([1.5, 4., 7.]), np.array([20., 700., 1600.])
+    expected = multilinear(AXES, DATA, [x, y])
+
+    with m3d.share() as shared:
+        # a process that unpickled the handle detaches the block by close
+        attached = pickle.loads(pickle.dumps(shared))
+        table = attached.table()
+        assert shared.name in module._attached
+        attached.close()
+        assert shared.name not in module._attached
+        # the tables remain valid, and the handle attaches the block again
+        assert table(1.5, 700.) == multilinear(AXES, DATA, [1.5, 700.])
+        np.testing.assert_allclose(attached(x, y), expected, rtol=1e-13)
+        attached.close()
+        attached.close()
+        np.testing.assert_allclose(shared(x, y), expected, rtol=1e-13)
+
+        with multiprocessing.Pool(2) as pool:
+            results = pool.starmap(worker, [(shared, x, y)] * 4)
+        for values, before, after in results:
+            np.testing.assert_allclose(values, expected, rtol=1e-13)
+            assert before and not after
+
+
+def test_map_pool():
+    m3d = make_mesh()
+    rng = np.random.RandomState(0)
+    x = rng.uniform(0, 7, (50, 3))
+    y = np.array([20., 700., 1600.])
+    np.testing.assert_allclose(
+        m3d.map_pool(x, y, processes=2, chunk_size=40, interp='akima'),
+        hermite('akima', AXES, DATA, [x, y]), rtol=1e-12)
+    np.testing.assert_allclose(
+        m3d.map_pool(x, y, processes=2, extrap='linear'),
+        multilinear(AXES, DATA, [x, y], extrap='linear'), rtol=1e-13)